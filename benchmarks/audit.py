@@ -0,0 +1,64 @@
+""" Задержка вызовов с валидацией результата при вызове и с фоновой
+    проверкой (Settings.audit).
+
+    Запуск:
+        python benchmarks/audit.py [--calls 2000] [--items 200]
+
+    Функция возвращает список из items моделей. Для каждого варианта
+    выводится среднее время вызова и счетчики аудитора.
+"""
+
+import argparse
+import time
+from typing import List
+
+from pydantic import BaseModel
+
+from valdec.audit import get_auditor
+from valdec.data_classes import Audit, Settings
+from valdec.decorators import validate
+from valdec.validator_pydantic import validator
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+
+
+def measure(name: str, settings: Settings, calls: int, items: list):
+
+    @validate(settings=settings)
+    def handler() -> List[Item]:
+        return items
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        handler()
+    elapsed = time.perf_counter() - start
+
+    stats = ""
+    if settings.audit is not None:
+        auditor = get_auditor(settings.audit)
+        auditor.join()
+        stats = f"   {auditor.get_stats()}"
+
+    print(f"{name:>8} {elapsed / calls * 1e6:10.1f} us/call{stats}")
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--items", type=int, default=200)
+    options = parser.parse_args()
+
+    items = [{"id": i, "name": "item"} for i in range(options.items)]
+
+    measure("inline", Settings(validator=validator), options.calls, items)
+    measure("audit", Settings(
+        validator=validator, audit=Audit(queue_size=100),
+    ), options.calls, items)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+""" Пропускная способность и задержка конкурентных вызовов функций,
+    декорированных async_validate, без объединения валидации аргументов и
+    с объединением (Settings.batch_size).
+
+    Запуск:
+        python benchmarks/batching.py [--calls 10000] [--concurrency 256]
+
+    Одновременно выполняется `concurrency` задач, каждая вызывает
+    декорированную функцию. Выводятся количество вызовов в секунду, средняя
+    задержка и 99-й перцентиль задержки вызова.
+
+    С синхронным валидатором pydantic объединение почти не дает выигрыша:
+    основное время уходит на проверку каждого поля. Выигрыш появляется,
+    когда у каждого вызова валидатора есть постоянная стоимость, например,
+    у асинхронного валидатора, который обращается к внешнему сервису. Ее
+    можно смоделировать параметром `--delay` (в секундах).
+"""
+
+import argparse
+import asyncio
+import time
+from typing import List
+
+from pydantic import BaseModel, StrictInt, StrictStr
+
+from valdec.data_classes import Settings
+from valdec.decorators import async_validate
+from valdec.validator_pydantic import validator
+
+CASES = (
+    ("no batching", 0, 0.0),
+    ("batch 16", 16, 0.0005),
+    ("batch 64", 64, 0.0005),
+    ("batch 256", 256, 0.001),
+)
+
+
+class Item(BaseModel):
+    name: StrictStr
+    count: StrictInt
+
+
+def make_validator(delay: float):
+
+    if not delay:
+        return validator
+
+    async def delayed_validator(annotations, values, is_replace, extra):
+        await asyncio.sleep(delay)
+        return validator(annotations, values, is_replace, extra)
+
+    return delayed_validator
+
+
+def make_func(batch_size: int, batch_window: float, delay: float):
+
+    settings = Settings(
+        validator=make_validator(delay),
+        batch_size=batch_size,
+        batch_window=batch_window,
+    )
+
+    @async_validate("i", "item", settings=settings)
+    async def func(i: StrictInt, item: Item) -> int:
+        return i
+
+    return func
+
+
+async def run(func, calls: int, concurrency: int) -> List[float]:
+    """ Возвращает задержки вызовов."""
+
+    latencies: List[float] = []
+    item = {"name": "item", "count": 1}
+
+    async def worker(count: int):
+        for i in range(count):
+            start = time.perf_counter()
+            await func(i, item)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(
+        worker(calls // concurrency) for _ in range(concurrency)
+    ))
+
+    return latencies
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--delay", type=float, default=0.0)
+    options = parser.parse_args()
+
+    print(f"{'case':>12} {'calls/s':>10} {'mean, ms':>9} {'p99, ms':>8}")
+    for name, batch_size, batch_window in CASES:
+        func = make_func(batch_size, batch_window, options.delay)
+
+        # Первые вызовы создают классы для валидации
+        asyncio.run(run(func, options.concurrency, options.concurrency))
+
+        start = time.perf_counter()
+        latencies = asyncio.run(
+            run(func, options.calls, options.concurrency)
+        )
+        elapsed = time.perf_counter() - start
+
+        latencies.sort()
+        throughput = len(latencies) / elapsed
+        mean = sum(latencies) / len(latencies) * 1000
+        p99 = latencies[int(len(latencies) * 0.99)] * 1000
+        print(f"{name:>12} {throughput:>10.0f} {mean:>9.2f} {p99:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
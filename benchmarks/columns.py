@@ -0,0 +1,82 @@
+""" Валидация записей в виде списка словарей (List[Row]) и в колоночном
+    виде (Columns(Row)).
+
+    Запуск:
+        python benchmarks/columns.py [--rows 100000]
+
+    Для каждого варианта выводится время вызова функции, которая читает
+    одно поле всех записей.
+"""
+
+import argparse
+import array
+import time
+from typing import List
+
+from pydantic import BaseModel
+
+from valdec.data_classes import Columns
+from valdec.decorators import validate
+
+
+class Row(BaseModel):
+    id: int
+    score: float
+    name: str
+
+
+@validate
+def rows_handler(rows: List[Row]) -> float:
+    return sum(row.score for row in rows)
+
+
+@validate
+def columns_handler(batch: Columns(Row)) -> float:
+    return sum(row.score for row in batch)
+
+
+@validate
+def columns_only_handler(batch: Columns(Row)) -> float:
+    return sum(batch.columns["score"])
+
+
+def measure(name: str, func, value):
+
+    start = time.perf_counter()
+    func(value)
+    elapsed = time.perf_counter() - start
+    print(f"{name:>36} {elapsed * 1000:10.1f} ms")
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    options = parser.parse_args()
+
+    count = options.rows
+    rows = [
+        {"id": i, "score": float(i), "name": f"name{i}"}
+        for i in range(count)
+    ]
+    columns = {
+        "id": list(range(count)),
+        "score": [float(i) for i in range(count)],
+        "name": [f"name{i}" for i in range(count)],
+    }
+    arrays = {
+        "id": array.array("q", range(count)),
+        "score": array.array("d", map(float, range(count))),
+        "name": columns["name"],
+    }
+    coerced = {**columns, "score": list(range(count))}
+
+    measure("List[Row], dicts", rows_handler, rows)
+    measure("Columns(Row), lists, row views", columns_handler, columns)
+    measure("Columns(Row), lists, columns", columns_only_handler, columns)
+    measure("Columns(Row), arrays, columns", columns_only_handler, arrays)
+    measure("Columns(Row), coerced column", columns_only_handler, coerced)
+
+
+if __name__ == "__main__":
+    main()
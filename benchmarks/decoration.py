@@ -0,0 +1,105 @@
+""" Стоимость декорирования функций, которые создаются во время работы
+    программы (замыкания, функции из фабрик), и память, которую занимают
+    короткоживущие декорированные функции.
+
+    Запуск:
+        python benchmarks/decoration.py [--functions 100000]
+
+    Выводятся:
+    1. Время декорирования функции, созданной фабрикой (первое
+       декорирование и повторные, когда план валидации для объекта кода
+       функции уже есть в кэше), и время вызова такой функции.
+    2. Пик памяти при создании, декорировании и вызове `functions`
+       функций, которые сразу становятся не нужны, и память, которая
+       остается занятой после их удаления (она не должна расти вместе с
+       количеством функций).
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+import weakref
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from valdec.decorators import validate
+
+
+class Item(BaseModel):
+    name: str
+    count: int
+
+
+def factory(default: int):
+
+    def handler(
+        i: int, items: List[Item], s: Optional[str] = None, *, k: int = default
+    ) -> int:
+        return i + k
+
+    return handler
+
+
+ITEMS = [{"name": "item", "count": 1}]
+
+
+def measure_decoration(functions: int):
+
+    start = time.perf_counter()
+    validate(factory(0))
+    first = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(functions):
+        validate(factory(i))
+    decoration = (time.perf_counter() - start) / functions
+
+    start = time.perf_counter()
+    for i in range(functions):
+        validate(factory(i))(i, ITEMS)
+    decoration_and_call = (time.perf_counter() - start) / functions
+
+    print(f"first decoration:     {first * 1e6:10.1f} us")
+    print(f"decoration:           {decoration * 1e6:10.1f} us")
+    print(f"decoration and call:  {decoration_and_call * 1e6:10.1f} us")
+
+
+def measure_memory(functions: int):
+
+    gc.collect()
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+
+    references = []
+    for i in range(functions):
+        func = validate(factory(i))
+        func(i, ITEMS)
+        if i % 1000 == 0:
+            references.append(weakref.ref(func))
+    del func
+
+    _, peak = tracemalloc.get_traced_memory()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    alive = sum(reference() is not None for reference in references)
+    print(f"peak memory:          {(peak - base) / 1024:10.1f} KiB")
+    print(f"memory after gc:      {(current - base) / 1024:10.1f} KiB")
+    print(f"alive functions:      {alive:10d} of {len(references)} sampled")
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--functions", type=int, default=100000)
+    options = parser.parse_args()
+
+    measure_decoration(options.functions)
+    measure_memory(options.functions)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+""" Валидация данных с общими (повторяющимися по ссылке) вложенными
+    объектами (Settings.is_memoized).
+
+    Запуск:
+        python benchmarks/identity.py [--items 20000]
+
+    В каждом элементе списка - один и тот же словарь пользователя. Для
+    каждого варианта выводится время вызова функции и то, остались ли
+    пользователи общими в отвалидированных данных.
+"""
+
+import argparse
+import time
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from valdec.data_classes import Settings
+from valdec.decorators import validate
+from valdec.validator_pydantic import validator
+
+
+class Address(BaseModel):
+    city: str
+    zip: str
+
+
+class User(BaseModel):
+    id: int
+    name: str
+    address: Address
+    tags: List[str]
+
+
+class Event(BaseModel):
+    id: int
+    user: User
+    owner: Optional[User] = None
+
+
+kept = []
+
+
+def handler(events: List[Event]) -> None:
+    kept.append(events)
+
+
+def measure(name: str, func, value):
+
+    func(value[:10])
+    kept.clear()
+
+    start = time.perf_counter()
+    func(value)
+    elapsed = time.perf_counter() - start
+
+    events = kept.pop()
+    is_shared = events[0].user is events[1].user
+
+    print(f"{name:>14} {elapsed * 1000:10.1f} ms   shared: {is_shared}")
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=20000)
+    options = parser.parse_args()
+
+    user = {
+        "id": 1, "name": "user", "address": {"city": "c", "zip": "z"},
+        "tags": ["tag"] * 20,
+    }
+    events = [{"id": i, "user": user} for i in range(options.items)]
+
+    measure("plain", validate(handler), events)
+    measure("memoized", validate(settings=Settings(
+        validator=validator, is_memoized=True,
+    ))(handler), events)
+    measure("memoized+compact", validate(settings=Settings(
+        validator=validator, is_memoized=True, is_compact=True,
+    ))(handler), events)
+
+
+if __name__ == "__main__":
+    main()
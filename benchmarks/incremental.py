@@ -0,0 +1,91 @@
+""" Передача большого объекта состояния через декорированные функции с
+    повторной валидацией и с валидацией только измененных полей
+    (Settings.is_incremental).
+
+    Запуск:
+        python benchmarks/incremental.py [--items 20000] [--steps 10]
+
+    Каждый шаг изменяет одно поле состояния и одно поле вложенного
+    экземпляра. Для каждого бэкенда выводится среднее время шага.
+"""
+
+import argparse
+import time
+from dataclasses import dataclass
+from typing import List
+
+from pydantic import BaseModel
+from validated_dc import ValidatedDC
+
+from valdec.data_classes import Settings
+from valdec.decorators import validate
+from valdec.validator_pydantic import validator as pydantic_validator
+from valdec.validator_validated_dc import validator as validated_dc_validator
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+
+
+class State(BaseModel):
+    step: int
+    items: List[Item]
+
+
+@dataclass
+class DCItem(ValidatedDC):
+    id: int
+    name: str
+
+
+@dataclass
+class DCState(ValidatedDC):
+    step: int
+    items: List[DCItem]
+
+
+def measure(name: str, validator, state_class: type, value: dict,
+            steps: int):
+
+    for is_incremental in (False, True):
+
+        settings = Settings(validator=validator, is_incremental=is_incremental)
+
+        @validate(settings=settings)
+        def step(state: state_class) -> state_class:
+            state.step += 1
+            state.items[state.step % len(state.items)].name = "changed"
+            return state
+
+        state = step(value)
+
+        start = time.perf_counter()
+        for _ in range(steps):
+            state = step(state)
+        elapsed = (time.perf_counter() - start) / steps
+
+        label = f"{name} {'incremental' if is_incremental else 'full'}"
+        print(f"{label:>26} {elapsed * 1000:10.2f} ms/step")
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=20000)
+    parser.add_argument("--steps", type=int, default=10)
+    options = parser.parse_args()
+
+    value = {
+        "step": 0,
+        "items": [{"id": i, "name": "item"} for i in range(options.items)],
+    }
+
+    measure("pydantic", pydantic_validator, State, value, options.steps)
+    measure(
+        "validated_dc", validated_dc_validator, DCState, value, options.steps
+    )
+
+
+if __name__ == "__main__":
+    main()
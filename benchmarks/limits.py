@@ -0,0 +1,62 @@
+""" Отклонение слишком больших значений ограничениями (Settings.limits) и
+    полной валидацией.
+
+    Запуск:
+        python benchmarks/limits.py [--items 200000]
+
+    Для каждого варианта выводится время вызова функции со значением, в
+    котором items элементов (при ограничении max_items=1000), и со
+    значением с глубокой вложенностью (при ограничении max_depth=32).
+"""
+
+import argparse
+import time
+from typing import Any, Dict, List
+
+from valdec.data_classes import Limits, Settings
+from valdec.decorators import validate
+from valdec.errors import ValidationArgumentsError
+from valdec.validator_pydantic import validator
+
+
+def handler(items: List[Dict[str, Any]], tree: Any = None) -> None:
+    pass
+
+
+def measure(name: str, func, **kwargs) -> float:
+
+    start = time.perf_counter()
+    try:
+        func(**kwargs)
+        status = "accepted"
+    except ValidationArgumentsError:
+        status = "rejected"
+    elapsed = time.perf_counter() - start
+
+    print(f"{name:>16} {elapsed * 1000:10.3f} ms   {status}")
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=200000)
+    options = parser.parse_args()
+
+    items = [{"id": i, "name": "item"} for i in range(options.items)]
+    tree: Any = []
+    for _ in range(200):
+        tree = [tree]
+
+    plain = validate(handler)
+    limited = validate(settings=Settings(validator=validator, limits=Limits(
+        max_depth=32, max_items=1000, max_length=4096, max_keys=100,
+    )))(handler)
+
+    measure("large plain", plain, items=items)
+    measure("large limited", limited, items=items)
+    measure("deep plain", plain, items=[], tree=tree)
+    measure("deep limited", limited, items=[], tree=tree)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+""" Валидация большого списка моделей одним вызовом валидатора и по частям
+    в пуле процессов (Settings.chunk_size).
+
+    Запуск:
+        python benchmarks/parallel.py [--rows 200000] [--chunk 20000]
+
+    Для каждого варианта выводится время вызова функции.
+"""
+
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+from pydantic import BaseModel
+
+from valdec.data_classes import Settings
+from valdec.decorators import validate
+from valdec.validator_pydantic import validator
+
+
+class Row(BaseModel):
+    id: int
+    score: float
+    name: str
+    tags: List[str]
+
+
+def handler(rows: List[Row]) -> int:
+    return len(rows)
+
+
+def measure(name: str, func, value):
+
+    start = time.perf_counter()
+    func(value)
+    elapsed = time.perf_counter() - start
+    print(f"{name:>36} {elapsed * 1000:10.1f} ms")
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--chunk", type=int, default=20000)
+    options = parser.parse_args()
+
+    rows = [
+        {"id": i, "score": i, "name": f"name{i}", "tags": ["a", "b"]}
+        for i in range(options.rows)
+    ]
+
+    measure("one call", validate(handler), rows)
+
+    with ProcessPoolExecutor() as executor:
+        chunked = validate(settings=Settings(
+            validator=validator, chunk_size=options.chunk,
+            executor=executor,
+        ))(handler)
+        # Первый вызов запускает процессы пула
+        chunked(rows[:options.chunk * 2])
+        measure(f"chunks of {options.chunk}", chunked, rows)
+
+
+if __name__ == "__main__":
+    main()
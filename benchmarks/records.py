@@ -0,0 +1,81 @@
+""" Замена значений экземплярами моделей pydantic и компактными записями
+    (Settings.is_compact).
+
+    Запуск:
+        python benchmarks/records.py [--items 100000]
+
+    Для каждого варианта выводится время вызова функции и память, которую
+    занимают отвалидированные данные после вызова.
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+from typing import List
+
+from pydantic import BaseModel
+
+from valdec.data_classes import Settings
+from valdec.decorators import validate
+from valdec.validator_pydantic import validator
+
+
+class Tag(BaseModel):
+    name: str
+
+
+class Item(BaseModel):
+    id: int
+    score: float
+    tag: Tag
+
+
+kept = []
+
+
+def handler(items: List[Item]) -> None:
+    kept.append(items)
+
+
+def measure(name: str, func, value):
+
+    func(value[:10])
+    kept.clear()
+    gc.collect()
+
+    start = time.perf_counter()
+    func(value)
+    elapsed = time.perf_counter() - start
+    kept.clear()
+    gc.collect()
+
+    tracemalloc.start()
+    func(value)
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    kept.clear()
+
+    print(f"{name:>10} {elapsed * 1000:10.1f} ms {retained / 2**20:10.1f} MiB")
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=100000)
+    options = parser.parse_args()
+
+    items = [
+        {"id": i, "score": i / 2, "tag": {"name": "tag"}}
+        for i in range(options.items)
+    ]
+
+    measure("models", validate(handler), items)
+    measure("records", validate(settings=Settings(
+        validator=validator, is_compact=True,
+    ))(handler), items)
+
+
+if __name__ == "__main__":
+    main()
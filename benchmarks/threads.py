@@ -0,0 +1,99 @@
+""" Масштабирование вызовов декорированных функций по потокам.
+
+    Запуск:
+        python benchmarks/threads.py [--calls 20000] [--max-threads 32]
+
+    Для каждого количества потоков (1, 2, 4, ... max-threads) все потоки
+    одновременно вызывают декорированные функции, и выводится общая
+    пропускная способность (вызовов в секунду) и её отношение к
+    пропускной способности одного потока.
+
+    В сборках CPython с GIL пропускная способность не растет с количеством
+    потоков, но и не должна заметно падать. В сборках без GIL (free-threaded)
+    она должна расти, так как чтение из кэшей valdec выполняется без
+    блокировок.
+"""
+
+import argparse
+import threading
+import time
+from typing import List
+
+from pydantic import BaseModel, StrictInt, StrictStr
+
+from valdec.decorators import validate
+
+
+class Item(BaseModel):
+    name: StrictStr
+    count: StrictInt
+
+
+@validate
+def func_simple(i: StrictInt, s: StrictStr) -> StrictInt:
+    return i
+
+
+@validate
+def func_model(items: List[Item]) -> int:
+    return len(items)
+
+
+ITEMS = [{"name": "item", "count": i} for i in range(5)]
+
+
+def work(calls: int, barrier: threading.Barrier):
+    barrier.wait()
+    for i in range(calls):
+        func_simple(i, "s")
+        func_model(ITEMS)
+
+
+def run(threads_count: int, calls: int) -> float:
+    """ Возвращает количество вызовов в секунду."""
+
+    barrier = threading.Barrier(threads_count + 1)
+    threads = [
+        threading.Thread(target=work, args=(calls, barrier))
+        for _ in range(threads_count)
+    ]
+    for thread in threads:
+        thread.start()
+
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return threads_count * calls * 2 / elapsed
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--max-threads", type=int, default=32)
+    options = parser.parse_args()
+
+    # Первые вызовы создают классы для валидации
+    work(1, threading.Barrier(1))
+
+    threads_counts = []
+    count = 1
+    while count <= options.max_threads:
+        threads_counts.append(count)
+        count *= 2
+
+    print(f"{'threads':>8} {'calls/s':>12} {'scaling':>8}")
+    base = None
+    for threads_count in threads_counts:
+        calls = max(options.calls // threads_count, 1)
+        throughput = run(threads_count, calls)
+        base = base or throughput
+        scaling = throughput / base
+        print(f"{threads_count:>8} {throughput:>12.0f} {scaling:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
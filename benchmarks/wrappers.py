@@ -0,0 +1,59 @@
+""" Накладные расходы обычной обертки (`*args, **kwargs`) и обертки с
+    сигнатурой декорируемой функции (Settings.is_specialized).
+
+    Запуск:
+        python benchmarks/wrappers.py [--number 100000]
+
+    Чтобы измерить только работу декоратора, используется функция
+    валидатор, которая ничего не проверяет.
+"""
+
+import argparse
+import timeit
+
+from valdec.data_classes import Settings
+from valdec.decorators import validate
+
+
+def noop_validator(annotations, values, is_replace, extra):
+    return None
+
+
+generic = Settings(validator=noop_validator)
+specialized = Settings(validator=noop_validator, is_specialized=True)
+
+
+def func(a: int, b: str, c: int = 1, *, k: int = 2) -> int:
+    return a
+
+
+FUNCTIONS = {
+    "plain": func,
+    "generic": validate(settings=generic)(func),
+    "specialized": validate(settings=specialized)(func),
+}
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=100000)
+    options = parser.parse_args()
+
+    calls = {
+        "f(1, 's')": lambda f: f(1, "s"),
+        "f(1, 's', 3, k=4)": lambda f: f(1, "s", 3, k=4),
+    }
+
+    print(f"{'call':<20} {'wrapper':<12} {'us/call':>8}")
+    for call_name, call in calls.items():
+        for name, function in FUNCTIONS.items():
+            seconds = min(timeit.repeat(
+                lambda: call(function), number=options.number, repeat=3
+            ))
+            us = seconds / options.number * 1e6
+            print(f"{call_name:<20} {name:<12} {us:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import asyncio
+import copy
+import threading
+from typing import List
+
+from valdec.audit import MAX_SETTINGS, get_auditor, get_stats
+from valdec.data_classes import Audit, Settings
+from valdec.decorators import async_validate, validate
+from valdec.errors import ValidationReturnError
+from valdec.utils import after
+from valdec.validator_pydantic import validator
+
+
+async def async_validator(annotations, values, is_replace, extra):
+    return validator(annotations, values, is_replace, extra)
+
+
+def make_settings(queue_size=100, snapshot=None, validator=validator):
+
+    violations = []
+    audit = Audit(
+        queue_size=queue_size, snapshot=snapshot,
+        on_violation=lambda *args: violations.append(args),
+    )
+
+    return Settings(validator=validator, audit=audit), violations
+
+
+def test_audit():
+
+    settings, violations = make_settings()
+
+    @validate(settings=settings)
+    def func(value) -> int:
+        return value
+
+    # Результат возвращается без валидации и замены
+    assert func(1) == 1
+    assert func("2") == "2"
+    assert func("x") == "x"
+
+    auditor = get_auditor(settings.audit)
+    auditor.join()
+
+    assert len(violations) == 1
+    name, error = violations[0]
+    assert name.endswith(":test_audit.<locals>.func")
+    assert isinstance(error, ValidationReturnError)
+    assert auditor.get_stats() == {
+        "submitted": 3, "dropped": 0, "checked": 3, "violations": 1,
+        "pending": 0,
+    }
+    assert get_stats()[settings.audit] == auditor.get_stats()
+
+
+def test_audit_after():
+
+    settings, violations = make_settings()
+
+    def func(value) -> int:
+        return value
+
+    assert after(func, "x", (), False, settings) == "x"
+
+    get_auditor(settings.audit).join()
+    assert len(violations) == 1
+
+
+def test_audit_drop():
+
+    settings, violations = make_settings(queue_size=2)
+    blocked = threading.Event()
+    released = threading.Event()
+
+    def blocking_validator(annotations, values, is_replace, extra):
+        blocked.set()
+        released.wait()
+        return validator(annotations, values, is_replace, extra)
+
+    settings.validator = blocking_validator
+    auditor = get_auditor(settings.audit)
+
+    @validate(settings=settings)
+    def func(value) -> int:
+        return value
+
+    # Первый результат проверяется фоновым потоком, два - в очереди,
+    # остальные отбрасываются
+    func("x")
+    blocked.wait()
+    for _ in range(5):
+        func("x")
+    released.set()
+    auditor.join()
+
+    assert auditor.dropped == 3
+    assert auditor.checked == 3
+    assert len(violations) == 3
+
+
+def test_audit_snapshot():
+
+    settings, violations = make_settings(snapshot=copy.deepcopy)
+
+    @validate(settings=settings)
+    def func() -> List[int]:
+        return [1]
+
+    # Изменение результата после вызова не влияет на проверку
+    result = func()
+    result.append("x")
+
+    get_auditor(settings.audit).join()
+    assert violations == []
+
+
+def test_async_audit():
+
+    for audit_validator in (validator, async_validator):
+
+        settings, violations = make_settings(validator=audit_validator)
+        auditor = get_auditor(settings.audit)
+
+        @async_validate(settings=settings)
+        async def func(value) -> int:
+            return value
+
+        async def main():
+            results = [await func(value) for value in (1, "x")]
+            await auditor.async_join()
+            return results
+
+        assert asyncio.run(main()) == [1, "x"]
+        auditor.join()
+
+        assert len(violations) == 1
+        assert auditor.checked == 2
+
+
+def test_audit_threads():
+
+    settings, violations = make_settings(queue_size=10_000)
+
+    @validate(settings=settings)
+    def func(value) -> int:
+        return value
+
+    threads_count = 8
+    calls_count = 200
+    barrier = threading.Barrier(threads_count)
+
+    def call():
+        barrier.wait()
+        for i in range(calls_count):
+            func(i if i % 2 else "x")
+
+    threads = [threading.Thread(target=call) for _ in range(threads_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    auditor = get_auditor(settings.audit)
+    auditor.join()
+
+    # Счетчики изменяются под блокировкой, ни одно изменение не потеряно
+    total = threads_count * calls_count
+    assert auditor.get_stats() == {
+        "submitted": total, "dropped": 0, "checked": total,
+        "violations": total // 2, "pending": 0,
+    }
+
+
+def test_audit_settings_maxsize():
+
+    audit = Audit(queue_size=12345)
+    auditor = get_auditor(audit)
+
+    for _ in range(MAX_SETTINGS + 10):
+        settings = Settings(validator=validator, audit=audit)
+        audit_settings = auditor.get_settings(settings)
+        assert audit_settings.audit is None
+        assert auditor.get_settings(settings) is audit_settings
+
+    # Настройки для проверки хранятся для ограниченного количества настроек
+    assert len(auditor._settings) == MAX_SETTINGS
@@ -0,0 +1,166 @@
+import asyncio
+from dataclasses import replace
+from typing import List
+
+import pytest
+from pydantic import BaseModel, StrictInt
+
+from valdec.batching import Batcher, get_batch_name, split_batch_result
+from valdec.data_classes import Settings
+from valdec.decorators import async_validate
+from valdec.errors import ValidationArgumentsError
+from valdec.validator_pydantic import validator as pydantic_validator
+from valdec.validator_validated_dc import validator as validated_dc_validator
+
+
+class Item(BaseModel):
+    count: StrictInt
+
+
+def counting_settings(validator, batch_size=8):
+
+    calls = []
+
+    def counting_validator(annotations, values, is_replace, extra):
+        if "return" not in values:
+            calls.append(len(values))
+        return validator(annotations, values, is_replace, extra)
+
+    settings = Settings(
+        validator=counting_validator, batch_size=batch_size,
+        batch_window=0.01,
+    )
+
+    return settings, calls
+
+
+def test_split_batch_result():
+
+    replaceable = {
+        get_batch_name("a", 0): 1,
+        get_batch_name("b", 0): 2,
+        get_batch_name("a", 2): 3,
+    }
+
+    assert split_batch_result(replaceable, 3) == [
+        {"a": 1, "b": 2}, None, {"a": 3},
+    ]
+    assert split_batch_result(None, 2) == [None, None]
+
+
+@pytest.mark.parametrize(
+    "validator", [pydantic_validator, validated_dc_validator],
+)
+def test_batching(validator):
+
+    settings, calls = counting_settings(validator)
+
+    @async_validate(settings=settings)
+    async def func(i: int, values: List[int], s: str = "s") -> int:
+        return i + sum(values)
+
+    # Значение по умолчанию отвалидировано при декорировании
+    assert calls == [1]
+    calls.clear()
+
+    async def main():
+        return await asyncio.gather(*(func(i, [i]) for i in range(5)))
+
+    assert asyncio.run(main()) == [0, 2, 4, 6, 8]
+
+    # Аргументы всех вызовов отвалидированы одним вызовом валидатора
+    assert calls == [10]
+
+
+def test_batching_max_size():
+
+    settings, calls = counting_settings(pydantic_validator, batch_size=2)
+
+    @async_validate(settings=settings)
+    async def func(i: int) -> int:
+        return i
+
+    async def main():
+        return await asyncio.gather(*(func(i) for i in range(5)))
+
+    assert asyncio.run(main()) == [0, 1, 2, 3, 4]
+    assert calls == [2, 2, 1]
+
+
+def test_batching_errors():
+
+    settings, calls = counting_settings(pydantic_validator)
+
+    @async_validate(settings=settings)
+    async def func(i: StrictInt) -> int:
+        return i
+
+    async def main():
+        return await asyncio.gather(
+            func(1), func("2"), func(3), return_exceptions=True,
+        )
+
+    first, second, third = asyncio.run(main())
+
+    assert first == 1
+    assert isinstance(second, ValidationArgumentsError)
+    assert third == 3
+
+    # Пакет не прошел валидацию, и каждый вызов валидировался отдельно
+    assert calls == [3, 1, 1, 1]
+
+
+def test_batching_replace():
+
+    settings, calls = counting_settings(pydantic_validator)
+
+    @async_validate(settings=settings)
+    async def func(item: Item, i: int = 0) -> int:
+        assert isinstance(item, Item)
+        return item.count + i
+
+    async def main():
+        return await asyncio.gather(
+            func({"count": 1}), func({"count": 2}, 1),
+        )
+
+    assert asyncio.run(main()) == [1, 3]
+
+
+def test_batching_different_arguments():
+
+    settings, calls = counting_settings(pydantic_validator)
+
+    @async_validate(settings=replace(settings, is_specialized=True))
+    async def func(i: int, s: str = "s") -> str:
+        return f"{i}{s}"
+
+    calls.clear()
+
+    async def main():
+        return await asyncio.gather(
+            func(1), func(2, "a"), func(3), func(4, "b"),
+        )
+
+    assert asyncio.run(main()) == ["1s", "2a", "3s", "4b"]
+    assert sorted(calls) == [2, 4]
+
+
+def test_batching_tasks():
+
+    batcher = Batcher(2, 0.01, Settings(validator=pydantic_validator))
+
+    async def main():
+        calls = [
+            asyncio.ensure_future(batcher.validate({"i": int}, {"i": i}))
+            for i in range(2)
+        ]
+        await asyncio.sleep(0)
+        # Задача валидации пакета хранится до ее завершения
+        assert len(batcher._tasks) == 1
+        results = await asyncio.gather(*calls)
+        await asyncio.sleep(0)
+        assert not batcher._tasks
+        return results
+
+    assert asyncio.run(main()) == [{"i": 0}, {"i": 1}]
@@ -0,0 +1,152 @@
+import gc
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pydantic import conint
+
+from valdec.caches import Cache, WeakCache
+from valdec.decorators import validate
+from valdec.validator_pydantic import _models
+
+
+def test_cache():
+
+    cache = Cache()
+    created = []
+
+    def factory(value):
+        created.append(value)
+        return value * 2
+
+    assert cache.get("key", factory, 1) == 2
+    assert cache.get("key", factory, 100) == 2  # Значение уже в кэше
+    assert created == [1]
+    assert "key" in cache
+    assert len(cache) == 1
+
+    # Ключ, который нельзя хэшировать, не кэшируется
+    assert cache.get(["key"], factory, 3) == 6
+    assert cache.get(["key"], factory, 3) == 6
+    assert created == [1, 3, 3]
+    assert len(cache) == 1
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_cache_maxsize():
+
+    cache = Cache(maxsize=2)
+
+    assert cache.get("a", str.upper, "a") == "A"
+    assert cache.get("b", str.upper, "b") == "B"
+    assert cache.get("a", str.upper, "x") == "A"  # "a" - последний
+    assert cache.get("c", str.upper, "c") == "C"
+
+    # Удалено значение, которое не запрашивалось после добавления
+    assert len(cache) == 2
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+
+    # Новое значение не удаляется первым, даже если остальные запрашивались
+    assert cache.get("a", str.upper, "x") == "A"
+    assert cache.get("c", str.upper, "x") == "C"
+    assert cache.get("d", str.upper, "d") == "D"
+    assert "d" in cache and len(cache) == 2
+
+
+def test_bounded_cache_threads():
+
+    cache = Cache(maxsize=8)
+    threads_count = 16
+    barrier = threading.Barrier(threads_count)
+
+    def get(thread):
+        barrier.wait()
+        for i in range(2000):
+            key = (i * 7 + thread) % 12
+            assert cache.get(key, str, key) == str(key)
+            # Значения добавляются до удаления лишних (каждым потоком)
+            assert len(cache) <= cache.maxsize + threads_count
+
+    with ThreadPoolExecutor(threads_count) as executor:
+        list(executor.map(get, range(threads_count)))
+
+    assert len(cache) == 8
+    assert set(cache._order) == set(cache._data)
+
+
+def test_weak_cache():
+
+    class Key:
+        pass
+
+    cache = WeakCache()
+    obj = Key()
+
+    assert cache.get(obj, "a", str.upper, "a") == "A"
+    assert cache.get(obj, "a", str.upper, "b") == "A"
+    assert cache.get(obj, "b", str.upper, "b") == "B"
+    assert obj in cache
+    assert len(cache) == 1
+
+    # Количество значений ограничивается для каждого объекта
+    bounded = WeakCache(maxsize=1)
+    assert bounded.get(obj, "a", str.upper, "a") == "A"
+    assert bounded.get(obj, "b", str.upper, "b") == "B"
+    assert bounded.get(obj, "a", str.upper, "x") == "X"
+
+    # Значения удаляются вместе с объектом
+    del obj
+    gc.collect()
+    assert len(cache) == 0
+
+
+def test_cache_threads():
+
+    cache = Cache()
+    created = []
+    threads_count = 16
+    barrier = threading.Barrier(threads_count)
+
+    def factory(key):
+        created.append(key)
+        time.sleep(0.01)  # Медленное создание значения
+        return object()
+
+    def get(key):
+        barrier.wait()
+        return cache.get(key, factory, key)
+
+    with ThreadPoolExecutor(threads_count) as executor:
+        results = list(executor.map(get, [i % 2 for i in range(16)]))
+
+    # Для каждого ключа значение создано только один раз
+    assert sorted(created) == [0, 1]
+    assert len({id(result) for result in results}) == 2
+
+
+def test_first_calls_from_threads():
+
+    # Новый тип, чтобы классов для валидации с ним еще не было в кэше
+    Count = conint(strict=True, ge=0)
+
+    @validate
+    def func(i: Count, s: Count) -> Count:
+        return i + s
+
+    models_count = len(_models)
+    threads_count = 16
+    barrier = threading.Barrier(threads_count)
+
+    def call(i):
+        barrier.wait()
+        return func(i, 1)
+
+    with ThreadPoolExecutor(threads_count) as executor:
+        results = list(executor.map(call, range(threads_count)))
+
+    assert results == [i + 1 for i in range(threads_count)]
+    # Классы для аргументов и для результата
+    assert len(_models) == models_count + 2
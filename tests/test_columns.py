@@ -0,0 +1,188 @@
+import array
+import asyncio
+from dataclasses import dataclass
+from typing import List
+
+import pytest
+from pydantic import BaseModel, root_validator, validator
+from validated_dc import ValidatedDC
+
+from valdec.columns import ColumnBatch, is_valid_column
+from valdec.data_classes import Columns, Settings
+from valdec.decorators import async_validate, validate
+from valdec.errors import ValidationArgumentsError
+from valdec.validator_pydantic import validator as pydantic_validator
+from valdec.validator_validated_dc import validator as validated_dc_validator
+
+
+class Tag(BaseModel):
+    name: str
+
+
+class Row(BaseModel):
+    id: int
+    score: float
+    tags: List[Tag] = []
+
+
+@dataclass
+class RowDC(ValidatedDC):
+    id: int
+    score: float
+
+
+class FakeArray(list):
+    """ Массив с атрибутом dtype (как у numpy)."""
+
+    class dtype:
+        kind = "i"
+
+
+def test_is_valid_column():
+
+    assert is_valid_column(int, [1, 2, 3])
+    assert is_valid_column(int, (1, 2))
+    assert is_valid_column(int, [])
+    assert is_valid_column(int, array.array("q", [1, 2]))
+    assert is_valid_column(int, FakeArray([1, 2]))
+    assert is_valid_column(float, array.array("d", [1.0]))
+
+    assert not is_valid_column(int, [1, "2"])
+    assert not is_valid_column(int, [1, True])
+    assert not is_valid_column(float, [1.0, 2])
+    assert not is_valid_column(float, FakeArray([1]))
+    assert not is_valid_column(int, array.array("d", [1.0]))
+    assert not is_valid_column(Tag, [Tag(name="a")])
+
+
+@validate
+def handler(batch: Columns(Row)) -> int:
+    assert isinstance(batch, ColumnBatch)
+    return sum(row.id for row in batch)
+
+
+def test_columns():
+
+    ids = array.array("q", [1, 2, 3])
+    batch_values = {
+        "id": ids,
+        "score": [1.0, "2.5", 3],
+        "tags": [[], [{"name": "a"}], [Tag(name="b")]],
+    }
+
+    @validate
+    def func(batch: Columns(Row)) -> ColumnBatch:
+        return batch
+
+    batch = func(batch_values)
+
+    assert len(batch) == 3
+    # Колонки, которые не нужно приводить, не копируются
+    assert batch.columns["id"] is ids
+    # Остальные отвалидированы (и приведены) целиком
+    assert batch.columns["score"] == [1.0, 2.5, 3.0]
+    assert batch[1].tags == [Tag(name="a")]
+
+    row = batch[-1]
+    assert (row.id, row.score) == (3, 3.0)
+    assert row.as_dict() == {"id": 3, "score": 3.0, "tags": [Tag(name="b")]}
+    assert row.to_row() == Row(id=3, score=3.0, tags=[Tag(name="b")])
+    assert batch.to_rows()[0] == Row(id=1, score=1.0)
+    with pytest.raises(IndexError):
+        batch[3]
+
+    # Колонки полей со значениями по умолчанию необязательны
+    batch = func({"id": [1, 2], "score": [1.0, 2.0]})
+    assert batch[0].tags == []
+
+    # Отвалидированный ColumnBatch передается без изменений
+    assert func(batch) is batch
+
+    assert handler({"id": [1, 2], "score": [0.5, 0.5]}) == 3
+
+
+@pytest.mark.parametrize("value, message", [
+    ([{"id": 1, "score": 1.0}], "not a mapping"),
+    ({"id": [1], "score": [1.0], "x": [1]}, "unknown columns ['x']"),
+    ({"id": [1]}, "missing columns ['score']"),
+    ({"id": [1, 2], "score": [1.0]}, "different lengths"),
+    ({"id": [1, "x"], "score": [1.0, 2.0]}, "batch__id"),
+])
+def test_columns_errors(value, message):
+
+    with pytest.raises(ValidationArgumentsError) as error:
+        handler(value)
+    assert message in str(error.value)
+
+
+def test_columns_validated_dc():
+
+    settings = Settings(validator=validated_dc_validator)
+
+    @validate(settings=settings)
+    def func(batch: Columns(RowDC)) -> float:
+        return sum(row.score for row in batch)
+
+    assert func({"id": [1, 2], "score": [0.5, 1.5]}) == 2.0
+
+    with pytest.raises(ValidationArgumentsError):
+        func({"id": [1, 2], "score": [0.5, "1.5"]})
+
+
+def test_columns_async():
+
+    async def async_validator(annotations, values, is_replace, extra):
+        await asyncio.sleep(0)
+        return pydantic_validator(annotations, values, is_replace, extra)
+
+    @async_validate(settings=Settings(validator=async_validator))
+    async def func(batch: Columns(Row)) -> float:
+        return sum(row.score for row in batch)
+
+    assert asyncio.run(func({"id": [1, 2], "score": ["0.5", 1]})) == 1.5
+
+
+class ValidatedRow(BaseModel):
+    id: int
+
+    @validator("id")
+    def check_id(cls, value):
+        assert value > 0
+        return value
+
+
+class RootValidatedRow(BaseModel):
+    id: int
+
+    @root_validator
+    def check(cls, values):
+        return values
+
+
+class TaggedRow(BaseModel):
+    id: int
+    tag: ValidatedRow
+
+
+@pytest.mark.parametrize("row", [ValidatedRow, RootValidatedRow])
+def test_columns_row_validators(row):
+
+    # Валидаторы модели записи не применялись бы к колонкам
+    with pytest.raises(TypeError) as error:
+        @validate
+        def func(batch: Columns(row)):
+            pass
+    assert row.__name__ in str(error.value)
+
+
+def test_columns_nested_validators():
+
+    @validate
+    def func(batch: Columns(TaggedRow)) -> int:
+        return sum(row.tag.id for row in batch)
+
+    assert func({"id": [1, 2], "tag": [{"id": 1}, {"id": 2}]}) == 3
+
+    # Валидаторы вложенных моделей применяются
+    with pytest.raises(ValidationArgumentsError):
+        func({"id": [1], "tag": [{"id": 0}]})
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+
+import pytest
+from pydantic import StrictInt
+
+import valdec
+from valdec.decorators import async_validate, validate
+from valdec.errors import ValidationArgumentsError
+
+
+@validate
+def func(i: StrictInt) -> StrictInt:
+    return i
+
+
+@async_validate
+async def async_func(i: StrictInt) -> StrictInt:
+    await asyncio.sleep(0)
+    return i
+
+
+def test_trusted():
+
+    with pytest.raises(ValidationArgumentsError):
+        func("1")
+
+    with valdec.trusted():
+        assert func("1") == "1"  # Без валидации
+
+        with valdec.trusted(False):
+            with pytest.raises(ValidationArgumentsError):
+                func("1")
+
+        assert func("1") == "1"
+
+    with pytest.raises(ValidationArgumentsError):
+        func("1")
+
+
+def test_trusted_threads():
+
+    results = {}
+    entered = threading.Event()
+    checked = threading.Event()
+
+    def trusted_thread():
+        with valdec.trusted():
+            entered.set()
+            results["trusted"] = func("1")
+            checked.wait()
+
+    def other_thread():
+        entered.wait()
+        try:
+            func("1")
+        except ValidationArgumentsError:
+            results["other"] = "error"
+        checked.set()
+
+    threads = [
+        threading.Thread(target=trusted_thread),
+        threading.Thread(target=other_thread),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {"trusted": "1", "other": "error"}
+
+
+def test_trusted_tasks():
+
+    async def trusted_task():
+        with valdec.trusted():
+            return await async_func("1")
+
+    async def other_task():
+        try:
+            await async_func("1")
+        except ValidationArgumentsError:
+            return "error"
+
+    async def main():
+        return await asyncio.gather(trusted_task(), other_task())
+
+    assert asyncio.run(main()) == ["1", "error"]
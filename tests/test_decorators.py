@@ -1,10 +1,21 @@
 import asyncio
+import json
+from typing import List, Optional
 
 import pytest
-from pydantic import StrictInt, StrictStr
+from pydantic import BaseModel, StrictInt, StrictStr
 
-from valdec.decorators import async_validate, validate
-from valdec.errors import ValidationArgumentsError, ValidationReturnError
+import valdec
+
+from valdec.data_classes import Route, Settings
+from valdec.decorators import async_validate, default_settings, validate
+from valdec.errors import (JSONParsingError, ValidationArgumentsError,
+                           ValidationReturnError)
+from valdec.markers import is_marked
+from valdec.validator_pydantic import dumps
+from valdec.validator_primitive import is_primitive
+from valdec.validator_primitive import validator as primitive_validator
+from valdec.validator_pydantic import validator as pydantic_validator
 
 
 @validate  # Проверяет все аргументы с аннотацией, и return
@@ -55,3 +66,323 @@ def test_validate_simple_exclude_false_async():
         asyncio.run(func_a("1", s))  # Ошибка в аргументе
     with pytest.raises(ValidationArgumentsError):
         asyncio.run(func_a(1, 2))    # Ошибка в аргументе
+
+
+# Асинхронная функция для валидации. Проверяет, что значения полей имеют
+# тип из аннотации (и записывает в `calls` имена полей каждого вызова).
+
+calls = []
+
+
+async def async_validator(annotations, values, is_replace, extra):
+
+    calls.append(tuple(values))
+    await asyncio.sleep(0)
+
+    for name, value in values.items():
+        if not isinstance(value, annotations[name]):
+            raise TypeError(f"{name} is not {annotations[name]}")
+
+    if is_replace:
+        return {name: value for name, value in values.items()}
+
+
+async_settings = Settings(validator=async_validator)
+concurrent_settings = Settings(validator=async_validator, is_concurrent=True)
+
+
+@async_validate(settings=async_settings)
+async def func_b(i: int, s: str) -> str:
+    return s
+
+
+@async_validate(settings=concurrent_settings)
+async def func_c(i: int, s: str) -> str:
+    return s
+
+
+def test_async_validator():
+
+    calls.clear()
+    assert asyncio.run(func_b(1, "s")) == "s"
+    # Один вызов для аргументов, один для результата
+    assert calls == [("i", "s"), ("return", )]
+
+    with pytest.raises(ValidationArgumentsError) as error:
+        asyncio.run(func_b(1, 2))
+    assert "s is not" in str(error.value)
+
+
+def test_async_validator_concurrent():
+
+    calls.clear()
+    assert asyncio.run(func_c(1, "s")) == "s"
+    # Аргументы валидируются отдельными вызовами
+    assert calls == [("i", ), ("s", ), ("return", )]
+
+    with pytest.raises(ValidationArgumentsError) as error:
+        asyncio.run(func_c("1", 2))
+    # Сообщение содержит ошибки всех полей
+    assert "i is not" in str(error.value)
+    assert "s is not" in str(error.value)
+
+
+def test_async_validator_with_sync_decorator():
+
+    with pytest.raises(TypeError):
+        @validate(settings=async_settings)
+        def func(i: int):
+            pass
+
+    # Асинхронная функция валидатора в правиле
+    route_settings = Settings(
+        validator=pydantic_validator,
+        routes=(Route(is_match=is_primitive, validator=async_validator), ),
+    )
+    with pytest.raises(TypeError) as error:
+        @validate(settings=route_settings)
+        def func_routed(i: int):
+            pass
+    assert "coroutine function" in str(error.value)
+
+
+class Item(BaseModel):
+    i: StrictInt
+
+
+validated_items = []
+
+
+def counting_validator(annotations, values, is_replace, extra):
+    validated_items.append(tuple(values))
+    return pydantic_validator(annotations, values, is_replace, extra)
+
+
+trust_settings = Settings(
+    validator=counting_validator, is_trust_instances=True
+)
+trust_marked_settings = Settings(
+    validator=counting_validator,
+    is_trust_instances=True, is_trust_marked_only=True,
+)
+
+
+@validate(settings=trust_settings)
+def func_trust(item: Item, i: StrictInt) -> Optional[Item]:
+    return item
+
+
+@validate(settings=trust_marked_settings)
+def func_trust_marked(item: Item) -> Item:
+    return item
+
+
+def test_trust_instances():
+
+    validated_items.clear()
+
+    item = Item(i=1)
+    # Экземпляр не валидируется и не копируется, результат тоже
+    assert func_trust(item, 1) is item
+    assert validated_items == [("i", )]
+
+    validated_items.clear()
+    result = func_trust({"i": 1}, 1)
+    assert isinstance(result, Item)
+    assert is_marked(result)
+    assert validated_items == [("item", "i"), ]
+
+    with pytest.raises(ValidationArgumentsError):
+        func_trust({"i": "1"}, 1)
+
+
+def test_trust_marked_only():
+
+    validated_items.clear()
+
+    item = Item(i=1)
+    result = func_trust_marked(item)  # Не помечен - валидируется
+    assert result is not item
+    assert is_marked(result)
+    # Результат - уже помеченный экземпляр, он не валидируется
+    assert validated_items == [("item", )]
+
+    validated_items.clear()
+    assert func_trust_marked(result) is result
+    assert validated_items == []
+
+
+json_settings = Settings(validator=pydantic_validator, is_parse_json=True)
+
+
+@validate(settings=json_settings)
+def func_json(item: Item, items: List[Item]) -> int:
+    return item.i + sum(item.i for item in items)
+
+
+def test_parse_json():
+
+    assert func_json(b'{"i": 1}', '[{"i": 2}, {"i": 3}]') == 6
+    assert func_json({"i": 1}, []) == 1
+
+    with pytest.raises(ValidationArgumentsError) as error:
+        func_json(b'{"i": 1', [])
+    assert "JSONParsingError" in str(error.value)
+    # Ошибку разбора можно отличить от ошибки валидации по типу
+    assert isinstance(error.value, JSONParsingError)
+    assert isinstance(error.value.__cause__, JSONParsingError)
+
+    with pytest.raises(ValidationArgumentsError) as error:
+        func_json(b'{"i": "x"}', [])
+    assert not isinstance(error.value, JSONParsingError)
+
+
+def test_parse_json_loads():
+
+    loaded = []
+
+    def json_loads(value):
+        loaded.append(value)
+        return json.loads(value)
+
+    settings = Settings(
+        validator=pydantic_validator, is_parse_json=True,
+        extra={"json_loads": json_loads},
+    )
+    assert settings.extra == {"json_loads": json_loads, "is_parse_json": True}
+
+    @validate(settings=settings)
+    def func(item: Item) -> int:
+        return item.i
+
+    assert func('{"i": 1}') == 1
+    assert loaded == ['{"i": 1}']
+
+
+dumps_settings = Settings(validator=pydantic_validator, result_dumps=dumps)
+
+
+@validate(settings=dumps_settings)
+def func_dumps(i: int) -> Item:
+    return {"i": i}
+
+
+def test_result_dumps():
+
+    assert func_dumps(1) == b'{"i":1}'
+
+    # JSON возвращается и без валидации
+    with valdec.trusted():
+        assert func_dumps(2) == b'{"i":2}'
+
+
+routed_validators = []
+
+
+def routed_validator(annotations, values, is_replace, extra):
+    routed_validators.append(tuple(values))
+    return primitive_validator(annotations, values, is_replace, extra)
+
+
+routes_settings = Settings(
+    validator=pydantic_validator,
+    routes=(Route(is_match=is_primitive, validator=routed_validator), ),
+)
+
+
+@validate(settings=routes_settings)
+def func_routes(i: int, item: Item, s: Optional[str] = None) -> int:
+    assert isinstance(item, Item)
+    return i + item.i
+
+
+@async_validate(settings=routes_settings)
+async def async_func_routes(i: int, item: Item) -> int:
+    assert isinstance(item, Item)
+    return i + item.i
+
+
+def test_routes():
+
+    routed_validators.clear()
+    assert func_routes(1, {"i": 2}) == 3
+    assert routed_validators == [("i", ), ("return", )]
+
+    # Значения, которые не прошли валидацию по правилу, валидируются
+    # основным валидатором (с приведением типов)
+    routed_validators.clear()
+    assert func_routes("1", {"i": 2}) == 3
+    assert routed_validators == [("i", ), ("return", )]
+
+    with pytest.raises(ValidationArgumentsError) as error:
+        func_routes("one", {"i": 2})
+    assert "int" in str(error.value)
+
+    routed_validators.clear()
+    assert asyncio.run(async_func_routes(True, {"i": 2})) == 3
+    assert routed_validators == [("i", ), ("return", )]
+
+
+specialized_settings = Settings(
+    validator=pydantic_validator, is_specialized=True
+)
+
+
+def test_validate_defaults():
+
+    # Ошибка в значении по умолчанию обнаруживается при декорировании
+    with pytest.raises(ValidationArgumentsError) as error:
+        @validate
+        def func_bad(i: StrictInt = "1"):
+            pass
+    assert "Default values of" in str(error.value)
+    assert "func_bad" in str(error.value)
+
+    # Отвалидированные значения по умолчанию заменяют исходные
+    for settings in (default_settings, specialized_settings):
+
+        @validate(settings=settings)
+        def func(
+            a: int, item: Item = {"i": 1}, *, k: Item = {"i": 2}
+        ) -> tuple:
+            return item, k
+
+        item, k = func(1)
+        assert isinstance(item, Item) and item.i == 1
+        assert isinstance(k, Item) and k.i == 2
+
+    # Сама функция не изменяется: ее можно декорировать повторно, и без
+    # замены значений она получает исходные значения по умолчанию
+    def func_raw(item: Item = {"i": 1}, *, k: Item = {"i": 2}) -> tuple:
+        return item, k
+
+    replaced = validate(func_raw)
+    assert func_raw.__defaults__ == ({"i": 1}, )
+    assert func_raw.__kwdefaults__ == {"k": {"i": 2}}
+    assert isinstance(replaced()[0], Item)
+
+    not_replaced = validate(settings=Settings(
+        validator=pydantic_validator, is_replace_args=False,
+    ))(func_raw)
+    assert not_replaced() == ({"i": 1}, {"i": 2})
+    assert func_raw() == ({"i": 1}, {"i": 2})
+    assert not_replaced.__wrapped__ is func_raw
+
+    with pytest.raises(ValidationArgumentsError):
+        @async_validate(settings=async_settings)
+        async def func_async(i: int, s: str = 1):
+            pass
+
+    async def main():
+
+        # Асинхронный валидатор при работающем цикле событий
+        calls.clear()
+
+        @async_validate(settings=async_settings)
+        async def func_async(i: int, s: str = "s") -> str:
+            return s
+
+        assert calls == [("s", )]
+        return await func_async(1)
+
+    assert asyncio.run(main()) == "s"
@@ -0,0 +1,177 @@
+import copy
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import pytest
+from pydantic import BaseModel, validator
+from validated_dc import ValidatedDC
+
+from valdec.data_classes import Settings
+from valdec.decorators import validate
+from valdec.errors import ValidationArgumentsError
+from valdec.identity import _nodes, find_shared, get_node
+from valdec.records import Record
+from valdec.validator_pydantic import is_model
+from valdec.validator_pydantic import validator as pydantic_validator
+from valdec.validator_validated_dc import validator as validated_dc_validator
+
+# Значения, с которыми валидировались экземпляры User
+user_calls = []
+
+
+class User(BaseModel):
+    id: int
+    name: str
+
+    @validator("name")
+    def count(cls, value):
+        user_calls.append(value)
+        return value
+
+
+class Event(BaseModel):
+    kind: str
+    user: User
+    owner: Optional[User] = None
+
+
+class Tree(BaseModel):
+    value: int
+    children: List["Tree"] = []
+
+
+Tree.update_forward_refs()
+
+
+@dataclass
+class DCUser(ValidatedDC):
+    id: int
+    name: str
+
+
+@dataclass
+class DCEvent(ValidatedDC):
+    kind: str
+    user: DCUser
+
+
+def test_nodes():
+
+    assert get_node(List[str], is_model) is None
+    assert get_node(Dict[str, int], is_model) is None
+    assert get_node(List[Event], is_model) is get_node(List[Event], is_model)
+    # Узлы хранятся в ограниченном кэше
+    assert (List[Event], is_model) in _nodes
+    assert _nodes.maxsize is not None
+    assert get_node(Tuple[int, Event], is_model).items[0] is None
+
+    # Модель ссылается сама на себя
+    node = get_node(Tree, is_model)
+    assert node.fields[0][2].items is node
+
+    user = {"id": 1, "name": "a"}
+    values = {"events": [{"kind": "x", "user": user, "owner": user}] * 2}
+    shared = find_shared({"events": get_node(List[Event], is_model)}, values)
+    assert [(value, node.model) for _, node, value in shared] == [
+        (user, User), (values["events"][0], Event),
+    ]
+
+
+@pytest.mark.parametrize("is_compact", [False, True])
+def test_memoized(is_compact):
+
+    settings = Settings(
+        validator=pydantic_validator, is_memoized=True, is_compact=is_compact,
+    )
+
+    @validate(settings=settings)
+    def func(events: List[Event], pair: Tuple[int, User]) -> List[Event]:
+        assert events[0].user is events[1].user
+        assert events[0].user is events[2].owner
+        assert events[0].user is not events[3].user
+        assert events[1].user is pair[1]
+        assert isinstance(events[0], Record) is is_compact
+        return events
+
+    user = {"id": "1", "name": "shared"}
+    events = [
+        {"kind": "x", "user": user},
+        {"kind": "y", "user": user},
+        {"kind": "z", "user": {"id": 2, "name": "b"}, "owner": user},
+        {"kind": "w", "user": {"id": 1, "name": "a"}},
+    ]
+    source = copy.deepcopy(events)
+
+    user_calls.clear()
+    result = func(events, (1, user))
+
+    assert result[0].user.id == 1
+    # Входящие значения не изменяются
+    assert events == source
+    # Общий объект валидируется один раз (и еще раз - результат функции)
+    assert user_calls.count("shared") == 1 + (3 if is_compact else 0)
+
+    if not is_compact:
+        assert result[0].user is result[1].user
+
+
+def test_memoized_shared_model():
+
+    settings = Settings(validator=pydantic_validator, is_memoized=True)
+
+    @validate(settings=settings)
+    def func(events: List[Event]) -> None:
+        assert events[0] is events[1]
+        assert events[0].user is events[1].owner
+
+    user = {"id": 1, "name": "shared"}
+    event = {"kind": "x", "user": user, "owner": user}
+
+    user_calls.clear()
+    func([event, event])
+
+    assert user_calls == ["shared"]
+
+
+def test_memoized_recursive():
+
+    settings = Settings(validator=pydantic_validator, is_memoized=True)
+
+    @validate(settings=settings)
+    def func(tree: Tree) -> None:
+        assert tree.children[0] is tree.children[1].children[0]
+        assert tree.children[0].value == 1
+
+    leaf = {"value": "1"}
+    func({"value": 0, "children": [leaf, {"value": 2, "children": [leaf]}]})
+
+
+def test_memoized_errors():
+
+    settings = Settings(validator=pydantic_validator, is_memoized=True)
+
+    @validate(settings=settings)
+    def func(events: List[Event]) -> None:
+        pass
+
+    user = {"id": "x", "name": "a"}
+    with pytest.raises(ValidationArgumentsError) as error:
+        func([{"kind": "x", "user": user}, {"kind": "y", "user": user}])
+
+    # Путь к ошибке такой же, как без общих объектов
+    assert "events -> 0 -> user -> id" in str(error.value)
+
+
+def test_memoized_validated_dc():
+
+    settings = Settings(validator=validated_dc_validator, is_memoized=True)
+
+    @validate(settings=settings)
+    def func(events: List[DCEvent]) -> List[DCEvent]:
+        assert events[0].user is events[1].user
+        return events
+
+    user = {"id": 1, "name": "a"}
+    result = func([{"kind": "x", "user": user}, {"kind": "y", "user": user}])
+
+    assert isinstance(result[0].user, DCUser)
@@ -0,0 +1,241 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import pytest
+from pydantic import BaseModel, root_validator, validator
+from validated_dc import ValidatedDC
+
+from valdec.data_classes import Settings
+from valdec.decorators import validate
+from valdec.errors import ValidationArgumentsError
+from valdec.markers import (TrackedFieldsSet, get_dirty, get_group, is_marked,
+                            track)
+from valdec.validator_pydantic import validator as pydantic_validator
+from valdec.validator_validated_dc import validator as validated_dc_validator
+
+# Значения, с которыми валидировались поля name экземпляров Item
+item_calls = []
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+
+    @validator("name")
+    def check_name(cls, value):
+        item_calls.append(value)
+        if value == "forbidden":
+            raise ValueError("forbidden name")
+        return value
+
+
+class State(BaseModel):
+    step: int
+    items: List[Item]
+    index: Dict[str, Item] = {}
+    parent: Optional["State"] = None
+
+
+State.update_forward_refs()
+
+
+@dataclass
+class DCItem(ValidatedDC):
+    id: int
+    name: str
+
+
+@dataclass
+class DCState(ValidatedDC):
+    step: int
+    items: List[DCItem]
+
+
+def test_track():
+
+    item = Item(id=1, name="a")
+    assert get_dirty(item) is None
+
+    assert track(item)
+    assert type(item.__fields_set__) is TrackedFieldsSet
+    assert is_marked(item)
+    assert get_dirty(item) == set()
+
+    item.name = "b"
+    assert get_dirty(item) == {"name"}
+    # Отслеживание не влияет на данные экземпляра
+    assert item.dict(exclude_unset=True) == {"id": 1, "name": "b"}
+
+    track(item)
+    assert get_dirty(item) == set()
+
+    instance = DCItem(id=1, name="a")
+    assert track(instance)
+    instance.name = "b"
+    assert get_dirty(instance) == {"name"}
+    assert instance == DCItem(id=1, name="b")
+
+    assert not track(1)
+    assert get_dirty(1) is None
+
+
+def make_state():
+
+    return {
+        "step": 0,
+        "items": [{"id": i, "name": f"n{i}"} for i in range(10)],
+        "index": {"a": {"id": 1, "name": "a"}},
+    }
+
+
+def test_incremental():
+
+    settings = Settings(validator=pydantic_validator, is_incremental=True)
+
+    @validate(settings=settings)
+    def step(state: State) -> State:
+        return state
+
+    state = step(make_state())
+    assert get_dirty(state) == set()
+    assert get_dirty(state.items[3]) == set()
+    assert get_dirty(state.index["a"]) == set()
+
+    # Неизмененный экземпляр не копируется и не валидируется
+    item_calls.clear()
+    assert step(state) is state
+    assert item_calls == []
+
+    # Валидируются только измененные поля (с валидаторами модели)
+    state.step = "1"
+    state.items[3].name = "x"
+    assert get_group(state).dirty
+    assert step(state) is state
+    assert state.step == 1
+    assert item_calls == ["x"]
+    assert not get_group(state).dirty
+    assert get_dirty(state) == set()
+
+    # Новое значение поля валидируется и отслеживается
+    state.items = state.items + [{"id": "10", "name": "n10"}]
+    state.parent = {"step": 0, "items": []}
+    step(state)
+    assert isinstance(state.items[10], Item)
+    assert state.items[10].id == 10
+    assert isinstance(state.parent, State)
+    state.items[10].name = "y"
+    state.parent.step = 2
+    item_calls.clear()
+    step(state)
+    assert item_calls == ["y"]
+
+    state.index["a"].name = "forbidden"
+    with pytest.raises(ValidationArgumentsError) as error:
+        step(state)
+    assert "state -> index -> a -> 1 validation error for Item" in \
+        str(error.value)
+    assert "forbidden name" in str(error.value)
+
+    state.index["a"].name = "a"
+    state.items[2].id = "x"
+    with pytest.raises(ValidationArgumentsError) as error:
+        step(state)
+    assert "state -> items -> 2 -> 1 validation error" in str(error.value)
+
+
+class Range(BaseModel):
+    lo: int
+    hi: int
+    size: int = 0
+
+    @root_validator(pre=True)
+    def check_types(cls, values):
+        if values.get("lo") == "min":
+            values["lo"] = 0
+        return values
+
+    @root_validator(skip_on_failure=True)
+    def check_range(cls, values):
+        if values["lo"] > values["hi"]:
+            raise ValueError("lo > hi")
+        values["size"] = values["hi"] - values["lo"]
+        return values
+
+
+def test_incremental_root_validators():
+
+    settings = Settings(validator=pydantic_validator, is_incremental=True)
+
+    @validate(settings=settings)
+    def step(value: Range) -> Range:
+        return value
+
+    value = step({"lo": 1, "hi": 3})
+    assert value.size == 2
+
+    # Валидаторы модели выполняются после валидации измененных полей, а
+    # поля, которые они изменили, заменяются
+    value.hi = "10"
+    assert step(value) is value
+    assert value.hi == 10
+    assert value.size == 9
+
+    value.lo = "min"
+    step(value)
+    assert value.lo == 0
+    assert value.size == 10
+
+    value.lo = 50
+    with pytest.raises(ValidationArgumentsError) as error:
+        step(value)
+    assert "lo > hi" in str(error.value)
+
+
+def test_incremental_untracked():
+
+    settings = Settings(validator=pydantic_validator, is_incremental=True)
+
+    @validate(settings=settings)
+    def step(state: State) -> State:
+        return state
+
+    # Экземпляр, созданный не valdec, валидируется как обычно
+    state = State(**make_state())
+    result = step(state)
+    assert result is not state
+    assert get_dirty(result) == set()
+
+    # Если вложенный экземпляр изменен, то при обходе находится и словарь
+    # на месте модели (добавленный в список на месте), и поле валидируется
+    # целиком
+    result.items.append({"id": 11, "name": "n11"})
+    result.items[0].name = "z"
+    step(result)
+    assert isinstance(result.items[-1], Item)
+
+
+def test_incremental_validated_dc():
+
+    settings = Settings(
+        validator=validated_dc_validator, is_incremental=True,
+    )
+
+    @validate(settings=settings)
+    def step(state: DCState) -> DCState:
+        return state
+
+    state = step({
+        "step": 0, "items": [{"id": i, "name": "n"} for i in range(5)],
+    })
+    assert step(state) is state
+
+    state.items[1].id = "x"
+    with pytest.raises(ValidationArgumentsError) as error:
+        step(state)
+    assert "state -> items -> 1 ->" in str(error.value)
+
+    state.items[1].id = 1
+    state.items = state.items + [{"id": 5, "name": "n"}]
+    assert step(state) is state
+    assert isinstance(state.items[5], DCItem)
+    assert get_dirty(state) == set()
@@ -0,0 +1,119 @@
+from typing import Any, Dict, List, Optional
+
+import pytest
+from pydantic import BaseModel, StrictInt, StrictStr
+
+from valdec import levels
+from valdec.decorators import validate
+from valdec.errors import ValidationArgumentsError, ValidationReturnError
+from valdec.utils import get_shallow_types
+
+
+class Profile(BaseModel):
+    age: StrictInt
+
+
+@validate
+def func(i: StrictInt, profile: Optional[Profile] = None) -> StrictStr:
+    return str(i)
+
+
+@validate
+def func_other(i: StrictInt) -> StrictInt:
+    return i
+
+
+@pytest.fixture(autouse=True)
+def reset():
+    levels.reset_levels()
+    yield
+    levels.reset_levels()
+
+
+def test_get_shallow_types():
+
+    assert get_shallow_types(int) == (int, )
+    assert get_shallow_types(float) == (float, int)
+    assert get_shallow_types(StrictInt) == (int, )
+    assert get_shallow_types(List[Profile]) == (list, )
+    assert get_shallow_types(Dict[str, int]) == (dict, )
+    assert get_shallow_types(Profile) == (Profile, dict)
+    assert get_shallow_types(Optional[int]) == (int, type(None))
+    assert get_shallow_types(None) == (type(None), )
+    assert get_shallow_types(Any) is None
+    assert get_shallow_types(Optional[Any]) is None
+    assert get_shallow_types("Profile") is None
+
+
+def test_levels():
+
+    assert levels.get_level(func) == levels.FULL
+    with pytest.raises(ValidationArgumentsError):
+        func(1, {"age": "1"})
+
+    levels.set_function_level(func, levels.SHALLOW)
+    assert levels.get_level(func) == levels.SHALLOW
+    assert levels.get_level(func_other) == levels.FULL
+
+    # Вложенная модель не проверяется и не заменяется
+    assert func(1, {"age": "1"}) == "1"
+    # Тип значения верхнего уровня проверяется
+    with pytest.raises(ValidationArgumentsError):
+        func("1")
+    with pytest.raises(ValidationArgumentsError):
+        func(1, [])
+
+    levels.set_function_level(func, levels.OFF)
+    assert func("1", []) == "1"
+
+    levels.set_function_level(func, None)
+    with pytest.raises(ValidationArgumentsError):
+        func("1")
+
+
+def test_levels_shallow_return():
+
+    @validate
+    def func_return(i: Any) -> StrictInt:
+        return i
+
+    levels.set_function_level(func_return, levels.SHALLOW)
+    assert func_return(1) == 1
+    with pytest.raises(ValidationReturnError):
+        func_return("1")
+
+
+def test_levels_modules_and_global():
+
+    name = levels.get_function_name(func)
+    assert name == f"{__name__}:func"
+
+    levels.set_global_level(levels.OFF)
+    assert func("1") == "1"
+    assert func_other("1") == "1"
+
+    # Уровень модуля важнее глобального
+    levels.set_module_level("tests.*", levels.FULL)
+    levels.set_module_level("other.*", levels.OFF)
+    with pytest.raises(ValidationArgumentsError):
+        func("1")
+
+    # Уровень функции важнее уровня модуля
+    levels.set_function_level(name, levels.OFF)
+    assert func("1") == "1"
+    with pytest.raises(ValidationArgumentsError):
+        func_other("1")
+
+    with pytest.raises(ValueError):
+        levels.set_global_level("wrong")
+
+
+def test_load_levels():
+
+    name = levels.get_function_name(func_other)
+
+    levels.load_levels(f"shallow, tests.*=off, {name}=full, wrong, x=y")
+
+    assert levels.get_level(func) == levels.OFF
+    assert levels.get_level(func_other) == levels.FULL
+    assert levels.get_level(levels.get_level) == levels.SHALLOW
@@ -0,0 +1,140 @@
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+
+from valdec.data_classes import Limits, Settings
+from valdec.decorators import async_validate, validate
+from valdec.errors import ValidationArgumentsError
+from valdec.limits import get_limits_error
+from valdec.validator_pydantic import validator
+
+
+def nested(depth: int) -> list:
+
+    value: list = []
+    for _ in range(depth):
+        value = [value]
+
+    return value
+
+
+@pytest.mark.parametrize("limits, value, error", [
+    (Limits(max_depth=3), nested(2), None),
+    (Limits(max_depth=3), nested(3), "nesting depth exceeds max_depth=3"),
+    (Limits(max_depth=2), {"a": {"b": [1]}}, "nesting depth"),
+    (Limits(max_items=5), [1, 2, [3, 4]], None),
+    (Limits(max_items=5), [1, 2, [3, 4, 5]], "max_items=5"),
+    (Limits(max_items=2), {"a": 1, "b": 2, "c": 3}, "max_items=2"),
+    (Limits(max_length=3), ["abc", b"abc"], None),
+    (Limits(max_length=3), [1, ("x", b"abcd")], "length 4 exceeds"),
+    (Limits(max_length=3), {"long": 1}, "length 4 exceeds"),
+    (Limits(max_keys=2), [{"a": 1, "b": 2}], None),
+    (Limits(max_keys=2), [{"a": {"a": 1, "b": 2, "c": 3}}], "3 keys exceed"),
+    (Limits(max_depth=1, max_items=1), object(), None),
+    (Limits(max_items=0), [], None),
+    (Limits(max_items=0), [1], "max_items=0"),
+    (Limits(max_length=0), "", None),
+    (Limits(max_length=0), "a", "max_length=0"),
+    (Limits(max_depth=0), [], "max_depth=0"),
+])
+def test_get_limits_error(limits, value, error):
+
+    if error is None:
+        assert get_limits_error(limits, value) is None
+    else:
+        assert error in get_limits_error(limits, value)
+
+
+def test_deep_value():
+
+    # Глубокая вложенность не приводит к RecursionError
+    value = nested(100000)
+
+    assert get_limits_error(Limits(max_depth=10), value)
+    assert get_limits_error(Limits(max_items=10), value)
+    assert get_limits_error(Limits(max_length=10), value) is None
+
+
+def test_recursive_value():
+
+    # Коллекция, которая содержит саму себя, не обходится повторно внутри
+    # себя
+    value: list = ["abc"]
+    value.append(value)
+    assert get_limits_error(Limits(max_length=100), value) is None
+
+    mapping: dict = {}
+    mapping["self"] = [mapping, mapping]
+    assert get_limits_error(Limits(max_keys=1), mapping) is None
+    assert "max_length=3" in get_limits_error(
+        Limits(max_length=3), [value, mapping]
+    )
+
+
+def test_shared_value():
+
+    # Общая коллекция учитывается при каждом вхождении
+    row = [1] * 1000
+    value = [row] * 1000
+    assert "max_items=10000" in get_limits_error(
+        Limits(max_items=10_000), value
+    )
+    assert get_limits_error(Limits(max_items=1001 * 1000), value) is None
+
+    shared = {"a": "abc"}
+    assert "max_items=4" in get_limits_error(
+        Limits(max_items=4), [shared, [shared, shared]]
+    )
+
+    # Глубина общей коллекции проверяется на каждом уровне, где она есть
+    assert "max_depth=2" in get_limits_error(
+        Limits(max_depth=2), [row, [row]]
+    )
+
+    # Без max_items общие коллекции на той же глубине повторно не
+    # обходятся (иначе обход занял бы 2 ** 60 шагов)
+    value = []
+    for _ in range(60):
+        value = [value, value]
+    assert get_limits_error(Limits(max_depth=100), value) is None
+    assert "max_depth=10" in get_limits_error(Limits(max_depth=10), value)
+
+
+def test_limits():
+
+    settings = Settings(validator=validator, limits=Limits(
+        max_depth=3, max_items=100, max_length=10, max_keys=5,
+    ))
+
+    @validate(settings=settings)
+    def func(i: int, items: List[Dict[str, Any]], name: str = "") -> int:
+        return i
+
+    assert func("1", [{"a": [1, 2]}], name="n") == 1
+
+    with pytest.raises(ValidationArgumentsError) as error:
+        func(1, [{"a": [[1]]}])
+    assert "<limits>: items: nesting depth exceeds max_depth=3" in \
+        str(error.value)
+
+    with pytest.raises(ValidationArgumentsError) as error:
+        func(1, [], name="x" * 11)
+    assert "name: length 11 exceeds max_length=10" in str(error.value)
+
+    with pytest.raises(ValidationArgumentsError):
+        func(1, [{}] * 101)
+
+
+def test_async_limits():
+
+    settings = Settings(validator=validator, limits=Limits(max_items=3))
+
+    @async_validate(settings=settings)
+    async def func(items: List[int]) -> int:
+        return len(items)
+
+    assert asyncio.run(func(["1", 2, 3])) == 3
+
+    with pytest.raises(ValidationArgumentsError):
+        asyncio.run(func([1, 2, 3, 4]))
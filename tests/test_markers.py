@@ -0,0 +1,47 @@
+from dataclasses import dataclass
+
+from pydantic import BaseModel
+from validated_dc import ValidatedDC
+
+from valdec.markers import MarkedFieldsSet, is_marked, mark
+
+
+class Model(BaseModel):
+    i: int
+
+
+@dataclass
+class DataClass(ValidatedDC):
+    i: int
+
+
+def test_mark_pydantic():
+
+    instance = Model(i=1)
+    assert not is_marked(instance)
+
+    assert mark(instance)
+    assert is_marked(instance)
+    assert isinstance(instance.__fields_set__, MarkedFieldsSet)
+    # Пометка не влияет на данные экземпляра
+    assert instance.dict() == {"i": 1}
+    assert instance.dict(exclude_unset=True) == {"i": 1}
+
+    # Копия не помечена
+    assert not is_marked(instance.copy())
+
+
+def test_mark_validated_dc():
+
+    instance = DataClass(i=1)
+    assert not is_marked(instance)
+
+    assert mark(instance)
+    assert is_marked(instance)
+    assert not is_marked(DataClass(i=1))
+
+
+def test_mark_not_supported():
+
+    assert not mark(1)
+    assert not is_marked(1)
@@ -0,0 +1,163 @@
+import asyncio
+import time
+
+import pytest
+
+from valdec import levels
+from valdec.data_classes import Overhead, Settings
+from valdec.decorators import async_validate, validate
+from valdec.errors import ValidationArgumentsError
+from valdec.overhead import (FULL, SAMPLED, SHALLOW, OverheadController,
+                             get_stats)
+from valdec.validator_pydantic import validator
+
+
+def make_settings(mode=SAMPLED):
+
+    state = {"delay": 0.002, "body": 0, "calls": 0}
+    changes = []
+
+    def slow_validator(annotations, values, is_replace, extra):
+        if "return" not in values:
+            state["calls"] += 1
+            time.sleep(state["delay"])
+        return validator(annotations, values, is_replace, extra)
+
+    settings = Settings(
+        validator=slow_validator,
+        overhead=Overhead(
+            budget=0.5, mode=mode, sample_every=5, min_samples=3,
+            smoothing=1.0,
+            on_change=lambda *args: changes.append(args),
+        ),
+    )
+
+    return settings, state, changes
+
+
+def test_controller_modes():
+
+    changes = []
+    controller = OverheadController("m:f", Overhead(
+        budget=0.5, min_samples=2, smoothing=1.0, sample_every=3,
+        on_change=lambda *args: changes.append(args),
+    ))
+
+    controller.record(1.0, 1.0)
+    assert controller.mode == FULL
+    controller.record(1.0, 1.0)
+    assert controller.mode == SAMPLED
+
+    # В режиме SAMPLED полностью валидируется один вызов из sample_every
+    assert [controller.is_full_call() for _ in range(6)] == [
+        False, False, True, False, False, True,
+    ]
+
+    # Пока отношение выше budget * restore_ratio, режим не меняется
+    controller.record(0.3, 1.0)
+    assert controller.mode == SAMPLED
+    controller.record(0.1, 1.0)
+    assert controller.mode == FULL
+
+    assert changes == [
+        ("m:f", FULL, SAMPLED, 1.0), ("m:f", SAMPLED, FULL, 0.1),
+    ]
+    assert controller.get_stats() == {
+        "mode": FULL, "ratio": 0.1, "samples": 4, "transitions": 2,
+    }
+
+    with pytest.raises(ValueError):
+        OverheadController("m:f", Overhead(budget=1, mode="unknown"))
+
+
+def test_sampled():
+
+    settings, state, changes = make_settings()
+
+    @validate(settings=settings)
+    def func(i: int) -> int:
+        time.sleep(state["body"])
+        return i
+
+    for i in range(3):
+        assert func(str(i)) == i
+
+    # Валидация дороже функции: переход на выборочную валидацию
+    assert [change[1:3] for change in changes] == [(FULL, SAMPLED)]
+    name = levels.get_function_name(func)
+    assert get_stats()[name]["mode"] == SAMPLED
+
+    state["calls"] = 0
+    for i in range(10):
+        func(i)
+    assert state["calls"] == 2
+
+    # Функция стала дороже валидации: полная валидация восстанавливается
+    state["delay"] = 0
+    state["body"] = 0.005
+    for i in range(5):
+        func(i)
+    assert changes[-1][1:3] == (SAMPLED, FULL)
+
+    with pytest.raises(ValidationArgumentsError):
+        func("x")
+
+
+def test_shallow():
+
+    settings, state, changes = make_settings(SHALLOW)
+
+    @validate(settings=settings)
+    def func(i: int) -> int:
+        return i
+
+    for i in range(3):
+        func(i)
+    assert changes[-1][1:3] == (FULL, SHALLOW)
+
+    # Вызовы без полной валидации проверяются поверхностно
+    with pytest.raises(ValidationArgumentsError):
+        func("1")
+
+    # При уровне OFF контроллер не работает
+    levels.set_function_level(func, levels.OFF)
+    try:
+        assert func("1") == "1"
+    finally:
+        levels.set_function_level(func, None)
+
+
+def test_async_sampled():
+
+    settings, state, changes = make_settings()
+
+    @async_validate(settings=settings)
+    async def func(i: int) -> int:
+        return i
+
+    async def main():
+        return [await func(str(i)) for i in range(3)]
+
+    assert asyncio.run(main()) == [0, 1, 2]
+    assert changes[-1][1:3] == (FULL, SAMPLED)
+
+    state["calls"] = 0
+    asyncio.run(main())
+    assert state["calls"] == 0
+
+
+def test_specialized():
+
+    settings, state, changes = make_settings()
+    settings.is_specialized = True
+
+    @validate(settings=settings)
+    def func(i: int, j: int = 1) -> int:
+        return i + j
+
+    for i in range(3):
+        assert func(str(i)) == i + 1
+
+    assert changes[-1][1:3] == (FULL, SAMPLED)
+    plan, _ = func.__valdec__
+    assert plan.controller.mode == SAMPLED
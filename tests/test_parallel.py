@@ -0,0 +1,206 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import sys
+from typing import List, Tuple
+
+import pytest
+from pydantic import BaseModel, StrictInt, conlist
+
+from valdec.data_classes import Settings
+from valdec.decorators import async_validate, validate
+from valdec.errors import ValidationArgumentsError
+from valdec.parallel import (MAX_ERRORS, get_chunked_names,
+                             is_list_annotation)
+from valdec.validator_pydantic import validator
+
+
+class Item(BaseModel):
+    count: StrictInt
+
+
+@pytest.fixture(scope="module")
+def executor():
+    with ThreadPoolExecutor(4) as executor:
+        yield executor
+
+
+def test_get_chunked_names():
+
+    annotations = {"a": List[int], "b": List[int], "c": tuple, "d": int}
+    values = {"a": [1] * 5, "b": [1] * 2, "c": (1, ) * 5, "d": 1}
+
+    assert get_chunked_names(annotations, values, 3) == ("a", )
+
+    # Ограничения conlist относятся ко всему списку
+    annotations = {"a": conlist(int, min_items=4), "b": List[int]}
+    values = {"a": [1] * 5, "b": [1] * 5}
+    assert get_chunked_names(annotations, values, 3) == ("b", )
+
+
+def test_is_list_annotation():
+
+    assert is_list_annotation(List[int])
+    assert not is_list_annotation(List)
+    assert not is_list_annotation(list)
+    assert not is_list_annotation(Tuple[int])
+    assert not is_list_annotation(conlist(int, min_items=1))
+
+    if sys.version_info >= (3, 9):
+        assert is_list_annotation(eval("list[int]"))
+
+
+def test_chunks_conlist(executor):
+
+    settings = Settings(validator=validator, chunk_size=10, executor=executor)
+
+    @validate(settings=settings)
+    def func(items: conlist(int, min_items=15)) -> int:
+        return len(items)
+
+    assert func(list(range(50))) == 50
+
+    with pytest.raises(ValidationArgumentsError):
+        func(list(range(14)))
+
+
+def test_chunks_replace(executor):
+
+    settings = Settings(validator=validator, chunk_size=3, executor=executor)
+
+    @validate(settings=settings)
+    def func(items: List[Item], count: int) -> int:
+        assert all(isinstance(item, Item) for item in items)
+        assert [item.count for item in items] == list(range(10))
+        return count
+
+    assert func([{"count": i} for i in range(10)], "1") == 1
+
+
+def test_chunks_errors(executor):
+
+    settings = Settings(validator=validator, chunk_size=4, executor=executor)
+
+    @validate(settings=settings)
+    def func(items: List[Item]) -> int:
+        return len(items)
+
+    items = [{"count": i} for i in range(10)]
+    items[1] = {"count": "1"}
+    items[9] = {}
+
+    with pytest.raises(ValidationArgumentsError) as error:
+        func(items)
+
+    message = str(error.value)
+    # Индексы элементов во всей коллекции, а не в части
+    assert "items[1]:" in message
+    assert "items[9]:" in message
+    assert "items[0]:" not in message
+
+
+def test_chunks_max_errors(executor):
+
+    settings = Settings(validator=validator, chunk_size=5, executor=executor)
+
+    @validate(settings=settings)
+    def func(items: List[StrictInt]) -> int:
+        return len(items)
+
+    with pytest.raises(ValidationArgumentsError) as error:
+        func(["1"] * 50)
+
+    assert str(error.value).count("items[") == MAX_ERRORS
+
+
+def test_chunks_other_errors(executor):
+
+    settings = Settings(validator=validator, chunk_size=2, executor=executor)
+
+    @validate(settings=settings)
+    def func(items: List[int], count: StrictInt) -> int:
+        return count
+
+    with pytest.raises(ValidationArgumentsError):
+        func([1, 2, 3], "1")
+
+
+def test_chunks_async(executor):
+
+    settings = Settings(validator=validator, chunk_size=3, executor=executor)
+
+    @async_validate(settings=settings)
+    async def func(items: List[Item]) -> List[int]:
+        return [item.count for item in items]
+
+    assert asyncio.run(func([{"count": i} for i in range(7)])) == list(
+        range(7)
+    )
+
+    with pytest.raises(ValidationArgumentsError) as error:
+        asyncio.run(func([{"count": 1}] * 5 + [{"count": "x"}]))
+
+    assert "items[5]:" in str(error.value)
+
+
+def test_chunks_result(executor):
+
+    settings = Settings(validator=validator, chunk_size=2, executor=executor)
+
+    @validate(settings=settings)
+    def func(count: int) -> List[Item]:
+        return [{"count": i} for i in range(count)]
+
+    assert func(5) == [Item(count=i) for i in range(5)]
+
+
+def test_chunks_processes():
+
+    with ProcessPoolExecutor(2) as executor:
+
+        settings = Settings(
+            validator=validator, chunk_size=50, executor=executor,
+        )
+
+        @validate(settings=settings)
+        def func(items: List[Item]) -> int:
+            return sum(item.count for item in items)
+
+        assert func([{"count": i} for i in range(200)]) == sum(range(200))
+
+        items = [{"count": i} for i in range(200)]
+        items[123] = {"count": "x"}
+        with pytest.raises(ValidationArgumentsError) as error:
+            func(items)
+
+        assert "items[123]:" in str(error.value)
+
+
+def test_chunks_processes_not_picklable():
+
+    class LocalItem(BaseModel):
+        count: StrictInt
+
+    with ProcessPoolExecutor(2) as executor:
+
+        settings = Settings(
+            validator=validator, chunk_size=10, executor=executor,
+        )
+
+        @validate(settings=settings)
+        def func(items: List[LocalItem]) -> int:
+            return sum(item.count for item in items)
+
+        @async_validate(settings=settings)
+        async def async_func(items: List[LocalItem]) -> int:
+            return sum(item.count for item in items)
+
+        # Модель, объявленную внутри функции, нельзя передать в процесс:
+        # части валидируются в текущем процессе
+        items = [{"count": i} for i in range(30)]
+        assert func(items) == sum(range(30))
+        assert asyncio.run(async_func(items)) == sum(range(30))
+
+        items[25] = {"count": "x"}
+        with pytest.raises(ValidationArgumentsError) as error:
+            func(items)
+        assert "items[25]:" in str(error.value)
@@ -0,0 +1,119 @@
+import asyncio
+import json
+from typing import List
+
+import pytest
+from pydantic import BaseModel
+
+from valdec.data_classes import Buffer
+from valdec.decorators import async_validate, validate
+from valdec.profile import (STAGES, format_report, get_function,
+                            get_plan_settings, load_arguments, main,
+                            profile_function)
+
+
+class Item(BaseModel):
+    id: int
+
+
+@validate
+def handler(user_id: int, items: List[Item]) -> int:
+    return len(items)
+
+
+@async_validate
+async def async_handler(user_id: int, items: List[Item]) -> int:
+    return len(items)
+
+
+@validate
+def buffer_handler(data: Buffer(max_size=10), user_id: int) -> int:
+    return len(data)
+
+
+def not_decorated(user_id: int) -> int:
+    return user_id
+
+
+@pytest.mark.parametrize("data, args, kwargs", [
+    ([1, 2], (1, 2), {}),
+    ({"args": [1], "kwargs": {"b": 2}}, (1, ), {"b": 2}),
+    ({"a": 1}, (), {"a": 1}),
+])
+def test_load_arguments(tmp_path, data, args, kwargs):
+
+    path = tmp_path / "args.json"
+    path.write_text(json.dumps(data))
+
+    assert load_arguments(str(path)) == (args, kwargs)
+
+
+def test_get_function():
+
+    assert get_function("tests.test_profile:handler") is handler
+    assert get_function("tests.test_profile:Item.parse_obj") == \
+        Item.parse_obj
+
+    with pytest.raises(ValueError):
+        get_function("tests.test_profile")
+
+
+def test_get_plan_settings():
+
+    plan, _ = get_plan_settings(handler)
+    assert set(plan.annotations) == {"user_id", "items"}
+
+    with pytest.raises(TypeError):
+        get_plan_settings(not_decorated)
+
+
+@pytest.mark.parametrize("func", [handler, async_handler])
+def test_profile_function(func):
+
+    stages, fields, total = profile_function(
+        func, (1, ), {"items": [{"id": 1}]}, number=10,
+    )
+
+    assert tuple(stages) == STAGES
+    assert list(fields) == ["user_id", "items", "return"]
+    assert all(elapsed >= 0 for elapsed in stages.values())
+    assert stages["model"] > 0
+    assert total > 0
+
+    report = format_report("m:f", 10, stages, fields, total)
+    assert "total (decorated call)" in report
+    assert "items" in report
+
+    # Профилирование не мешает обычным вызовам
+    if func is handler:
+        assert func(1, [{"id": 1}]) == 1
+    else:
+        assert asyncio.run(func(1, [{"id": 1}])) == 1
+
+
+def test_main(tmp_path, capsys):
+
+    path = tmp_path / "args.json"
+    path.write_text(json.dumps({"user_id": 1, "items": [{"id": 1}]}))
+
+    main([
+        "tests.test_profile:handler", "--args-json", str(path),
+        "--number", "5",
+    ])
+
+    output = capsys.readouterr().out
+    for name in STAGES + ("user_id", "items", "return"):
+        assert name in output
+
+
+def test_profile_routed_fields():
+
+    # Поле Buffer валидируется правилом, как и при вызове функции
+    stages, fields, total = profile_function(
+        buffer_handler, (bytearray(b"abc"), "1"), {}, number=10,
+    )
+
+    assert list(fields) == ["data", "user_id", "return"]
+    assert stages["model"] > 0
+    assert stages["validation"] >= 0
+    assert total > 0
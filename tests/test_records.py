@@ -0,0 +1,134 @@
+import json
+from dataclasses import dataclass
+from typing import List, Optional
+
+import pytest
+from pydantic import BaseModel
+from validated_dc import ValidatedDC
+
+from valdec.data_classes import Settings
+from valdec.decorators import validate
+from valdec import records
+from valdec.caches import Cache
+from valdec.records import Record, get_record_class, to_record
+from valdec.validator_pydantic import dumps
+from valdec.validator_pydantic import validator as pydantic_validator
+from valdec.validator_validated_dc import validator as validated_dc_validator
+
+
+class Tag(BaseModel):
+    name: str
+
+
+class Item(BaseModel):
+    id: int
+    tags: List[Tag]
+    parent: Optional[Tag] = None
+
+
+@dataclass
+class DCTag(ValidatedDC):
+    name: str
+
+
+@dataclass
+class DCItem(ValidatedDC):
+    id: int
+    tags: List[DCTag]
+
+
+def test_to_record():
+
+    item = Item(id=1, tags=[{"name": "a"}], parent={"name": "p"})
+    record = to_record(item)
+
+    assert type(record) is get_record_class(Item)
+    assert isinstance(record, Record)
+    assert record.id == 1
+    assert record.tags[0].name == "a"
+    assert record.parent.name == "p"
+    assert not hasattr(record, "__dict__")
+
+    # Класс записи создается один раз для каждой модели
+    assert type(to_record(item)) is type(record)
+    assert to_record(item) == record
+
+    with pytest.raises(AttributeError):
+        record.id = 2
+    with pytest.raises(AttributeError):
+        record.other = 2
+
+    assert record._asdict() == {
+        "id": 1, "tags": [to_record(Tag(name="a"))],
+        "parent": to_record(Tag(name="p")),
+    }
+    assert dict(record)["id"] == 1
+    assert repr(record) == "ItemRecord(id=1, tags=[TagRecord(name='a')], " \
+        "parent=TagRecord(name='p'))"
+
+    # Запись можно передать туда, где ожидается словарь
+    assert Item(**record) == item
+    assert Item.parse_obj(record) == item
+
+    # Остальные значения не изменяются
+    values = {"a": (1, "s"), "b": {"k": [None]}}
+    assert to_record(values) == values
+    assert to_record(record) is record
+
+
+@pytest.mark.parametrize("validator, item_class", [
+    (pydantic_validator, Item),
+    (validated_dc_validator, DCItem),
+])
+def test_compact_replace(validator, item_class):
+
+    settings = Settings(validator=validator, is_compact=True)
+
+    @validate(settings=settings)
+    def func(items: List[item_class], extra: dict) -> item_class:
+        assert all(isinstance(item, Record) for item in items)
+        assert items[1].tags[0].name == "b"
+        return item_class(id=3, tags=[])
+
+    result = func(
+        [{"id": 1, "tags": []}, {"id": 2, "tags": [{"name": "b"}]}],
+        {"k": 1},
+    )
+
+    assert type(result) is get_record_class(item_class)
+    assert result.id == 3
+
+
+def test_compact_dumps():
+
+    settings = Settings(
+        validator=pydantic_validator, is_compact=True, result_dumps=dumps,
+    )
+
+    @validate(settings=settings)
+    def func(item: Item) -> Item:
+        return item
+
+    result = func({"id": 1, "tags": [{"name": "a"}]})
+
+    assert json.loads(result) == {
+        "id": 1, "tags": [{"name": "a"}], "parent": None,
+    }
+
+
+def test_records_maxsize(monkeypatch):
+
+    monkeypatch.setattr(records, "_records", Cache(maxsize=2))
+
+    models = [type(f"Model{i}", (BaseModel, ), {"__annotations__": {
+        "i": int,
+    }}) for i in range(3)]
+
+    for i, model in enumerate(models):
+        record = to_record(model(i=i))
+        assert record.i == i
+        assert type(record) is get_record_class(model)
+
+    # Классы записей хранятся для ограниченного количества моделей
+    assert len(records._records) == 2
+    assert to_record(models[0](i=5)).i == 5
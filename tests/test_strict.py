@@ -0,0 +1,116 @@
+import datetime
+from dataclasses import dataclass
+from typing import (Any, Dict, FrozenSet, List, Literal, Optional, Sequence,
+                    Tuple, Union)
+
+import pytest
+from pydantic import (BaseModel, StrictBool, StrictInt, conint, conlist,
+                      constr, condate)
+from validated_dc import ValidatedDC
+
+from valdec.data_classes import Settings
+from valdec.decorators import validate
+from valdec.errors import ValidationArgumentsError, ValidationError
+from valdec.strict import check_strict, get_strict_error
+from valdec.validator_pydantic import validator as pydantic_validator
+from valdec.validator_validated_dc import validator as validated_dc_validator
+
+
+class Item(BaseModel):
+    i: int
+
+
+@dataclass
+class ItemDC(ValidatedDC):
+    i: int
+
+
+@pytest.mark.parametrize("annotation, value", [
+    (int, 1),
+    (float, 1.0),
+    (Any, object()),
+    (None, None),
+    (Optional[int], None),
+    (Union[int, str], "s"),
+    (Literal["a", 1], 1),
+    (List[int], [1, 2]),
+    (Tuple[int, ...], (1, 2)),
+    (Tuple[int, str], (1, "s")),
+    (Dict[str, List[int]], {"a": [1]}),
+    (FrozenSet[int], frozenset((1, ))),
+    (Sequence[int], (1, 2)),
+    (Item, Item(i=1)),
+    (List[ItemDC], [ItemDC(i=1)]),
+    (StrictBool, False),
+    (StrictInt, 1),
+    (conint(ge=0, multiple_of=2), 4),
+    (constr(min_length=1, regex="^a"), "ab"),
+    (conlist(int, min_items=1), [1]),
+    (condate(ge=datetime.date(2020, 1, 1)), datetime.date(2021, 1, 1)),
+])
+def test_strict_valid(annotation, value):
+    assert get_strict_error(annotation, value) is None
+
+
+@pytest.mark.parametrize("annotation, value", [
+    (int, "1"),
+    (int, True),
+    (float, 1),
+    (str, b"s"),
+    (Optional[int], "1"),
+    (Literal[1], True),
+    (List[int], (1, 2)),
+    (List[int], [1, "2"]),
+    (Tuple[int, ...], [1]),
+    (Tuple[int, str], (1, )),
+    (Dict[str, int], {1: 1}),
+    (Item, {"i": 1}),
+    (ItemDC, {"i": 1}),
+    (StrictBool, 1),
+    (conint(ge=0), -1),
+    (conint(multiple_of=2), 3),
+    (constr(max_length=1), "ab"),
+    (constr(regex="^a"), "b"),
+    (conlist(int, min_items=1), []),
+    (conlist(int), ["1"]),
+    (condate(ge=datetime.date(2020, 1, 1)), datetime.date(2019, 1, 1)),
+    ("int", 1),
+])
+def test_strict_invalid(annotation, value):
+    assert get_strict_error(annotation, value) is not None
+
+
+def test_check_strict():
+
+    annotations = {"i": int, "items": List[int]}
+
+    check_strict(annotations, {"i": 1, "items": []})
+
+    with pytest.raises(ValidationError) as error:
+        check_strict(annotations, {"i": "1", "items": [1, 2, "3"]})
+    assert str(error.value) == (
+        "i: value of type 'str' is not 'int'\n"
+        "items: [2]: value of type 'str' is not 'int'"
+    )
+
+
+@pytest.mark.parametrize("backend, item_class", [
+    (pydantic_validator, Item), (validated_dc_validator, ItemDC),
+])
+def test_strict_settings(backend, item_class):
+
+    settings = Settings(validator=backend, is_strict=True)
+    assert settings.extra == {"is_strict": True}
+
+    @validate(settings=settings)
+    def func(i: int, items: List[item_class]) -> List[item_class]:
+        return items
+
+    # Значения не заменяются: функция получает и возвращает исходные
+    # объекты
+    items = [item_class(i=1)]
+    assert func(1, items) is items
+
+    for args in (("1", items), (1, [{"i": 1}]), (True, [])):
+        with pytest.raises(ValidationArgumentsError):
+            func(*args)
@@ -1,11 +1,18 @@
+import gc
+import tracemalloc
+import weakref
+from typing import Dict, List, Literal, Optional, Union
+
 import pytest
-from pydantic import StrictInt
-from valdec.data_classes import FieldData
-from valdec.decorators import default_settings
+from pydantic import BaseModel, StrictInt, create_model
+from valdec import data_classes, decorators, utils, validator_pydantic
+from valdec.caches import Cache, WeakCache
+from valdec.data_classes import Discriminated, Settings
+from valdec.decorators import default_settings, validate
 from valdec.errors import ValidationArgumentsError, ValidationReturnError
-from valdec.utils import (after, before, get_annotations_values_dicts,
-                          get_data_for_validation, get_data_with_annotations,
-                          get_names_from_decorator, replace_args_kwargs,
+from valdec.utils import (after, before, get_annotations,
+                          get_discriminator_index, get_names_from_decorator,
+                          get_validation_plan, get_values, replace_args_kwargs,
                           run_validation)
 from valdec.validator_pydantic import validator as pydantic_validator
 
@@ -26,85 +33,167 @@ def func_with_annotations_2(a, b: int, c=None, d: str = "default"):
     pass
 
 
-def test_get_data_with_annotations():
+def test_get_values():
 
-    result = get_data_with_annotations(
-        func_without_annotations_1, args=tuple(), kwargs=dict()
-    )
-    assert result == []
+    plan = get_validation_plan(func_without_annotations_1, (), False)
+    assert get_values(plan, args=tuple(), kwargs=dict()) == {}
 
-    result = get_data_with_annotations(
-        func_without_annotations_2, (100, ), dict()
-    )
-    assert result == []
+    plan = get_validation_plan(func_without_annotations_2, (), False)
+    assert get_values(plan, (100, ), dict()) == {}
 
-    result = get_data_with_annotations(
-        func_with_annotations_1, (100, ), dict()
-    )
-    assert result == [FieldData("i", 100, int)]
+    plan = get_validation_plan(func_with_annotations_1, (), False)
+    assert get_values(plan, (100, ), dict()) == {"i": 100}
 
-    result = get_data_with_annotations(
-        func_with_annotations_2, (100, ), {"b": 200}
-    )
-    assert result == [FieldData("b", 200, int)]
+    plan = get_validation_plan(func_with_annotations_2, (), False)
+    assert get_values(plan, (100, ), {"b": 200}) == {"b": 200}
 
-    result = get_data_with_annotations(
-        func_with_annotations_2, (100, ), {"b": 200, "c": "any", "d": "ddd"}
-    )
-    assert result == [FieldData("b", 200, int), FieldData("d", "ddd", str)]
+    values = get_values(plan, (100, ), {"b": 200, "c": "any", "d": "ddd"})
+    assert values == {"b": 200, "d": "ddd"}
 
+    # Ошибка в сигнатуре вызова
+    with pytest.raises(TypeError):
+        get_values(plan, (100, 200, 300, 400, 500), {})
+    with pytest.raises(TypeError):
+        get_values(plan, (100, 200), {"b": 200})
 
-def test_get_data_for_validation():
 
-    fields = []
-    names = ()
+def func_with_var_arguments(a: int, *args: int, k: int = 1, **kwargs: int):
+    pass
 
-    exclude = True
-    result = get_data_for_validation(fields, names, exclude)
-    assert result == []
 
-    exclude = False
-    result = get_data_for_validation(fields, names, exclude)
-    assert result == []
+def test_get_values_var_arguments():
 
-    i = FieldData("i", 1, int)
-    s = FieldData("s", "2", str)
-    fields = [i, s]
-    names = ()
+    plan = get_validation_plan(func_with_var_arguments, (), False)
 
-    exclude = True
-    result = get_data_for_validation(fields, names, exclude)
-    assert result == [i, s]
+    assert get_values(plan, (1, ), {}) == {"a": 1}
+    assert get_values(plan, (1, 2, 3), {"k": 4}) == {
+        "a": 1, "args": (2, 3), "k": 4
+    }
+    assert get_values(plan, (1, ), {"x": 5}) == {"a": 1, "kwargs": {"x": 5}}
 
-    exclude = False
-    result = get_data_for_validation(fields, names, exclude)
-    assert result == [i, s]
 
-    names = ("i", )
-    exclude = True
-    result = get_data_for_validation(fields, names, exclude)
-    assert result == [s, ]
+def test_get_validation_plan():
 
-    exclude = False
-    result = get_data_for_validation(fields, names, exclude)
-    assert result == [i, ]
+    i = ("i", int)
+    d = ("d", str)
 
+    def names(plan):
+        return tuple(plan.annotations.items())
 
-def test_get_annotations_values_dicts():
+    plan = get_validation_plan(func_with_annotations_2, (), True)
+    assert names(plan) == (("b", int), d)
+    assert plan.result_annotations == {"return": type(None)}
 
-    fields = [FieldData("i", 1, int), FieldData("s", "2", str)]
-    result = get_annotations_values_dicts(fields)
-    assert result == ({"i": int, "s": str}, {"i": 1, "s": "2"})
+    plan = get_validation_plan(func_with_annotations_2, (), False)
+    assert names(plan) == (("b", int), d)
+    assert plan.positions == {"b": 1, "d": 3}
 
+    plan = get_validation_plan(func_with_annotations_2, ("b", ), True)
+    assert names(plan) == (d, )
 
-def test_run_validation():
+    plan = get_validation_plan(func_with_annotations_2, ("b", ), False)
+    assert names(plan) == (("b", int), )
+    assert plan.result_annotations is None
+
+    plan = get_validation_plan(func_with_annotations_1, ("return", ), True)
+    assert names(plan) == (i, )
+    assert plan.result_annotations is None
+
+
+def test_get_validation_plan_cache():
+
+    def factory(default=0):
+        def func(a: int, b: str = "s", *, c: int = default) -> int:
+            return a
+        return func
+
+    first = factory()
+    second = factory(1)
+
+    first_plan = get_validation_plan(first, (), False)
+    second_plan = get_validation_plan(second, (), False)
+
+    # Все, кроме функции и сигнатуры, общее (из кэша)
+    assert first_plan is not second_plan
+    assert first_plan.annotations is second_plan.annotations
+    assert first_plan.func is first
+    assert second_plan.func is second
+    assert first_plan.signature.parameters["c"].default == 0
+    assert second_plan.signature.parameters["c"].default == 1
+    assert code_in_cache(first.__code__)
+
+    # Другие аннотации - другой план
+    def other(a: str, b: str = "s", *, c: int = 0) -> int:
+        return a
+
+    other.__code__ = first.__code__
+    plan = get_validation_plan(other, (), False)
+    assert plan.annotations["a"] is str
+
+    # Функции не удерживаются кэшем и планами
+    decorated = validate(first)
+    references = [weakref.ref(f) for f in (first, second, other, decorated)]
+    del factory, first, second, other, decorated
+    del first_plan, second_plan, plan
+    gc.collect()
+    assert all(reference() is None for reference in references)
+
+    # Объект кода (и его планы) удаляется вместе с последней функцией
+    namespace = {}
+    exec("def func(a: int) -> int: return a", namespace)
+    decorated = validate(namespace.pop("func"))
+    code = weakref.ref(decorated.__wrapped__.__code__)
+    assert code_in_cache(code())
+    del decorated
+    gc.collect()
+    assert code() is None
 
-    i = FieldData("i", 1, int)
-    s = FieldData("s", "2", str)
-    fields = [i, s]
+
+def test_runtime_annotation_classes(monkeypatch):
+
+    monkeypatch.setattr(utils, "_plans", WeakCache(maxsize=4))
+    monkeypatch.setattr(validator_pydantic, "_models", Cache(maxsize=4))
+
+    def factory(model):
+        def func(value: model) -> model:
+            return value
+        return validate(func)
+
+    # Замыкания из одной фабрики (один объект кода) с аннотациями -
+    # классами, которые создаются во время работы программы
+    references = []
+    for i in range(20):
+        model = create_model(f"Model{i}", a=(int, ...))
+        references.append(weakref.ref(model))
+        assert factory(model)({"a": "1"}).a == 1
+    del model
+    gc.collect()
+
+    # Кэши ограничены и не удерживают все классы
+    assert references[0]() is None
+    assert sum(reference() is not None for reference in references) <= 4
+
+
+def code_in_cache(code):
+    return code in utils._plans
+
+
+def test_get_annotations():
+
+    plan = get_validation_plan(func_with_annotations_2, (), False)
+
+    # Все отобранные аргументы получены - словарь берется из плана
+    annotations = get_annotations(plan, {"b": 1, "d": "2"})
+    assert annotations is plan.annotations
+
+    assert get_annotations(plan, {"b": 1}) == {"b": int}
+
+
+def test_run_validation():
 
     replaceable = run_validation(
-        fields=fields,
+        annotations={"i": int, "s": str},
+        values={"i": 1, "s": "2"},
         validator=pydantic_validator,
         is_replace=False,
         extra={},
@@ -113,7 +202,8 @@ def test_run_validation():
     assert replaceable is None
 
     replaceable = run_validation(
-        fields=[FieldData("result", 1, int)],
+        annotations={"result": int},
+        values={"result": 1},
         validator=pydantic_validator,
         is_replace=False,
         extra={},
@@ -136,24 +226,32 @@ def func_with_args_kwargs_2(i: int, s: int, *args, k: int = None):
 
 def test_replace_args_kwargs():
 
+    plan_with_args = get_validation_plan(func_with_args, (), False)
+    plan_with_args_kwargs_1 = get_validation_plan(
+        func_with_args_kwargs_1, (), False
+    )
+    plan_with_args_kwargs_2 = get_validation_plan(
+        func_with_args_kwargs_2, (), False
+    )
+
     # (i: int, s: int)
     args = (1, 2)
     kwargs = {}
     replaceable_arguments = {}
     new_args, kwargs = replace_args_kwargs(
-        func_with_args, args, kwargs, replaceable_arguments
+        plan_with_args, args, kwargs, replaceable_arguments
     )
     assert (new_args, kwargs) == ((1, 2), {})
 
     replaceable_arguments = {"i": 11}
     new_args, kwargs = replace_args_kwargs(
-        func_with_args, args, kwargs, replaceable_arguments
+        plan_with_args, args, kwargs, replaceable_arguments
     )
     assert (new_args, kwargs) == ((11, 2), {})
 
     replaceable_arguments = {"s": 22, "i": 11}
     new_args, kwargs = replace_args_kwargs(
-        func_with_args, args, kwargs, replaceable_arguments
+        plan_with_args, args, kwargs, replaceable_arguments
     )
     assert (new_args, kwargs) == ((11, 22), {})
 
@@ -162,7 +260,7 @@ def test_replace_args_kwargs():
     kwargs = {}
     replaceable_arguments = {"k": 33}
     new_args, kwargs = replace_args_kwargs(
-        func_with_args_kwargs_1, args, kwargs, replaceable_arguments
+        plan_with_args_kwargs_1, args, kwargs, replaceable_arguments
     )
     assert (new_args, kwargs) == ((1, 2, 33), {})
 
@@ -170,7 +268,7 @@ def test_replace_args_kwargs():
     kwargs = {"k": 3}
     replaceable_arguments = {"k": 33, }
     new_args, kwargs = replace_args_kwargs(
-        func_with_args_kwargs_1, args, kwargs, replaceable_arguments
+        plan_with_args_kwargs_1, args, kwargs, replaceable_arguments
     )
     assert (new_args, kwargs) == ((1, 2), {"k": 33})
 
@@ -178,7 +276,7 @@ def test_replace_args_kwargs():
     kwargs = {"k": 3, "s": 2}
     replaceable_arguments = {"k": 33, "s": 22}
     new_args, kwargs = replace_args_kwargs(
-        func_with_args_kwargs_1, args, kwargs, replaceable_arguments
+        plan_with_args_kwargs_1, args, kwargs, replaceable_arguments
     )
     assert (new_args, kwargs) == ((1, ), {"s": 22, "k": 33})
 
@@ -187,7 +285,7 @@ def test_replace_args_kwargs():
     kwargs = {"k": 5}
     replaceable_arguments = {"k": 55, "s": 22}
     new_args, kwargs = replace_args_kwargs(
-        func_with_args_kwargs_2, args, kwargs, replaceable_arguments
+        plan_with_args_kwargs_2, args, kwargs, replaceable_arguments
     )
     assert (new_args, kwargs) == ((1, 22, 3, 4), {"k": 55})
 
@@ -318,3 +416,115 @@ def test_after():
         )
     # Сообщение об ошибке должно содержать имя "return"
     assert "return" in str(error)
+
+
+# Проверка того, что на "горячем пути" декоратор не создает лишних объектов:
+# к моменту вызова валидатора из всех объектов, созданных в модулях valdec,
+# должен существовать только словарь со значениями для валидатора.
+
+allocation_snapshots = []
+
+
+def snapshot_validator(annotations, values, is_replace, extra):
+    if tracemalloc.is_tracing():
+        allocation_snapshots.append(tracemalloc.take_snapshot())
+
+
+allocation_settings = Settings(validator=snapshot_validator)
+
+
+@validate(settings=allocation_settings)
+def func_for_test_allocations(i: int, s: str, k: int = 0) -> int:
+    return i
+
+
+def test_allocations():
+
+    func_for_test_allocations(1, "s", k=2)  # "Прогрев"
+
+    tracemalloc.start()
+    try:
+        func_for_test_allocations(1, "s", k=2)
+    finally:
+        tracemalloc.stop()
+
+    filters = [
+        tracemalloc.Filter(True, module.__file__)
+        for module in (utils, data_classes, decorators)
+    ]
+
+    # Снимки сделаны при валидации аргументов и при валидации результата
+    assert len(allocation_snapshots) == 2
+
+    for snapshot in allocation_snapshots:
+        traces = snapshot.filter_traces(filters).traces
+        # Не больше одного словаря (объект словаря и таблица его ключей)
+        assert len(traces) <= 2
+
+
+class EventA(BaseModel):
+    type: Literal["a", "aa"]
+
+
+class EventB(BaseModel):
+    type: str = "b"
+
+
+class EventC(BaseModel):
+    name: str
+
+
+class EventD(BaseModel):
+    type: str = "a"
+
+
+def test_get_discriminator_index():
+
+    annotation = Discriminated(Union[EventA, EventB], "type")
+    index = get_discriminator_index(annotation)
+    assert index == {"a": EventA, "aa": EventA, "b": EventB}
+    assert get_discriminator_index(annotation) is index
+
+    # Индекс создается при декорировании, ошибки в аннотации видны сразу
+    with pytest.raises(TypeError):
+        @validate
+        def func(event: Discriminated(Union[EventA, EventC], "type")):
+            pass
+
+    with pytest.raises(TypeError):
+        get_discriminator_index(
+            Discriminated(Union[EventA, EventB, EventD], "type")
+        )
+
+
+def test_nested_discriminated():
+
+    Event = Discriminated(Union[EventA, EventB], "type")
+
+    @validate
+    def func(event: Optional[Event] = None) -> Optional[Event]:
+        return event
+
+    assert func() is None
+    assert func(None) is None
+    assert isinstance(func({"type": "b"}), EventB)
+    assert isinstance(func({"type": "aa"}), EventA)
+
+    with pytest.raises(ValidationArgumentsError) as error:
+        func({"type": "c"})
+    assert "discriminator" in str(error.value)
+
+    # В других аннотациях Discriminated не поддерживается: ошибка видна
+    # при декорировании, а не при каждом вызове
+    for annotation in (List[Event], Dict[str, Event], Union[Event, int]):
+        with pytest.raises(TypeError) as error:
+            @validate
+            def func_nested(events: annotation):
+                pass
+        assert "events: Discriminated can be used only" in \
+            str(error.value)
+
+    with pytest.raises(TypeError):
+        @validate
+        def func_result() -> List[Event]:
+            pass
@@ -0,0 +1,79 @@
+import mmap
+
+import pytest
+
+from valdec.data_classes import Buffer, Settings
+from valdec.decorators import validate
+from valdec.errors import ValidationArgumentsError, ValidationError
+from valdec.validator_buffer import get_buffer_error, validator
+from valdec.validator_pydantic import validator as pydantic_validator
+from valdec.validator_validated_dc import validator as validated_dc_validator
+
+
+def test_get_buffer_error():
+
+    annotation = Buffer(min_size=2, max_size=4)
+
+    for value in (b"abc", bytearray(b"abc"), memoryview(b"abc")):
+        assert get_buffer_error(annotation, value) is None
+
+    with mmap.mmap(-1, 3) as buffer:
+        assert get_buffer_error(annotation, buffer) is None
+
+    assert "not a valid buffer type" in get_buffer_error(annotation, "abc")
+    assert "less than 2" in get_buffer_error(annotation, b"a")
+    assert "greater than 4" in get_buffer_error(annotation, b"abcde")
+
+    # Размер memoryview - в байтах
+    view = memoryview(bytearray(8)).cast("I")
+    assert "greater than 4" in get_buffer_error(annotation, view)
+
+    view = memoryview(b"abcdef")[::2]
+    assert get_buffer_error(annotation, view) == "buffer is not contiguous"
+    assert get_buffer_error(Buffer(is_contiguous=False), view) is None
+
+    assert "not a valid buffer type" in get_buffer_error(
+        Buffer(types=(bytes, )), bytearray(b"abc")
+    )
+
+    buffer = mmap.mmap(-1, 3)
+    buffer.close()
+    assert "not available" in get_buffer_error(annotation, buffer)
+
+
+def test_buffer_validator():
+
+    annotations = {"a": Buffer(), "b": Buffer(max_size=1)}
+
+    assert validator(annotations, {"a": b"", "b": b"1"}, True, {}) is None
+
+    with pytest.raises(ValidationError) as error:
+        validator(annotations, {"a": "s", "b": b"12"}, True, {})
+    assert str(error.value).count("\n") == 1
+
+
+@pytest.mark.parametrize(
+    "backend", [pydantic_validator, validated_dc_validator],
+)
+def test_buffer_pass_through(backend):
+
+    settings = Settings(validator=backend)
+
+    @validate(settings=settings)
+    def upload(data: Buffer(max_size=16), count: int) -> int:
+        return id(data)
+
+    values = [b"abc", bytearray(b"abc"), memoryview(b"abc")]
+    with mmap.mmap(-1, 16) as buffer:
+        values.append(buffer)
+        for value in values:
+            # В функцию передается исходный объект
+            assert upload(value, 1) == id(value)
+
+    for value in ("abc", bytearray(17), memoryview(b"abcd")[::2]):
+        with pytest.raises(ValidationArgumentsError):
+            upload(value, 1)
+
+    # Остальные поля валидируются функцией валидатора из настроек
+    with pytest.raises(ValidationArgumentsError):
+        upload(b"abc", "one")
@@ -0,0 +1,29 @@
+from typing import List, Optional
+
+import pytest
+
+from valdec.errors import ValidationError
+from valdec.validator_primitive import is_primitive, validator
+
+
+def test_is_primitive():
+
+    for annotation in (int, float, str, bytes, bool, type(None)):
+        assert is_primitive(annotation)
+
+    for annotation in (None, Optional[int], List[int], object, [int]):
+        assert not is_primitive(annotation)
+
+
+def test_primitive_validator():
+
+    annotations = {"i": int, "s": str, "b": bool, "n": type(None)}
+    values = {"i": 1, "s": "s", "b": True, "n": None}
+
+    assert validator(annotations, values, True, {}) is None
+
+    # Без приведения типов и без наследников
+    for name, value in (("i", "1"), ("i", True), ("b", 1), ("s", None)):
+        with pytest.raises(ValidationError) as error:
+            validator(annotations, {**values, name: value}, True, {})
+        assert f"{name}: value {value!r}" in str(error.value)
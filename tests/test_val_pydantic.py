@@ -1,10 +1,14 @@
-from typing import List
+import json
+from datetime import date
+from typing import List, Literal, Union
 
 import pytest
 from pydantic import BaseModel, StrictInt, StrictStr
 
-from valdec.errors import ValidationError
-from valdec.validator_pydantic import validator
+from valdec.data_classes import Discriminated
+from valdec.errors import JSONParsingError, ValidationError
+from valdec.validator_pydantic import (NAME_PREFIX, dumps,
+                                       get_validator_class, validator)
 
 
 class Profile(BaseModel):
@@ -55,3 +59,103 @@ def test_pydantic_validator():
     assert "group" in error
     assert "profile" in error
     assert "city" in error
+
+
+def test_validator_class_cache():
+
+    annotations = {"dict": int, "json": StrictStr}
+
+    # Класс для валидации создается один раз для каждого набора аннотаций
+    ValidatorClass, names = get_validator_class(annotations, BaseModel)
+    assert get_validator_class(dict(annotations), BaseModel)[0] is \
+        ValidatorClass
+    # В имени класса - имена полей
+    assert ValidatorClass.__name__ == "BaseModel[dict, json]"
+
+    # Имена полей не конфликтуют с атрибутами BaseModel
+    values = {"dict": 1, "json": "s"}
+    result = validator(annotations, values, is_replace=True, extra={})
+    assert result == values
+
+    with pytest.raises(ValidationError) as error:
+        validator(annotations, {"dict": 1, "json": 2}, False, extra={})
+    assert "json" in str(error.value)
+    assert NAME_PREFIX not in str(error.value)
+
+
+def test_validator_parse_json():
+
+    annotations = {"student": Student, "group": List[Student], "i": int}
+    values = {
+        "student": '{"name": "Peter", "profile": {"age": 22, "city": "S"}}',
+        "group": b'[{"name": "Elena", "profile": {"age": 20, "city": "K"}}]',
+        "i": "1",
+    }
+    extra = {"is_parse_json": True}
+
+    result = validator(annotations, values, is_replace=True, extra=extra)
+
+    assert result["student"].profile.age == 22
+    assert result["group"][0].name == "Elena"
+    assert result["i"] == 1  # Не модель - обычная валидация
+
+    # Без ключа is_parse_json строка не разбирается
+    with pytest.raises(ValidationError):
+        validator(annotations, values, is_replace=True, extra={})
+
+    # Ошибка разбора JSON
+    with pytest.raises(JSONParsingError) as error:
+        validator(annotations, dict(values, student="{"), False, extra)
+    assert "student: invalid JSON" in str(error.value)
+
+    # Ошибка валидации после разбора
+    with pytest.raises(ValidationError) as error:
+        validator(annotations, dict(values, student="{}"), False, extra)
+    assert not isinstance(error.value, JSONParsingError)
+    assert "student" in str(error.value)
+
+
+def test_dumps():
+
+    student = Student(name="Peter", profile={"age": 22, "city": "Samara"})
+
+    assert json.loads(dumps([student, {"date": date(2021, 1, 2)}])) == [
+        {"name": "Peter", "profile": {"age": 22, "city": "Samara"}},
+        {"date": "2021-01-02"},
+    ]
+
+
+class EventA(BaseModel):
+    type: Literal["a"]
+    a: StrictInt
+
+
+class EventB(BaseModel):
+    type: str = "b"
+    b: StrictStr
+
+
+def test_validator_discriminated():
+
+    Event = Discriminated(Union[EventA, EventB], "type")
+    annotations = {"event": Event}
+
+    result = validator(
+        annotations, {"event": {"type": "b", "b": "s"}}, True, {}
+    )
+    assert isinstance(result["event"], EventB)
+
+    result = validator(
+        annotations, {"event": EventA(type="a", a=1)}, True, {}
+    )
+    assert isinstance(result["event"], EventA)
+
+    # Ошибка содержит только поля класса, выбранного по дискриминатору
+    with pytest.raises(ValidationError) as error:
+        validator(annotations, {"event": {"type": "a", "a": "1"}}, False, {})
+    assert "event -> a" in str(error.value)
+    assert "event -> b" not in str(error.value)
+
+    with pytest.raises(ValidationError) as error:
+        validator(annotations, {"event": {"type": "c"}}, False, {})
+    assert "discriminator" in str(error.value)
@@ -1,11 +1,14 @@
+import json
 from dataclasses import dataclass
-from typing import List
+from typing import List, Literal, Union
 
 import pytest
 from validated_dc import ValidatedDC
 
-from valdec.errors import ValidationError
-from valdec.validator_validated_dc import validator
+from valdec.data_classes import Discriminated
+from valdec.errors import JSONParsingError, ValidationError
+from valdec.validator_validated_dc import (NAME_PREFIX, dumps,
+                                           get_validator_class, validator)
 
 
 @dataclass
@@ -78,3 +81,78 @@ def test_validator_without_replaced():
     # Попросим данные для подмены  установив is_replace=True
     result = validator(annotations, values, is_replace=True, extra={})
     assert result is None
+
+
+def test_validator_class_cache():
+
+    annotations = {"i": int, "group": List[Student]}
+
+    # Класс для валидации создается один раз для каждого набора аннотаций
+    ValidatorClass, _, _ = get_validator_class(annotations, ValidatedDC)
+    assert get_validator_class(dict(annotations), ValidatedDC)[0] is \
+        ValidatorClass
+    # В имени класса - имена полей
+    assert ValidatorClass.__name__ == "ValidatedDC[i, group]"
+
+    with pytest.raises(ValidationError) as error:
+        validator(annotations, {"i": "1", "group": []}, False, extra={})
+    assert NAME_PREFIX not in str(error.value)
+
+
+def test_validator_parse_json():
+
+    annotations = {"student": Student, "group": List[Student]}
+    values = {
+        "student": '{"name": "Peter", "profile": {"age": 22, "city": "S"}}',
+        "group": b'[{"name": "Elena", "profile": {"age": 20, "city": "K"}}]',
+    }
+    extra = {"is_parse_json": True}
+
+    result = validator(annotations, values, is_replace=True, extra=extra)
+
+    assert result["student"].profile.age == 22
+    assert result["group"][0].name == "Elena"
+
+    with pytest.raises(JSONParsingError):
+        validator(annotations, dict(values, group=b"[{"), False, extra)
+
+
+def test_dumps():
+
+    student = Student(name="Peter", profile={"age": 22, "city": "Samara"})
+
+    assert json.loads(dumps([student])) == [
+        {"name": "Peter", "profile": {"age": 22, "city": "Samara"}},
+    ]
+
+    with pytest.raises(TypeError):
+        dumps(object())
+
+
+@dataclass
+class EventA(ValidatedDC):
+    type: Literal["a"]
+    a: int
+
+
+@dataclass
+class EventB(ValidatedDC):
+    b: str
+    type: str = "b"
+
+
+def test_validator_discriminated():
+
+    annotations = {"event": Discriminated(Union[EventA, EventB], "type")}
+
+    result = validator(
+        annotations, {"event": {"type": "b", "b": "s"}}, True, {}
+    )
+    assert isinstance(result["event"], EventB)
+
+    with pytest.raises(ValidationError):
+        validator(annotations, {"event": {"type": "a", "a": "1"}}, False, {})
+
+    with pytest.raises(ValidationError) as error:
+        validator(annotations, {"event": {"b": "s"}}, False, {})
+    assert "discriminator" in str(error.value)
@@ -0,0 +1,104 @@
+import asyncio
+import inspect
+from typing import List
+
+import pytest
+from pydantic import BaseModel, StrictInt, StrictStr
+
+import valdec
+from valdec.data_classes import Settings
+from valdec.decorators import async_validate, validate
+from valdec.errors import ValidationArgumentsError, ValidationReturnError
+from valdec.utils import get_validation_plan
+from valdec.validator_pydantic import validator
+from valdec.wrappers import MISSING, get_wrapper_source
+
+settings = Settings(validator=validator, is_specialized=True)
+
+
+class Item(BaseModel):
+    i: StrictInt
+
+
+def func(
+    a: StrictInt, b, c: StrictStr = "c", *args, k: List[Item],
+    m: StrictInt = 1, **kwargs
+) -> tuple:
+    return a, b, c, args, k, m, kwargs
+
+
+def test_get_wrapper_source():
+
+    plan = get_validation_plan(func, (), False)
+    source = get_wrapper_source(plan, is_async=False)
+
+    assert "def wrapper(a, b, c=_valdec_MISSING, *args, k, " \
+           "m=_valdec_MISSING, **kwargs):" in source
+    assert "_valdec_func(a, b, c, *args, k=k, m=m, **kwargs)" in source
+
+
+def test_specialized_wrapper():
+
+    wrapper = validate(settings=settings)(func)
+
+    assert wrapper.__name__ == "func"
+    assert inspect.signature(wrapper) == inspect.signature(func)
+
+    a, b, c, args, k, m, kwargs = wrapper(1, 2, k=[{"i": 1}])
+    assert (a, b, c, args, m, kwargs) == (1, 2, "c", (), 1, {})
+    assert isinstance(k[0], Item)
+
+    assert wrapper(1, 2, "s", 3, 4, k=[], m=5, x=6) == (
+        1, 2, "s", (3, 4), [], 5, {"x": 6}
+    )
+
+    # Значение по умолчанию None не валидируется (и MISSING не попадает в
+    # функцию)
+    @validate(settings=settings)
+    def func_default(i: StrictInt = None) -> StrictInt:
+        assert i is not MISSING
+        return i or 0
+
+    assert func_default() == 0
+
+    with pytest.raises(ValidationArgumentsError):
+        wrapper("1", 2, k=[])
+    with pytest.raises(ValidationArgumentsError):
+        wrapper(1, 2, 3, k=[])
+    with pytest.raises(ValidationArgumentsError):
+        wrapper(1, 2, k=[{"i": "1"}])
+    with pytest.raises(TypeError):
+        wrapper(1, 2)
+
+    with valdec.trusted():
+        assert wrapper("1", 2, k=[{"i": "1"}])[0] == "1"
+
+
+def test_specialized_wrapper_positional_only():
+
+    exec_namespace = {"StrictInt": StrictInt}
+    exec(
+        "def func(a: StrictInt, /, b: StrictInt = 2) -> StrictInt:\n"
+        "    return a + b\n",
+        exec_namespace
+    )
+    wrapper = validate(settings=settings)(exec_namespace["func"])
+
+    assert wrapper(1) == 3
+    assert wrapper(1, b=3) == 4
+    with pytest.raises(TypeError):
+        wrapper(a=1)
+    with pytest.raises(ValidationArgumentsError):
+        wrapper(1, "2")
+
+
+def test_specialized_wrapper_async():
+
+    @async_validate(settings=settings)
+    async def func_async(i: StrictInt) -> StrictStr:
+        return i
+
+    with pytest.raises(ValidationArgumentsError):
+        asyncio.run(func_async("1"))
+    with pytest.raises(ValidationReturnError):
+        asyncio.run(func_async(1))
@@ -0,0 +1,3 @@
+from valdec.context import trusted
+
+__all__ = ["trusted"]
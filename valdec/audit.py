@@ -0,0 +1,270 @@
+""" Фоновая проверка результатов функций (см. Settings.audit).
+
+    Если в настройках указан Audit, то результат функции не валидируется
+    при вызове: декоратор (и функция `after`) возвращает результат без
+    изменений сразу, а результат (или его снимок, см. Audit.snapshot)
+    передается в очередь аудитора (Auditor) и валидируется позже:
+    1. Обычной функцией валидатора - в фоновом потоке аудитора.
+    2. Асинхронной функцией валидатора (декоратор async_validate) - в
+       задаче (asyncio.Task) текущего цикла событий.
+
+    Очередь ограничена (Audit.queue_size): если она заполнена, то результат
+    не проверяется, а учитывается как отброшенный. Ошибки валидации не
+    поднимаются, а записываются в лог (WARNING) и передаются в
+    Audit.on_violation. Счетчики всех аудиторов можно получить через
+    get_stats (например, для метрик).
+"""
+
+import asyncio
+import dataclasses
+import logging
+import queue
+import threading
+from typing import Any, Callable, Dict, Set, Tuple
+
+from valdec import levels
+from valdec.caches import Cache
+from valdec.data_classes import Audit, Settings, ValidationPlan
+from valdec.errors import ValidationError
+
+logger = logging.getLogger()
+
+# Наибольшее количество настроек функций, для которых аудитор хранит
+# настройки проверки (см. Auditor.get_settings)
+MAX_SETTINGS = 256
+
+# Аудиторы (см. get_auditor). Ключ - настройки аудита.
+_auditors: Dict[Audit, "Auditor"] = {}
+_auditors_lock = threading.Lock()
+
+
+def create_audit_settings(settings: Settings) -> Tuple[Settings, Settings]:
+    """ Возвращает настройки функции и настройки для проверки ее
+        результата: без аудита и без замены значений.
+    """
+
+    return settings, dataclasses.replace(
+        settings, audit=None, is_replace_result=False, overhead=None,
+        result_dumps=None,
+    )
+
+
+class Auditor:
+    """ Очередь и фоновый поток (или задачи) для проверки результатов.
+
+        :audit:      Настройки (см. Audit).
+        :submitted:  Количество результатов, переданных на проверку.
+        :dropped:    Количество результатов, отброшенных из-за
+                     заполненной очереди.
+        :checked:    Количество проверенных результатов.
+        :violations: Количество результатов, не прошедших валидацию.
+
+        Счетчики изменяются под блокировкой (результаты передаются из
+        разных потоков).
+    """
+
+    __slots__ = (
+        "audit", "submitted", "dropped", "checked", "violations",
+        "_queue", "_tasks", "_thread", "_lock", "_settings",
+    )
+
+    def __init__(self, audit: Audit):
+
+        self.audit = audit
+        self.submitted = 0
+        self.dropped = 0
+        self.checked = 0
+        self.violations = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=audit.queue_size)
+        self._tasks: Set[asyncio.Task] = set()
+        self._thread = None
+        self._lock = threading.Lock()
+        # Ключ - id настроек функции, значение - настройки функции (чтобы
+        # их id не был использован снова) и настройки для проверки
+        self._settings = Cache(maxsize=MAX_SETTINGS)
+
+    def get_settings(self, settings: Settings) -> Settings:
+        """ Возвращает настройки для проверки результата: без аудита и без
+            замены значений (создаются один раз для каждых настроек).
+        """
+
+        return self._settings.get(
+            id(settings), create_audit_settings, settings
+        )[1]
+
+    def prepare(self, result: Any) -> Any:
+        """ Возвращает значение для проверки (результат или его снимок)."""
+
+        with self._lock:
+            self.submitted += 1
+
+        snapshot = self.audit.snapshot
+        return result if snapshot is None else snapshot(result)
+
+    def submit(
+        self, check: Callable, plan: ValidationPlan, result: Any,
+        settings: Settings,
+    ):
+        """ Передает результат в очередь фонового потока, который проверит
+            его вызовом check(plan, result, settings).
+        """
+
+        if self._thread is None:
+            self.start()
+
+        if self._queue.full():
+            # Снимок не создается, если результат все равно будет отброшен
+            with self._lock:
+                self.dropped += 1
+            return
+
+        try:
+            self._queue.put_nowait((
+                check, plan, self.prepare(result),
+                self.get_settings(settings),
+            ))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def submit_task(
+        self, check: Callable, plan: ValidationPlan, result: Any,
+        settings: Settings,
+    ):
+        """ Создает задачу в текущем цикле событий, которая проверит
+            результат вызовом await check(plan, result, settings).
+        """
+
+        if len(self._tasks) >= self.audit.queue_size:
+            with self._lock:
+                self.dropped += 1
+            return
+
+        task = asyncio.get_running_loop().create_task(self.run_check(
+            check, plan, self.prepare(result), self.get_settings(settings)
+        ))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def start(self):
+        """ Запускает фоновый поток (один раз)."""
+
+        with self._lock:
+            if self._thread is None:
+                thread = threading.Thread(
+                    target=self.run, name="valdec-audit", daemon=True
+                )
+                thread.start()
+                self._thread = thread
+
+    def run(self):
+        """ Цикл фонового потока."""
+
+        while True:
+            check, plan, result, settings = self._queue.get()
+            try:
+                self.check(check, plan, result, settings)
+            finally:
+                self._queue.task_done()
+
+    def check(
+        self, check: Callable, plan: ValidationPlan, result: Any,
+        settings: Settings,
+    ):
+        """ Проверяет результат и сообщает об ошибке (не поднимая ее)."""
+
+        try:
+            check(plan, result, settings)
+        except ValidationError as error:
+            self.report(plan, error)
+        except Exception:
+            logger.exception("valdec: audit of %s failed", plan.func)
+        with self._lock:
+            self.checked += 1
+
+    async def run_check(
+        self, check: Callable, plan: ValidationPlan, result: Any,
+        settings: Settings,
+    ):
+        """ Асинхронная версия check (для задач, см. submit_task)."""
+
+        try:
+            await check(plan, result, settings)
+        except ValidationError as error:
+            self.report(plan, error)
+        except Exception:
+            logger.exception("valdec: audit of %s failed", plan.func)
+        with self._lock:
+            self.checked += 1
+
+    def report(self, plan: ValidationPlan, error: ValidationError):
+        """ Записывает ошибку в лог и вызывает Audit.on_violation."""
+
+        with self._lock:
+            self.violations += 1
+        name = levels.get_function_name(plan.func)
+
+        logger.warning(
+            "valdec: %s returned an invalid result: %s", name, error
+        )
+
+        on_violation = self.audit.on_violation
+        if on_violation is not None:
+            try:
+                on_violation(name, error)
+            except Exception:
+                logger.exception("valdec: audit on_violation failed")
+
+    def join(self):
+        """ Ждет, пока будут проверены все результаты из очереди фонового
+            потока.
+        """
+
+        self._queue.join()
+
+    async def async_join(self):
+        """ Ждет, пока будут выполнены все задачи проверки."""
+
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks))
+
+    def get_stats(self) -> Dict[str, int]:
+        """ Возвращает словарь со счетчиками аудитора."""
+
+        with self._lock:
+            stats = {
+                "submitted": self.submitted,
+                "dropped": self.dropped,
+                "checked": self.checked,
+                "violations": self.violations,
+            }
+        stats["pending"] = self._queue.qsize() + len(self._tasks)
+
+        return stats
+
+
+def get_auditor(audit: Audit) -> Auditor:
+    """ Возвращает аудитор для настроек аудита (создается один раз)."""
+
+    try:
+        return _auditors[audit]
+    except KeyError:
+        pass
+
+    with _auditors_lock:
+        auditor = _auditors.get(audit)
+        if auditor is None:
+            auditor = _auditors[audit] = Auditor(audit)
+
+    return auditor
+
+
+def get_stats() -> Dict[Audit, Dict[str, int]]:
+    """ Возвращает словарь {настройки аудита: счетчики аудитора} для всех
+        аудиторов.
+    """
+
+    return {
+        auditor.audit: auditor.get_stats()
+        for auditor in list(_auditors.values())
+    }
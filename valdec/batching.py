@@ -0,0 +1,183 @@
+""" Объединение валидации аргументов конкурентных вызовов асинхронной
+    функции (см. Settings.batch_size).
+
+    Значения аргументов вызовов, поступивших в течение `batch_window`
+    секунд (но не больше `batch_size` вызовов), валидируются одним вызовом
+    функции валидатора: имена полей каждого вызова получают суффикс с его
+    номером в пакете (см. get_batch_name).
+
+    Если валидация пакета закончилась неудачно, то значения каждого вызова
+    валидируются отдельно, чтобы каждый вызов получил свою ошибку (или свой
+    результат).
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from valdec.data_classes import Settings
+from valdec.errors import ValidationArgumentsError
+from valdec.utils import async_run_validation
+
+BATCH_SEPARATOR = "__batch"
+
+Item = Tuple[Dict[str, Any], Dict[str, Any], asyncio.Future]
+
+
+def get_batch_name(name: str, index: int) -> str:
+    """ Возвращает имя поля в пакете для поля `name` вызова номер `index`.
+    """
+
+    return f"{name}{BATCH_SEPARATOR}{index}"
+
+
+def split_batch_result(
+    replaceable: Optional[Dict[str, Any]], count: int
+) -> List[Optional[Dict[str, Any]]]:
+    """ Разделяет результат валидации пакета на результаты вызовов."""
+
+    results: List[Optional[Dict[str, Any]]] = [None] * count
+
+    for batch_name, value in (replaceable or {}).items():
+        name, _, index = batch_name.rpartition(BATCH_SEPARATOR)
+        result = results[int(index)]
+        if result is None:
+            result = results[int(index)] = {}
+        result[name] = value
+
+    return results
+
+
+class Batcher:
+    """ Объединяет валидацию аргументов конкурентных вызовов одной
+        декорированной асинхронной функции.
+
+        Для каждого цикла событий (event loop) копится свой пакет.
+    """
+
+    __slots__ = (
+        "size", "window", "settings", "_pending", "_handles", "_tasks"
+    )
+
+    def __init__(self, size: int, window: float, settings: Settings):
+        self.size = size
+        self.window = window
+        self.settings = settings
+        self._pending: Dict[asyncio.AbstractEventLoop, List[Item]] = {}
+        self._handles: Dict[asyncio.AbstractEventLoop, asyncio.Handle] = {}
+        # Ссылки на задачи валидации пакетов (цикл событий хранит только
+        # слабые ссылки на задачи)
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def validate(
+        self, annotations: Dict[str, Any], values: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """ Добавляет значения аргументов вызова в пакет и возвращает
+            результат их валидации (как async_run_validation).
+        """
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        pending = self._pending.setdefault(loop, [])
+        pending.append((annotations, values, future))
+
+        if len(pending) >= self.size:
+            self.flush(loop)
+        elif len(pending) == 1:
+            self._handles[loop] = loop.call_later(
+                self.window, self.flush, loop
+            )
+
+        return await future
+
+    def flush(self, loop: asyncio.AbstractEventLoop):
+        """ Запускает валидацию накопленного пакета."""
+
+        handle = self._handles.pop(loop, None)
+        if handle is not None:
+            handle.cancel()
+
+        items = self._pending.pop(loop, None)
+        if items:
+            task = loop.create_task(self.run(items))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def run(self, items: List[Item]):
+        """ Валидирует пакет. Вызовы с разными наборами полученных
+            аргументов валидируются разными пакетами.
+        """
+
+        groups: Dict[Tuple[str, ...], List[Item]] = {}
+        for item in items:
+            groups.setdefault(tuple(item[1]), []).append(item)
+
+        for group in groups.values():
+            try:
+                if len(group) == 1:
+                    await self.run_item(group[0])
+                else:
+                    await self.run_group(group)
+            except BaseException as error:
+                for _, _, future in group:
+                    if not future.done():
+                        future.set_exception(error)
+                if not isinstance(error, Exception):
+                    raise
+
+    async def run_item(self, item: Item):
+        """ Валидирует значения одного вызова."""
+
+        annotations, values, future = item
+
+        try:
+            result = await self.validate_values(annotations, values)
+        except ValidationArgumentsError as error:
+            if not future.done():
+                future.set_exception(error)
+        else:
+            if not future.done():
+                future.set_result(result)
+
+    async def run_group(self, group: List[Item]):
+        """ Валидирует значения вызовов с одинаковыми аннотациями одним
+            вызовом функции валидатора.
+        """
+
+        batch_annotations = {}
+        batch_values = {}
+
+        for index, (annotations, values, _) in enumerate(group):
+            for name, value in values.items():
+                batch_name = get_batch_name(name, index)
+                batch_annotations[batch_name] = annotations[name]
+                batch_values[batch_name] = value
+
+        try:
+            replaceable = await self.validate_values(
+                batch_annotations, batch_values
+            )
+        except ValidationArgumentsError:
+            for item in group:
+                await self.run_item(item)
+            return
+
+        results = split_batch_result(replaceable, len(group))
+        for (_, _, future), result in zip(group, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def validate_values(
+        self, annotations: Dict[str, Any], values: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+
+        settings = self.settings
+
+        return await async_run_validation(
+            annotations,
+            values,
+            settings.validator,
+            settings.is_replace_args,
+            settings.extra,
+            is_arguments=True,
+        )
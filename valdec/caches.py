@@ -0,0 +1,172 @@
+""" Кэш для объектов, которые valdec создает один раз и затем использует
+    при каждом вызове (например, классы для валидации).
+"""
+
+import threading
+import weakref
+from collections import deque
+from typing import Any, Callable, Dict, Hashable, Optional, Set
+
+
+class Cache:
+    """ Потокобезопасный кэш.
+
+        Чтение из кэша выполняется без блокировок. Значение для каждого
+        ключа создается только один раз, даже если его одновременно
+        запросили из нескольких потоков. При этом создание значений для
+        разных ключей не блокирует друг друга (блокировка берется на ключ).
+
+        Значения для ключей, которые нельзя хэшировать, не кэшируются, а
+        создаются при каждом запросе.
+
+        :maxsize: Наибольшее количество значений в кэше. Если он заполнен,
+                  то удаляются значения в порядке их добавления, но
+                  значения, которые запрашивались после прошлой проверки,
+                  получают "второй шанс" (алгоритм CLOCK, приближение LRU).
+                  При чтении значения только отмечается, что оно
+                  запрашивалось, порядок значений меняется под
+                  блокировкой при добавлении. Если None, то кэш не
+                  ограничен.
+    """
+
+    __slots__ = ("maxsize", "_data", "_order", "_used", "_lock", "_key_locks")
+
+    def __init__(self, maxsize: Optional[int] = None):
+        self.maxsize = maxsize
+        self._data: Dict[Hashable, Any] = {}
+        # Порядок проверки ключей при удалении (меняется под _lock)
+        self._order: "deque[Hashable]" = deque()
+        # Ключи, которые запрашивались после последней проверки
+        self._used: Set[Hashable] = set()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._order.clear()
+            self._used.clear()
+
+    def lookup(self, key: Hashable) -> Any:
+        """ Возвращает значение для ключа или None, если его нет в кэше (ключ
+            должен быть хэшируемым).
+        """
+
+        value = self._data.get(key)
+        if value is not None and self.maxsize is not None and \
+                key not in self._used:
+            self._used.add(key)
+
+        return value
+
+    def get(self, key: Hashable, factory: Callable, *args: Any) -> Any:
+        """ Возвращает значение для ключа. Если его нет в кэше, то создает
+            его вызовом factory(*args) и сохраняет в кэше.
+        """
+
+        try:
+            value = self._data[key]
+        except KeyError:
+            pass
+        except TypeError:
+            return factory(*args)
+        else:
+            if self.maxsize is not None and key not in self._used:
+                self._used.add(key)
+            return value
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        is_created = False
+        try:
+            with key_lock:
+                try:
+                    return self._data[key]
+                except KeyError:
+                    pass
+
+                value = factory(*args)
+                self._data[key] = value
+                is_created = True
+        finally:
+            with self._lock:
+                if self._key_locks.get(key) is key_lock:
+                    del self._key_locks[key]
+                if is_created and self.maxsize is not None:
+                    # Новое значение добавляется в очередь после удаления
+                    # лишних, чтобы не быть удаленным первым
+                    self.evict()
+                    self._order.append(key)
+
+        return value
+
+    def evict(self):
+        """ Удаляет значения, пока их больше, чем maxsize (вызывается под
+            блокировкой _lock). Значения, которые запрашивались после
+            прошлой проверки, не удаляются, а переносятся в конец очереди.
+        """
+
+        data = self._data
+        order = self._order
+        used = self._used
+        while len(data) > self.maxsize and order:
+            key = order.popleft()
+            if key in used:
+                used.discard(key)
+                order.append(key)
+            else:
+                data.pop(key, None)
+
+
+class WeakCache:
+    """ Потокобезопасный кэш с двухуровневыми ключами: объект (например,
+        объект кода функции) и ключ для этого объекта.
+
+        Объекты хранятся по слабым ссылкам: когда объект удаляется, то
+        удаляются и все значения для него. Поэтому значения не должны
+        ссылаться на свой объект (иначе он никогда не будет удален).
+
+        :maxsize: Наибольшее количество значений для одного объекта (см.
+                  Cache.maxsize).
+    """
+
+    __slots__ = ("maxsize", "_data", "_lock")
+
+    def __init__(self, maxsize: Optional[int] = None):
+        self.maxsize = maxsize
+        self._data: "weakref.WeakKeyDictionary[Any, Cache]" = \
+            weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, obj: Any) -> bool:
+        return obj in self._data
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def get(
+        self, obj: Any, key: Hashable, factory: Callable, *args: Any
+    ) -> Any:
+        """ Возвращает значение для объекта и ключа. Если его нет в кэше, то
+            создает его вызовом factory(*args) и сохраняет в кэше.
+        """
+
+        cache = self._data.get(obj)
+        if cache is None:
+            with self._lock:
+                cache = self._data.get(obj)
+                if cache is None:
+                    cache = self._data[obj] = Cache(self.maxsize)
+
+        return cache.get(key, factory, *args)
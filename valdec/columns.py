@@ -0,0 +1,384 @@
+""" Валидация записей в колоночном виде (см. data_classes.Columns).
+
+    Значение аргумента с аннотацией `Columns(Row)` - словарь {имя поля Row:
+    колонка}, где колонки - последовательности (списки, кортежи, массивы)
+    одинаковой длины. Каждая колонка валидируется один раз, целиком:
+
+    1. Массивы (numpy и другие объекты с атрибутом `dtype`, array.array)
+       проверяются по типу их элементов, без перебора элементов.
+    2. Колонки простых типов (int, float, str, bytes, bool), все элементы
+       которых уже имеют тип из аннотации, проверяются одним проходом
+       (без создания экземпляров классов валидации).
+    3. Остальные колонки валидируются функцией валидатора из настроек, как
+       поле с аннотацией List[аннотация поля] (все такие колонки - одним
+       вызовом).
+
+    Валидаторы самой модели записи (@validator и @root_validator) к
+    колонкам не применяются, поэтому для таких моделей при декорировании
+    поднимается TypeError (см. check_row_validators).
+
+    Функция получает ColumnBatch: колонки остаются колонками, а записи
+    доступны через легкие представления (RowView), без создания
+    экземпляров Row для каждой записи.
+"""
+
+import array
+import dataclasses
+import inspect
+import typing
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from valdec.data_classes import Columns
+from valdec.errors import ValidationError
+
+# Допустимые значения dtype.kind (numpy) и array.typecode для простых типов
+DTYPE_KINDS = {
+    bool: ("b", ),
+    int: ("i", "u"),
+    float: ("f", ),
+    str: ("U", ),
+    bytes: ("S", ),
+}
+TYPECODES = {
+    int: ("b", "B", "h", "H", "i", "I", "l", "L", "q", "Q"),
+    float: ("f", "d"),
+}
+
+PRIMITIVE_TYPES = (int, float, str, bytes, bool)
+
+
+class RowView:
+    """ Представление записи из ColumnBatch.
+
+        Значения полей читаются из колонок при обращении к атрибутам,
+        экземпляр Row не создается.
+    """
+
+    __slots__ = ("_batch", "_index")
+
+    def __init__(self, batch: "ColumnBatch", index: int):
+        self._batch = batch
+        self._index = index
+
+    def __getattr__(self, name: str) -> Any:
+        batch = self._batch
+        column = batch.columns.get(name)
+        if column is not None:
+            return column[self._index]
+        try:
+            return batch.defaults[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def as_dict(self) -> Dict[str, Any]:
+        """ Возвращает словарь с именами полей и их значениями."""
+
+        return {name: getattr(self, name) for name in self._batch.fields}
+
+    def to_row(self) -> Any:
+        """ Создает экземпляр класса записи (Row)."""
+
+        return self._batch.row(**self.as_dict())
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, RowView):
+            return self.as_dict() == other.as_dict()
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{k}={v!r}" for k, v in self.as_dict().items())
+        return f"{self._batch.row.__name__}View({values})"
+
+
+class ColumnBatch:
+    """ Отвалидированные записи в колоночном виде.
+
+        :row:      Класс записи.
+        :columns:  Словарь {имя поля: колонка}.
+        :fields:   Кортеж имен полей записи.
+        :defaults: Словарь со значениями по умолчанию для полей, колонок
+                   которых нет в columns.
+    """
+
+    __slots__ = ("row", "columns", "fields", "defaults", "_length")
+
+    def __init__(
+        self, row: type, columns: Dict[str, Any], fields: Tuple[str, ...],
+        defaults: Dict[str, Any], length: int,
+    ):
+        self.row = row
+        self.columns = columns
+        self.fields = fields
+        self.defaults = defaults
+        self._length = length
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: int) -> RowView:
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("ColumnBatch index out of range")
+        return RowView(self, index)
+
+    def __iter__(self) -> Iterator[RowView]:
+        for index in range(self._length):
+            yield RowView(self, index)
+
+    def to_rows(self) -> List[Any]:
+        """ Создает экземпляры класса записи для всех записей."""
+
+        return [view.to_row() for view in self]
+
+    def __repr__(self) -> str:
+        return f"ColumnBatch({self.row.__name__}, {self._length} rows)"
+
+
+def get_row_fields(
+    row: type
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """ Возвращает словарь {имя поля: аннотация} класса записи (модели
+        pydantic или датакласса) и словарь значений по умолчанию.
+    """
+
+    hints = typing.get_type_hints(row)
+    fields = {}
+    defaults = {}
+
+    if dataclasses.is_dataclass(row):
+        for field in dataclasses.fields(row):
+            fields[field.name] = hints.get(field.name, field.type)
+            if field.default is not dataclasses.MISSING:
+                defaults[field.name] = field.default
+            elif field.default_factory is not dataclasses.MISSING:
+                defaults[field.name] = field.default_factory()
+    elif hasattr(row, "__fields__"):
+        check_row_validators(row)
+        for name, model_field in row.__fields__.items():
+            fields[name] = hints.get(name, model_field.outer_type_)
+            if not model_field.required:
+                defaults[name] = model_field.get_default()
+    else:
+        raise TypeError(f"Columns: {row!r} is not a model or a dataclass")
+
+    return fields, defaults
+
+
+def check_row_validators(row: type):
+    """ Поднимает TypeError, если у модели записи есть валидаторы
+        (@validator или @root_validator): колонки валидируются как
+        List[аннотация поля], поэтому такие валидаторы не были бы вызваны.
+    """
+
+    validators = getattr(row, "__validators__", None)
+    pre_root = getattr(row, "__pre_root_validators__", None)
+    post_root = getattr(row, "__post_root_validators__", None)
+
+    if validators or pre_root or post_root:
+        raise TypeError(
+            f"Columns: {row.__name__} has validators, which are not "
+            "applied to columns; validate such records as List[Row]"
+        )
+
+
+def get_columns_fields(
+    annotation: Columns
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """ Возвращает поля и значения по умолчанию класса записи аннотации
+        (вычисляются один раз).
+    """
+
+    if annotation.fields is None:
+        annotation.fields, annotation.defaults = get_row_fields(
+            annotation.row
+        )
+
+    return annotation.fields, annotation.defaults
+
+
+def is_columns(annotation: Any) -> bool:
+    """ Возвращает True, если аннотация - Columns.
+
+        Вызывается при декорировании функции (при выборе правил), поэтому
+        поля класса записи вычисляются (и проверяются) при декорировании.
+    """
+
+    if not isinstance(annotation, Columns):
+        return False
+
+    get_columns_fields(annotation)
+
+    return True
+
+
+def is_valid_column(annotation: Any, column: Any) -> bool:
+    """ Возвращает True, если колонка проверена без функции валидатора
+        (см. описание модуля, пункты 1 и 2).
+    """
+
+    if not inspect.isclass(annotation) or annotation not in PRIMITIVE_TYPES:
+        return False
+
+    dtype = getattr(column, "dtype", None)
+    if dtype is not None:
+        return getattr(dtype, "kind", None) in DTYPE_KINDS[annotation]
+
+    if isinstance(column, array.array):
+        return column.typecode in TYPECODES.get(annotation, ())
+
+    if isinstance(column, (list, tuple)):
+        types = set(map(type, column))
+        return not types or types == {annotation}
+
+    return False
+
+
+def get_column_name(name: str, field: str) -> str:
+    """ Возвращает имя колонки `field` аргумента `name` для функции
+        валидатора.
+    """
+
+    return f"{name}__{field}"
+
+
+def prepare_columns(
+    annotations: Dict[str, Any], values: Dict[str, Any]
+) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """ Проверяет структуру значений (словари колонок одинаковой длины) и
+        колонки, которые можно проверить без функции валидатора.
+
+        Возвращает аннотации и значения колонок для функции валидатора и
+        словарь {имя аргумента: колонки}.
+    """
+
+    errors = []
+    validator_annotations = {}
+    validator_values = {}
+    batches = {}
+
+    for name, value in values.items():
+
+        fields, defaults = get_columns_fields(annotations[name])
+
+        if isinstance(value, ColumnBatch) and \
+                value.row is annotations[name].row:
+            batches[name] = value
+            continue
+
+        if not isinstance(value, Mapping):
+            errors.append(f"{name}: value is not a mapping of columns")
+            continue
+
+        unknown = [field for field in value if field not in fields]
+        missing = [
+            field for field in fields
+            if field not in value and field not in defaults
+        ]
+        lengths = {len(column) for column in value.values()}
+
+        if unknown:
+            errors.append(f"{name}: unknown columns {unknown}")
+        if missing:
+            errors.append(f"{name}: missing columns {missing}")
+        if len(lengths) > 1:
+            errors.append(f"{name}: columns have different lengths")
+        if unknown or missing or len(lengths) > 1:
+            continue
+
+        batches[name] = dict(value)
+
+        for field, column in value.items():
+            annotation = fields[field]
+            if is_valid_column(annotation, column):
+                continue
+            column_name = get_column_name(name, field)
+            validator_annotations[column_name] = List[annotation]
+            validator_values[column_name] = column
+
+    if errors:
+        raise ValidationError("\n".join(errors))
+
+    return validator_annotations, validator_values, batches
+
+
+def make_batches(
+    annotations: Dict[str, Any], batches: Dict[str, Any],
+    replaceable: Optional[Dict[str, Any]],
+) -> Dict[str, ColumnBatch]:
+    """ Создает ColumnBatch для каждого аргумента (с колонками, которые
+        заменила функция валидатора).
+    """
+
+    result = {}
+
+    for name, columns in batches.items():
+
+        if isinstance(columns, ColumnBatch):
+            result[name] = columns
+            continue
+
+        fields, defaults = get_columns_fields(annotations[name])
+
+        if replaceable:
+            for field in columns:
+                column_name = get_column_name(name, field)
+                if column_name in replaceable:
+                    columns[field] = replaceable[column_name]
+
+        length = len(next(iter(columns.values()))) if columns else 0
+        result[name] = ColumnBatch(
+            annotations[name].row, columns, tuple(fields),
+            {k: v for k, v in defaults.items() if k not in columns},
+            length,
+        )
+
+    return result
+
+
+def make_validator(validator: Callable) -> Callable:
+    """ Возвращает функцию валидатора для полей с аннотацией Columns,
+        которая валидирует колонки функцией `validator` (функцией из
+        настроек).
+    """
+
+    def columns_validator(
+        annotations: Dict[str, Any], values: Dict[str, Any],
+        is_replace: bool, extra: dict
+    ) -> Optional[Dict[str, Any]]:
+
+        validator_annotations, validator_values, batches = prepare_columns(
+            annotations, values
+        )
+
+        replaceable = None
+        if validator_values:
+            replaceable = validator(
+                validator_annotations, validator_values, is_replace, extra
+            )
+            if inspect.isawaitable(replaceable):
+                return finish_async(
+                    annotations, batches, replaceable, is_replace
+                )
+
+        if not is_replace:
+            return None
+
+        return make_batches(annotations, batches, replaceable)
+
+    return columns_validator
+
+
+async def finish_async(
+    annotations: Dict[str, Any], batches: Dict[str, Any],
+    awaitable: Any, is_replace: bool,
+) -> Optional[Dict[str, Any]]:
+    """ Завершает валидацию колонок асинхронной функцией валидатора."""
+
+    replaceable = await awaitable
+
+    if not is_replace:
+        return None
+
+    return make_batches(annotations, batches, replaceable)
@@ -0,0 +1,40 @@
+""" Контекст вызовов, для которых валидация не выполняется.
+
+    Пример:
+    ```
+    @validate
+    def handler(data: Data) -> Result:
+        with trusted():
+            # Декорированные функции, вызванные внутри блока, не валидируют
+            # аргументы и результат
+            return helper(data)
+    ```
+
+    Контекст хранится в contextvars.ContextVar, поэтому он действует только
+    в текущем потоке и в текущей задаче asyncio (и в задачах, созданных
+    внутри блока), и не влияет на другие потоки и задачи.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+trusted_context: "ContextVar[bool]" = ContextVar(
+    "valdec_trusted_context", default=False
+)
+
+
+@contextmanager
+def trusted(is_trusted: bool = True) -> Iterator[None]:
+    """ Контекстный менеджер, внутри которого декораторы validate и
+        async_validate вызывают функции без валидации.
+
+        :is_trusted: Если False, то валидация внутри блока снова включается
+                     (например, для вложенного блока).
+    """
+
+    token = trusted_context.set(is_trusted)
+    try:
+        yield
+    finally:
+        trusted_context.reset(token)
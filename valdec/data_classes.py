@@ -1,13 +1,330 @@
+import inspect
+import mmap
+from concurrent.futures import Executor
 from dataclasses import dataclass, field
-from typing import Any, Callable
+from typing import Any, Callable, Dict, Optional, Tuple
 
 
-@dataclass
-class FieldData:
+class Discriminated:
+    """ Аннотация для Union классов (моделей), которые различаются
+        значением поля-дискриминатора.
+
+        Пример:
+        ```
+        @validate
+        def func(event: Discriminated(Union[EventA, EventB], "type")): ...
+        ```
+
+        В каждом классе из Union поле-дискриминатор должно иметь аннотацию
+        Literal (или значение по умолчанию). Индекс {значение: класс}
+        создается один раз, и значение аргумента валидируется только
+        классом, который соответствует значению его поля-дискриминатора
+        (а не поочередно всеми классами из Union).
+
+        :union: Аннотация Union с классами.
+        :field: Имя поля-дискриминатора.
+        :index: Словарь {значение поля-дискриминатора: класс} (создается
+                при первом использовании, см. utils.get_discriminator_index).
+    """
+
+    __slots__ = ("union", "field", "index")
+
+    def __init__(self, union: Any, field: str):
+        self.union = union
+        self.field = field
+        self.index: Optional[Dict[Any, type]] = None
+
+    def __repr__(self) -> str:
+        return f"Discriminated({self.union!r}, {self.field!r})"
+
+
+class Buffer:
+    """ Аннотация для буферов (bytes, bytearray, memoryview, mmap), которые
+        нужно передать в функцию без копирования и без приведения типов.
+
+        Пример:
+        ```
+        @validate
+        def upload(data: Buffer(max_size=100 * 2**20)): ...
+        ```
+
+        Проверяются только тип объекта, его размер (в байтах) и
+        непрерывность (для memoryview), содержимое буфера не читается.
+        Значение никогда не заменяется: в функцию передается исходный
+        объект. Поля с такими аннотациями всегда валидируются valdec
+        (см. validator_buffer), а не функцией валидатора из настроек.
+
+        :types:         Кортеж допустимых типов объектов.
+        :min_size:      Минимальный размер в байтах (или None).
+        :max_size:      Максимальный размер в байтах (или None).
+        :is_contiguous: Если True, то буфер должен быть непрерывным
+                        (C-contiguous).
+    """
+
+    __slots__ = ("types", "min_size", "max_size", "is_contiguous")
+
+    def __init__(
+        self,
+        types: Tuple[type, ...] = (bytes, bytearray, memoryview, mmap.mmap),
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        is_contiguous: bool = True,
+    ):
+        self.types = types
+        self.min_size = min_size
+        self.max_size = max_size
+        self.is_contiguous = is_contiguous
+
+    def __repr__(self) -> str:
+        names = ", ".join(t.__name__ for t in self.types)
+        return (
+            f"Buffer(({names}), min_size={self.min_size}, "
+            f"max_size={self.max_size}, is_contiguous={self.is_contiguous})"
+        )
+
+
+class Columns:
+    """ Аннотация для записей в колоночном виде: словаря {имя поля: колонка}
+        с колонками одинаковой длины (списками, кортежами, массивами).
+
+        Пример:
+        ```
+        @validate
+        def handler(batch: Columns(Row)): ...
+        ```
+
+        Каждая колонка валидируется один раз (как List[аннотация поля]), а
+        функция получает columns.ColumnBatch с представлениями записей
+        (без создания экземпляра Row для каждой записи). Поля с такими
+        аннотациями валидируются модулем columns (колонки, которые нужно
+        валидировать поэлементно - функцией валидатора из настроек).
+
+        :row:      Класс записи (модель pydantic без @validator и
+                   @root_validator или датакласс).
+        :fields:   Словарь {имя поля: аннотация} класса записи (создается
+                   при первом использовании, см.
+                   columns.get_columns_fields).
+        :defaults: Словарь значений по умолчанию полей класса записи.
+    """
+
+    __slots__ = ("row", "fields", "defaults")
+
+    def __init__(self, row: type):
+        self.row = row
+        self.fields: Optional[Dict[str, Any]] = None
+        self.defaults: Optional[Dict[str, Any]] = None
+
+    def __repr__(self) -> str:
+        return f"Columns({self.row.__name__})"
+
+
+class ValidationPlan:
+    """ План валидации функции.
+
+        Создается один раз при декорировании функции и содержит все, что
+        можно вычислить заранее по её сигнатуре и аргументам декоратора.
+        Благодаря этому при каждом вызове функции не нужно заново разбирать
+        сигнатуру и создавать промежуточные объекты для каждого аргумента.
+
+        :func:             Декорируемая функция.
+        :signature:        Сигнатура функции (вычисляется при первом
+                           обращении, так как нужна только для редких
+                           вызовов, см. utils.get_values, и для оберток с
+                           сигнатурой функции).
+        :annotations:      Словарь с именами и аннотациями аргументов,
+                           отобранных для валидации (в порядке сигнатуры).
+        :positions:        Словарь с именами отобранных аргументов, которые
+                           можно передать позиционно, и их позициями.
+        :keywords:         Кортеж с именами отобранных аргументов, которые
+                           можно передать по имени.
+        :var_positional:   Имя отобранного аргумента `*args` (или None).
+        :var_keyword:      Имя отобранного аргумента `**kwargs` (или None).
+        :positional_count: Количество позиционных параметров (без `*args`).
+        :max_positional:   Максимальное количество позиционных значений
+                           (None, если у функции есть `*args`).
+        :keyword_indexes:  Словарь с именами всех параметров, которые можно
+                           передать по имени, и их позициями (для
+                           keyword-only параметров - sys.maxsize).
+        :required:         Кортеж пар (имя, позиция) обязательных параметров.
+        :has_var_keyword:  True, если у функции есть `**kwargs`.
+        :result_annotations: Словарь {"return": аннотация}, если результат
+                             функции отобран для валидации, иначе None.
+        :classes:          Словарь с именами отобранных полей (в том числе
+                           "return"), в аннотациях которых есть классы, и
+                           кортежами этих классов (см.
+                           Settings.is_trust_instances).
+        :shallow_types:    Словарь с именами отобранных полей (в том числе
+                           "return") и кортежами типов для поверхностной
+                           проверки (см. valdec.levels.SHALLOW). Поля, которые
+                           нельзя проверить поверхностно, в словарь не
+                           попадают.
+        :level:            Действующий уровень валидации (см. valdec.levels).
+        :batcher:          Объект, объединяющий валидацию аргументов
+                           конкурентных вызовов (см. Settings.batch_size),
+                           или None.
+        :routes:           Словарь с именами отобранных полей (в том числе
+                           "return") и правилами, которые выбраны для них
+                           по аннотациям (см. Route). Поля, которых нет в
+                           словаре, валидируются Settings.validator.
+        :controller:       Объект, который ограничивает стоимость валидации
+                           (см. Settings.overhead), или None.
+    """
+
+    __slots__ = (
+        "func", "_signature", "annotations", "positions", "keywords",
+        "var_positional", "var_keyword", "positional_count",
+        "max_positional", "keyword_indexes", "required", "has_var_keyword",
+        "result_annotations", "classes", "shallow_types", "level",
+        "batcher", "routes", "controller", "__weakref__",
+    )
 
-    name: str
-    value: Any
-    annotation: Any
+    def __init__(
+        self,
+        func: Callable,
+        signature: Optional[inspect.Signature],
+        annotations: Dict[str, Any],
+        positions: Dict[str, int],
+        keywords: Tuple[str, ...],
+        var_positional: Optional[str],
+        var_keyword: Optional[str],
+        positional_count: int,
+        max_positional: Optional[int],
+        keyword_indexes: Dict[str, int],
+        required: Tuple[Tuple[str, int], ...],
+        has_var_keyword: bool,
+        result_annotations: Optional[Dict[str, Any]],
+        classes: Dict[str, Tuple[type, ...]],
+        shallow_types: Dict[str, Tuple[type, ...]],
+        level: str = "full",
+        batcher: Any = None,
+        routes: Optional[Dict[str, "Route"]] = None,
+        controller: Any = None,
+    ):
+        self.func = func
+        self._signature = signature
+        self.annotations = annotations
+        self.positions = positions
+        self.keywords = keywords
+        self.var_positional = var_positional
+        self.var_keyword = var_keyword
+        self.positional_count = positional_count
+        self.max_positional = max_positional
+        self.keyword_indexes = keyword_indexes
+        self.required = required
+        self.has_var_keyword = has_var_keyword
+        self.result_annotations = result_annotations
+        self.classes = classes
+        self.shallow_types = shallow_types
+        self.level = level
+        self.batcher = batcher
+        self.routes = routes or {}
+        self.controller = controller
+
+    @property
+    def signature(self) -> inspect.Signature:
+        if self._signature is None:
+            self._signature = inspect.signature(self.func)
+        return self._signature
+
+
+@dataclass(frozen=True)
+class Route:
+    """ Правило выбора функции валидатора для поля по его аннотации (см.
+        Settings.routes).
+
+        :is_match:  Функция, которая получает аннотацию поля и возвращает
+                    True, если поле нужно валидировать функцией validator.
+        :validator: Функция валидатора (с такой же сигнатурой, как у
+                    Settings.validator).
+        :is_fallback: Если True, то значения, которые не прошли валидацию
+                      функцией validator, валидируются функцией
+                      Settings.validator. Иначе поднимается исключение
+                      валидации (для аннотаций, которые Settings.validator
+                      не поддерживает, например Buffer).
+    """
+
+    is_match: Callable[[Any], bool]
+    validator: Callable
+    is_fallback: bool = True
+
+
+@dataclass(frozen=True)
+class Overhead:
+    """ Настройки адаптивного ограничения стоимости валидации (см.
+        Settings.overhead и модуль overhead).
+
+        Для каждой декорированной функции измеряется отношение времени
+        валидации ко времени выполнения функции. Если оно больше budget,
+        то функция переходит в режим mode, а когда оно станет меньше
+        budget * restore_ratio - возвращается к полной валидации.
+
+        :budget:        Допустимое отношение времени валидации ко времени
+                        выполнения функции (например, 0.2 - 20%).
+        :mode:          Режим при превышении: "sampled" (полностью
+                        валидируется один вызов из sample_every, остальные
+                        не валидируются) или "shallow" (один вызов из
+                        sample_every - полностью, остальные -
+                        поверхностно, см. levels.SHALLOW).
+        :sample_every:  Каждый какой вызов валидируется полностью в режиме
+                        mode (по этим вызовам отношение измеряется дальше).
+        :restore_ratio: Доля budget, ниже которой восстанавливается полная
+                        валидация.
+        :min_samples:   Количество измерений до первого решения.
+        :smoothing:     Вес нового измерения в скользящем среднем
+                        отношения.
+        :on_change:     Функция, которая вызывается при каждой смене режима
+                        с аргументами (имя функции, старый режим, новый
+                        режим, отношение), например для отправки метрики.
+    """
+
+    budget: float
+    mode: str = "sampled"
+    sample_every: int = 100
+    restore_ratio: float = 0.5
+    min_samples: int = 20
+    smoothing: float = 0.1
+    on_change: Optional[Callable[[str, str, str, float], None]] = None
+
+
+@dataclass(frozen=True)
+class Limits:
+    """ Ограничения размера входящих значений (см. Settings.limits и
+        модуль limits). None - нет ограничения.
+
+        :max_depth:  Наибольшая глубина вложенности коллекций.
+        :max_items:  Наибольшее общее количество элементов во всех
+                     коллекциях значения аргумента (общая коллекция
+                     учитывается при каждом вхождении).
+        :max_length: Наибольшая длина строки или bytes.
+        :max_keys:   Наибольшее количество ключей словаря.
+    """
+
+    max_depth: Optional[int] = None
+    max_items: Optional[int] = None
+    max_length: Optional[int] = None
+    max_keys: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class Audit:
+    """ Настройки фоновой проверки результатов функций (см. Settings.audit
+        и модуль audit).
+
+        :queue_size:   Наибольшее количество результатов, ожидающих
+                       проверки. Если очередь заполнена, то результат не
+                       проверяется.
+        :snapshot:     Функция, которая при вызове создает снимок
+                       результата для проверки (например, copy.deepcopy),
+                       если результат может измениться до проверки. Если
+                       None, то проверяется сам результат.
+        :on_violation: Функция, которая вызывается с аргументами (имя
+                       функции, исключение) для каждого результата, не
+                       прошедшего валидацию.
+    """
+
+    queue_size: int = 1000
+    snapshot: Optional[Callable[[Any], Any]] = None
+    on_violation: Optional[Callable[[str, Exception], None]] = None
 
 
 @dataclass
@@ -22,6 +339,8 @@ class Settings:
                             ее в этом поле.
                             Функция "по умолчанию" установливается в модуле
                             декораторов при объявлении декоратора.
+                            Для декоратора async_validate функция может быть
+                            асинхронной (async def).
 
         :is_replace_args:   Если True, то будет производиться замена исходных
                             значений полей аргументов на экземпляры классов
@@ -32,9 +351,168 @@ class Settings:
         :extra:             Словарь с дополнительными значениями, который
                             будет передаваться в validator (например, можно
                             передать класс для валидации данных)
+        :is_concurrent:     Если True, то декоратор async_validate будет
+                            вызывать асинхронный validator отдельно для
+                            каждого аргумента, и эти вызовы будут выполняться
+                            конкурентно (через asyncio.gather).
+
+        :is_trust_instances:   Если True, то значения, которые являются
+                               экземплярами класса из аннотации (или одного
+                               из классов Union), считаются валидными: они
+                               не передаются в validator и остаются на своем
+                               месте без копирования.
+                               Экземпляры, полученные при замене значений,
+                               помечаются (см. valdec.markers).
+        :is_trust_marked_only: Если True (и is_trust_instances тоже True), то
+                               валидными считаются только экземпляры,
+                               помеченные valdec.
+
+        :result_dumps:      Если указана функция, то декоратор вернет не
+                            результат функции, а JSON (bytes), полученный
+                            вызовом этой функции для отвалидированного
+                            результата. Функции, которые сериализуют
+                            экземпляры классов валидации без их
+                            предварительного преобразования в словари,
+                            есть в модулях валидаторов (dumps).
+
+        :is_specialized:    Если True, то декоратор создаст обертку с
+                            сигнатурой декорируемой функции (вместо
+                            `*args, **kwargs`), см. модуль wrappers.
+                            Учитывается при декорировании функции.
+
+        :batch_size:        Если больше 1, то декоратор async_validate
+                            объединяет валидацию аргументов конкурентных
+                            вызовов функции: значения аргументов вызовов,
+                            поступивших в течение batch_window секунд (но не
+                            больше batch_size вызовов), валидируются одним
+                            вызовом validator (см. модуль batching).
+                            При этом is_concurrent не учитывается.
+                            Учитывается при декорировании функции.
+        :batch_window:      Время (в секундах) накопления вызовов для
+                            объединенной валидации.
+                            Объединение не увеличивает пропускную
+                            способность: в benchmarks/batching.py
+                            количество вызовов в секунду с пакетами любого
+                            размера не выше, чем без них (около 31-47 тысяч
+                            в разных запусках), а задержка каждого вызова
+                            увеличивается примерно на 6-8 мс (без
+                            объединения - 0.02 мс).
+
+        :routes:            Кортеж правил (Route) для выбора функции
+                            валидатора для каждого поля по его аннотации
+                            (например, простые типы можно проверять без
+                            создания экземпляров классов валидации, см.
+                            validator_primitive.primitive_route).
+                            Для поля выбирается первое подходящее правило,
+                            поля без правил валидируются функцией validator.
+                            Если значения полей не прошли валидацию
+                            функцией из правила, то они валидируются
+                            функцией validator (поэтому правила ускоряют
+                            валидацию, но не меняют её результат и сообщения
+                            об ошибках).
+                            Правила выбираются один раз при декорировании
+                            функции.
+
+        :is_strict:         Если True, то значения проверяются строго: без
+                            приведения типов (например, "1" не является
+                            валидным значением для int, а словарь - для
+                            модели), и ничего не заменяется (см. модуль
+                            strict). Передается в validator через
+                            extra["is_strict"].
+        :is_compact:        Если True, то экземпляры классов валидации в
+                            замененных значениях заменяются компактными
+                            записями только для чтения (со __slots__, без
+                            __dict__, см. модуль records). Передается в
+                            validator через extra["is_compact"].
+                            Это не ускорение: записи создаются из уже
+                            созданных экземпляров, поэтому вызов не
+                            быстрее (в benchmarks/records.py - до 25%
+                            медленнее), а пиковая память во время вызова
+                            выше. Уменьшается только память, которую
+                            занимают отвалидированные данные после вызова
+                            (в benchmarks/records.py - примерно в 9 раз).
+        :is_memoized:       Если True, то вложенные объекты, которые
+                            встречаются в значениях несколько раз по ссылке
+                            (например, общий словарь в каждом элементе
+                            списка), валидируются один раз за вызов
+                            функции валидатора, а в результате остаются
+                            общими (см. модуль identity). Передается в
+                            validator через extra["is_memoized"].
+        :is_incremental:    Если True, то экземпляры моделей, созданные
+                            при замене значений (в том числе вложенные),
+                            отслеживаются, и когда такой экземпляр снова
+                            передается на валидацию, валидируются только
+                            поля, которым были присвоены значения (см.
+                            модуль incremental). Передается в validator
+                            через extra["is_incremental"].
+        :is_parse_json:     Если True, то аргументы с аннотацией класса
+                            модели (или List[...] класса модели) могут
+                            получать JSON (str или bytes), который
+                            разбирается функцией из extra["json_loads"]
+                            (по умолчанию json.loads) и затем валидируется.
+                            Передается в validator через
+                            extra["is_parse_json"].
+
+        :chunk_size:        Если больше 0, то значения полей с аннотацией
+                            List[...], в которых больше chunk_size
+                            элементов, делятся на части по chunk_size
+                            элементов, которые валидируются параллельно
+                            (см. модуль parallel). В ошибках указываются
+                            индексы элементов во всей коллекции.
+        :executor:          Пул (concurrent.futures.Executor) для
+                            валидации частей. Если None, то используется
+                            общий пул процессов (в сборках CPython без GIL -
+                            пул потоков).
+        :overhead:          Если указан (см. Overhead), то стоимость
+                            валидации каждой функции измеряется, и при
+                            превышении бюджета функция переходит на
+                            выборочную или поверхностную валидацию (см.
+                            модуль overhead). Учитывается при
+                            декорировании функции.
+        :limits:            Если указаны (см. Limits), то значения
+                            аргументов до валидации проверяются на
+                            глубину вложенности, количество элементов,
+                            длину строк и количество ключей словарей, и
+                            при превышении поднимается
+                            ValidationArgumentsError (см. модуль limits).
+        :audit:             Если указан (см. Audit), то результат функции
+                            не валидируется при вызове и возвращается без
+                            изменений, а проверяется в фоне, и ошибки не
+                            поднимаются, а записываются в лог и передаются
+                            в Audit.on_violation (см. модуль audit).
     """
 
     validator: Callable
     is_replace_args: bool = True
     is_replace_result: bool = True
     extra: dict = field(default_factory=dict)
+    is_concurrent: bool = False
+    is_trust_instances: bool = False
+    is_trust_marked_only: bool = False
+    result_dumps: Optional[Callable[[Any], bytes]] = None
+    is_specialized: bool = False
+    batch_size: int = 0
+    batch_window: float = 0.001
+    routes: Tuple[Route, ...] = ()
+    is_strict: bool = False
+    is_compact: bool = False
+    is_memoized: bool = False
+    is_incremental: bool = False
+    is_parse_json: bool = False
+    chunk_size: int = 0
+    executor: Optional[Executor] = None
+    overhead: Optional[Overhead] = None
+    limits: Optional[Limits] = None
+    audit: Optional[Audit] = None
+
+    def __post_init__(self):
+        if self.is_strict and not self.extra.get("is_strict"):
+            self.extra = {**self.extra, "is_strict": True}
+        if self.is_compact and not self.extra.get("is_compact"):
+            self.extra = {**self.extra, "is_compact": True}
+        if self.is_memoized and not self.extra.get("is_memoized"):
+            self.extra = {**self.extra, "is_memoized": True}
+        if self.is_incremental and not self.extra.get("is_incremental"):
+            self.extra = {**self.extra, "is_incremental": True}
+        if self.is_parse_json and not self.extra.get("is_parse_json"):
+            self.extra = {**self.extra, "is_parse_json": True}
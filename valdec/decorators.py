@@ -58,42 +58,131 @@
     ```
 
     *Примечание: Приведенные примеры работают и для асинхронного декоратора.
+
+    Для декоратора `async_validate` функция для валидации в настройках может
+    быть асинхронной (см. Settings.validator и Settings.is_concurrent).
+    Декоратор `validate` с асинхронной функцией для валидации поднимет
+    TypeError.
+
+    Внутри блока `with valdec.trusted():` декорированные функции вызываются
+    без валидации (см. модуль context).
+
+    Уровень валидации (полная, поверхностная или без валидации) можно
+    изменять во время работы программы (см. модуль levels).
+
+    Если в настройках is_specialized равен True, то декоратор создает
+    обертку с сигнатурой декорируемой функции (см. модуль wrappers).
+
+    Если в настройках batch_size больше 1, то декоратор `async_validate`
+    объединяет валидацию аргументов конкурентных вызовов (см. модуль
+    batching).
+
+    Значения по умолчанию аргументов валидируются один раз, при
+    декорировании функции (см. utils.validate_defaults).
+
+    Функцию валидатора можно выбирать для каждого поля по его аннотации
+    (см. Settings.routes).
+
+    Если в настройках указан overhead, то стоимость валидации функции
+    ограничивается адаптивно (см. модуль overhead).
+
+    План валидации и настройки декорированной функции доступны в атрибуте
+    `__valdec__` обертки (например, для модуля profile).
+
+    Если в настройках указана функция result_dumps, то декоратор возвращает
+    JSON (bytes) с результатом функции (см. Settings.result_dumps).
 """
 
 import functools
+from typing import Callable
 
-from valdec.data_classes import Settings
+from valdec import levels
+from valdec.batching import Batcher
+from valdec.context import trusted_context
+from valdec.data_classes import Settings, ValidationPlan
+from valdec.overhead import OverheadController, make_controlled_wrapper
 from valdec.validator_pydantic import validator
-from valdec.utils import after, before
+from valdec.utils import (async_validate_arguments, async_validate_result,
+                          check_sync_validators, get_names_from_decorator,
+                          get_routes, get_validation_plan,
+                          validate_arguments, validate_defaults,
+                          validate_result)
+from valdec.wrappers import make_specialized_wrapper
 
 default_settings = Settings(
     validator=validator,
 )
 
 
+def finish_wrapper(
+    wrapper: Callable, plan: ValidationPlan, settings: Settings,
+    is_async: bool,
+) -> Callable:
+    """ Добавляет к обертке декоратора ограничение стоимости валидации
+        (если оно указано в настройках, см. модуль overhead) и атрибут
+        `__valdec__` с планом валидации и настройками.
+    """
+
+    if settings.overhead is not None:
+        plan.controller = OverheadController(
+            levels.get_function_name(plan.func), settings.overhead
+        )
+        wrapper = make_controlled_wrapper(wrapper, plan, settings, is_async)
+
+    wrapper.__valdec__ = (plan, settings)
+
+    return wrapper
+
+
 def validate(
     *names_or_func, exclude: bool = False,
     settings: Settings = default_settings
 ):
 
+    check_sync_validators(settings)
+
     def _decorator(func):
 
+        plan = get_validation_plan(
+            func, get_names_from_decorator(names_or_func), exclude
+        )
+        levels.register(plan)
+        plan.routes = get_routes(
+            plan, settings.routes, settings.validator
+        )
+        validate_defaults(plan, settings)
+        # Функция для вызова: декорируемая функция или её копия с
+        # отвалидированными значениями по умолчанию (см. validate_defaults)
+        target = plan.func
+
+        if settings.is_specialized:
+            return finish_wrapper(
+                functools.wraps(func)(make_specialized_wrapper(
+                    target, plan, settings, is_async=False
+                )),
+                plan, settings, is_async=False,
+            )
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
 
-            args, kwargs = before(
-                func, args, kwargs, names_or_func, exclude, settings,
-            )
+            if trusted_context.get() or plan.level == levels.OFF:
+                result = target(*args, **kwargs)
+            else:
+                args, kwargs = validate_arguments(
+                    plan, args, kwargs, settings
+                )
 
-            result = func(*args, **kwargs)
+                result = target(*args, **kwargs)
 
-            result = after(
-                func, result, names_or_func, exclude, settings
-            )
+                result = validate_result(plan, result, settings)
+
+            if settings.result_dumps is not None:
+                return settings.result_dumps(result)
 
             return result
 
-        return wrapper
+        return finish_wrapper(wrapper, plan, settings, is_async=False)
 
     return _decorator(names_or_func[0]) \
         if names_or_func and callable(names_or_func[0]) else _decorator
@@ -106,22 +195,50 @@ def async_validate(
 
     def _decorator(func):
 
+        plan = get_validation_plan(
+            func, get_names_from_decorator(names_or_func), exclude
+        )
+        levels.register(plan)
+        plan.routes = get_routes(
+            plan, settings.routes, settings.validator
+        )
+        validate_defaults(plan, settings, is_async=True)
+        # См. validate
+        target = plan.func
+
+        if settings.batch_size > 1:
+            plan.batcher = Batcher(
+                settings.batch_size, settings.batch_window, settings
+            )
+
+        if settings.is_specialized:
+            return finish_wrapper(
+                functools.wraps(func)(make_specialized_wrapper(
+                    target, plan, settings, is_async=True
+                )),
+                plan, settings, is_async=True,
+            )
+
         @functools.wraps(func)
         async def wrapper(*args, **kwargs):
 
-            args, kwargs = before(
-                func, args, kwargs, names_or_func, exclude, settings,
-            )
+            if trusted_context.get() or plan.level == levels.OFF:
+                result = await target(*args, **kwargs)
+            else:
+                args, kwargs = await async_validate_arguments(
+                    plan, args, kwargs, settings
+                )
 
-            result = await func(*args, **kwargs)
+                result = await target(*args, **kwargs)
 
-            result = after(
-                func, result, names_or_func, exclude, settings
-            )
+                result = await async_validate_result(plan, result, settings)
+
+            if settings.result_dumps is not None:
+                return settings.result_dumps(result)
 
             return result
 
-        return wrapper
+        return finish_wrapper(wrapper, plan, settings, is_async=True)
 
     return _decorator(names_or_func[0]) \
         if names_or_func and callable(names_or_func[0]) else _decorator
@@ -8,3 +8,11 @@ class ValidationArgumentsError(ValidationError):
 
 class ValidationReturnError(ValidationError):
     pass
+
+
+class JSONParsingError(ValidationError):
+    pass
+
+
+class JSONParsingArgumentsError(ValidationArgumentsError, JSONParsingError):
+    pass
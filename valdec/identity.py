@@ -0,0 +1,434 @@
+""" Валидация общих (повторяющихся по ссылке) вложенных объектов один раз
+    (см. Settings.is_memoized).
+
+    Данные часто содержат один и тот же объект много раз по ссылке
+    (например, словарь пользователя в каждом элементе списка). Обычно
+    функция валидатора валидирует и преобразует каждое вхождение отдельно.
+    Здесь, в пределах одного вызова функции валидатора:
+
+    1. Значения обходятся по аннотациям (List, Tuple, Dict, Optional,
+       поля моделей), и находятся словари, которые встречаются на местах
+       моделей больше одного раза (по id).
+    2. Каждый такой словарь валидируется один раз (вложенные общие
+       словари - раньше тех, что их содержат), и на всех его местах
+       (в копиях контейнеров, исходные значения не изменяются) оказывается
+       один и тот же экземпляр модели. Такие экземпляры функция валидатора
+       не валидирует заново (pydantic делает их поверхностную копию).
+    3. После валидации в результате на места общих объектов возвращаются
+       их экземпляры, поэтому общие объекты остаются общими и в
+       результате.
+
+    Значения обходятся по дереву узлов аннотации (см. Node), которое
+    создается один раз, и в котором нет веток без моделей (например,
+    List[str]).
+
+    Если общих объектов нет, то значения валидируются как обычно (затраты
+    - один обход значений). Если общий объект не прошел валидацию, то
+    значения валидируются как обычно, чтобы сообщение об ошибке было таким
+    же, как без этого режима.
+"""
+
+import collections.abc
+import dataclasses
+import inspect
+import typing
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from valdec.caches import Cache
+from valdec.records import to_records
+
+# Имя поля для валидации общих объектов
+SHARED_NAME = "shared"
+
+# Коллекции, элементы которых обходятся
+SEQUENCE_ORIGINS = (
+    list, tuple,
+    collections.abc.Sequence, collections.abc.MutableSequence,
+    collections.abc.Collection, collections.abc.Iterable,
+)
+
+# Коллекции с ключами и значениями
+MAPPING_ORIGINS = (
+    dict, collections.abc.Mapping, collections.abc.MutableMapping,
+)
+
+# Виды узлов (см. Node)
+MODEL = "model"
+SEQUENCE = "sequence"
+TUPLE = "tuple"
+MAPPING = "mapping"
+
+# Ключ общего объекта - id словаря и класс модели
+Key = Tuple[int, type]
+
+# Узлы аннотаций (см. get_node). Ключ - аннотация и функция is_model.
+_nodes = Cache(maxsize=1024)
+
+
+class Node:
+    """ Узел дерева аннотации, по которому обходятся значения.
+
+        Узлы создаются один раз для каждой аннотации (см. get_node). Для
+        аннотаций, в значениях которых не может быть моделей (например,
+        int или List[str]), узлов нет (None), и такие значения не
+        обходятся.
+
+        :kind:   Вид узла (MODEL, SEQUENCE, TUPLE или MAPPING).
+        :model:  Класс модели (для MODEL).
+        :fields: Кортеж троек (ключ во входящем словаре, имя атрибута,
+                 узел) полей модели, у которых есть узлы (для MODEL).
+        :items:  Узел элементов (для SEQUENCE, для MAPPING - узел
+                 значений) или кортеж узлов элементов (для TUPLE).
+    """
+
+    __slots__ = ("kind", "model", "fields", "items")
+
+    def __init__(self, kind: str, model: Optional[type] = None):
+        self.kind = kind
+        self.model = model
+        self.fields: Tuple[Tuple[str, str, "Node"], ...] = ()
+        self.items: Any = None
+
+
+def get_model_fields(model: type) -> Dict[str, Tuple[str, Any]]:
+    """ Возвращает словарь {ключ во входящем словаре: (имя атрибута,
+        аннотация)} для полей модели pydantic или датакласса.
+    """
+
+    try:
+        hints = typing.get_type_hints(model)
+    except Exception:
+        hints = {}
+
+    if dataclasses.is_dataclass(model):
+        return {
+            field.name: (field.name, hints.get(field.name, field.type))
+            for field in dataclasses.fields(model)
+        }
+
+    return {
+        field.alias: (name, hints.get(name, field.outer_type_))
+        for name, field in getattr(model, "__fields__", {}).items()
+    }
+
+
+def unwrap(annotation: Any) -> Any:
+    """ Возвращает аннотацию без Optional."""
+
+    if getattr(annotation, "__origin__", None) is Union:
+        args = [arg for arg in annotation.__args__ if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+
+    return annotation
+
+
+def create_node(
+    annotation: Any, is_model: Callable[[type], bool],
+    building: Dict[type, Node],
+) -> Optional[Node]:
+    """ Создает узел аннотации (или возвращает None, см. Node).
+
+        В словаре building - узлы моделей, которые сейчас создаются (для
+        моделей, которые ссылаются сами на себя).
+    """
+
+    annotation = unwrap(annotation)
+
+    if inspect.isclass(annotation):
+        if not is_model(annotation):
+            return None
+        if annotation in building:
+            return building[annotation]
+        node = building[annotation] = Node(MODEL, annotation)
+        fields = []
+        for key, (name, field_annotation) in get_model_fields(
+            annotation
+        ).items():
+            field_node = create_node(field_annotation, is_model, building)
+            if field_node is not None:
+                fields.append((key, name, field_node))
+        node.fields = tuple(fields)
+        return node
+
+    origin = getattr(annotation, "__origin__", None)
+    args = getattr(annotation, "__args__", None) or ()
+
+    if origin is tuple and args and \
+            not (len(args) == 2 and args[1] is Ellipsis):
+        items = tuple(create_node(arg, is_model, building) for arg in args)
+        if not any(items):
+            return None
+        node = Node(TUPLE)
+        node.items = items
+        return node
+
+    if origin in SEQUENCE_ORIGINS and args:
+        kind, item_annotation = SEQUENCE, args[0]
+    elif origin in MAPPING_ORIGINS and len(args) == 2:
+        kind, item_annotation = MAPPING, args[1]
+    else:
+        return None
+
+    items = create_node(item_annotation, is_model, building)
+    if items is None:
+        return None
+
+    node = Node(kind)
+    node.items = items
+
+    return node
+
+
+def get_node(
+    annotation: Any, is_model: Callable[[type], bool]
+) -> Optional[Node]:
+    """ Возвращает узел аннотации (создается один раз)."""
+
+    return _nodes.get(
+        (annotation, is_model), create_node, annotation, is_model, {}
+    )
+
+
+def get_children(node: Node, value: Any) -> List[Tuple[Any, Node, Any]]:
+    """ Возвращает список троек (ключ или индекс, узел, значение) для
+        вложенных значений, которые нужно обойти.
+    """
+
+    kind = node.kind
+    value_type = type(value)
+
+    if kind is MODEL:
+        if value_type is not dict:
+            return []
+        return [
+            (key, field_node, value[key])
+            for key, _, field_node in node.fields if key in value
+        ]
+
+    if kind is MAPPING:
+        if value_type is not dict:
+            return []
+        items = node.items
+        return [(key, items, item) for key, item in value.items()]
+
+    if value_type is not list and value_type is not tuple:
+        return []
+
+    if kind is SEQUENCE:
+        items = node.items
+        return [(index, items, item) for index, item in enumerate(value)]
+
+    return [
+        (index, item_node, item)
+        for index, (item_node, item) in enumerate(zip(node.items, value))
+        if item_node is not None
+    ]
+
+
+def find_shared(
+    nodes: Dict[str, Node], values: Dict[str, Any]
+) -> List[Tuple[Key, Node, Any]]:
+    """ Возвращает список троек (ключ, узел модели, словарь) для словарей,
+        которые встречаются на местах моделей больше одного раза. Вложенные
+        словари в списке раньше тех, что их содержат.
+    """
+
+    counts: Dict[Key, int] = {}
+    order: List[Tuple[Key, Node, Any]] = []
+
+    def visit(node: Node, value: Any):
+
+        key = None
+        if node.kind is MODEL:
+            if type(value) is not dict:
+                return
+            key = (id(value), node.model)
+            if key in counts:
+                counts[key] += 1
+                return
+            counts[key] = 1
+
+        for _, child_node, child in get_children(node, value):
+            visit(child_node, child)
+
+        if key is not None:
+            order.append((key, node, value))
+
+    for name, node in nodes.items():
+        visit(node, values[name])
+
+    return [item for item in order if counts[item[0]] > 1]
+
+
+def substitute(
+    node: Node, value: Any, instances: Dict[Key, Any], changed: set,
+) -> Any:
+    """ Возвращает значение, в котором общие словари заменены их
+        экземплярами. Контейнеры копируются, только если в них что-то
+        заменено (id копий добавляются в `changed`).
+    """
+
+    if node.kind is MODEL and type(value) is dict:
+        instance = instances.get((id(value), node.model))
+        if instance is not None:
+            return instance
+
+    replaced = None
+    for index, child_node, child in get_children(node, value):
+        new_child = substitute(child_node, child, instances, changed)
+        if new_child is not child:
+            if replaced is None:
+                replaced = {}
+            replaced[index] = new_child
+
+    if replaced is None:
+        return value
+
+    if type(value) is tuple:
+        value = tuple(replaced.get(i, item) for i, item in enumerate(value))
+    else:
+        value = value.copy()
+        for index, item in replaced.items():
+            value[index] = item
+
+    changed.add(id(value))
+
+    return value
+
+
+def restore(
+    node: Node, source: Any, output: Any, canonical: Dict[int, Any],
+    changed: set,
+) -> Any:
+    """ Возвращает результат валидации, в котором на местах экземпляров
+        общих объектов (в source, см. substitute) снова стоят эти
+        экземпляры (функция валидатора могла их скопировать).
+
+        Обходятся только контейнеры, которые изменил substitute. Списки,
+        словари и экземпляры моделей результата (созданные функцией
+        валидатора) изменяются на месте, кортежи пересоздаются.
+    """
+
+    source_id = id(source)
+
+    if source_id in canonical:
+        return canonical[source_id]
+
+    if source_id not in changed:
+        return output
+
+    if node.kind is MODEL:
+        if not isinstance(output, node.model):
+            return output
+        names = {key: name for key, name, _ in node.fields}
+        for key, child_node, child in get_children(node, source):
+            name = names[key]
+            item = getattr(output, name, None)
+            new_item = restore(child_node, child, item, canonical, changed)
+            if new_item is not item:
+                object.__setattr__(output, name, new_item)
+        return output
+
+    if type(output) not in (list, tuple, dict) or \
+            len(output) != len(source):
+        return output
+
+    replaced = {}
+    for index, child_node, child in get_children(node, source):
+        item = output[index]
+        new_item = restore(child_node, child, item, canonical, changed)
+        if new_item is not item:
+            replaced[index] = new_item
+
+    if not replaced:
+        return output
+
+    if type(output) is tuple:
+        return tuple(replaced.get(i, item) for i, item in enumerate(output))
+
+    for index, item in replaced.items():
+        output[index] = item
+
+    return output
+
+
+def validate_memoized(
+    validator: Callable, annotations: Dict[str, Any], values: Dict[str, Any],
+    is_replace: bool, extra: dict, is_model: Callable[[type], bool],
+) -> Optional[Dict[str, Any]]:
+    """ Валидирует значения функцией валидатора бэкенда так, что общие
+        вложенные объекты валидируются один раз (см. описание модуля).
+
+        В `extra` для функции валидатора нет ключа is_memoized (и
+        is_compact: компактные записи создаются здесь, с сохранением общих
+        объектов).
+    """
+
+    inner_extra = {
+        key: value for key, value in extra.items()
+        if key not in ("is_memoized", "is_compact")
+    }
+    is_compact = extra.get("is_compact")
+
+    nodes = {}
+    for name in values:
+        node = get_node(annotations[name], is_model)
+        if node is not None:
+            nodes[name] = node
+
+    shared = find_shared(nodes, values) if nodes else None
+    if not shared:
+        result = validator(annotations, values, is_replace, inner_extra)
+        return to_records(result) if result and is_compact else result
+
+    instances: Dict[Key, Any] = {}
+    canonical: Dict[int, Any] = {}
+    changed: set = set()
+
+    try:
+        for key, node, value in shared:
+            prepared = substitute(node, value, instances, changed)
+            result = validator(
+                {SHARED_NAME: node.model}, {SHARED_NAME: prepared}, True,
+                inner_extra,
+            )
+            if not result:
+                continue
+            instance = restore(
+                node, prepared, result[SHARED_NAME], canonical, changed
+            )
+            instances[key] = instance
+            canonical[id(instance)] = instance
+    except Exception:
+        # Ошибка будет в обычной валидации (с полным путем к значению)
+        result = validator(annotations, values, is_replace, inner_extra)
+        return to_records(result) if result and is_compact else result
+
+    prepared_values = {
+        name: substitute(nodes[name], value, instances, changed)
+        if name in nodes else value
+        for name, value in values.items()
+    }
+
+    result = validator(annotations, prepared_values, is_replace, inner_extra)
+    if not is_replace:
+        return None
+
+    result = dict(result or {})
+    for name, value in prepared_values.items():
+        if name in result:
+            if name in nodes:
+                result[name] = restore(
+                    nodes[name], value, result[name], canonical, changed
+                )
+        elif value is not values[name]:
+            # Функция валидатора не заменила значение (например,
+            # ValidatedDC), но в нем есть экземпляры общих объектов
+            result[name] = value
+
+    if result and is_compact:
+        # Общие экземпляры заменяются общими записями
+        result = to_records(result, {})
+
+    return result or None
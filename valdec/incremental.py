@@ -0,0 +1,233 @@
+""" Повторная валидация только измененных полей экземпляров (см.
+    Settings.is_incremental).
+
+    Экземпляры моделей, которые функция валидатора создала при замене
+    значений (в том числе вложенные), отслеживаются (см. markers.track):
+    запоминается, каким полям присвоены значения после валидации.
+
+    Когда отслеживаемый экземпляр снова передается на валидацию (например,
+    объект состояния, который передается от одной декорированной функции к
+    другой), он не валидируется заново целиком:
+    1. Валидируются только поля, которым были присвоены значения (у
+       экземпляров pydantic.BaseModel выполняются и валидаторы всей
+       модели, root_validator). Значения после валидации заменяются на
+       месте, и в них начинается отслеживание. Экземпляр остается тем же
+       объектом (не копируется).
+    2. Вложенные экземпляры обходятся по дереву узлов аннотации (см.
+       identity.Node), без веток, в которых нет моделей, и у них так же
+       валидируются только измененные поля. Если на месте модели
+       оказалось что-то другое (например, словарь), то поле валидируется
+       целиком.
+    3. Экземпляры pydantic.BaseModel входят в группы экземпляров, в которые
+       они вложены (см. markers.TrackingGroup), поэтому вложенные
+       экземпляры обходятся, только если какой-то из них изменен. Для
+       датаклассов (ValidatedDC) вложенные экземпляры обходятся всегда (но
+       валидируются только измененные поля).
+
+    Изменения коллекций на месте (например, append в список) не
+    отслеживаются: чтобы поле было проверено, ему нужно присвоить новое
+    значение.
+"""
+
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from valdec.errors import ValidationError
+from valdec.identity import (MAPPING, MODEL, SEQUENCE, TUPLE, Node,
+                             get_children, get_node)
+from valdec.markers import (TrackedFieldsSet, TrackingGroup, get_child_groups,
+                            get_dirty, get_group, track)
+
+# Функция, которая валидирует значения полей экземпляра модели и
+# возвращает словарь {имя поля: значение для замены}
+FieldsValidator = Callable[[Any, Set[str]], Dict[str, Any]]
+
+Groups = Tuple[TrackingGroup, ...]
+
+
+def track_value(node: Node, value: Any, groups: Groups = ()):
+    """ Начинает отслеживать экземпляры моделей в значении (в том числе
+        вложенные) и добавляет их в группы `groups`.
+    """
+
+    if node.kind is MODEL:
+        if not isinstance(value, node.model) or not track(value, groups):
+            return
+        if node.fields:
+            if get_group(value) is not None:
+                groups = get_child_groups(value)
+            for _, name, field_node in node.fields:
+                track_value(field_node, getattr(value, name, None), groups)
+        return
+
+    if type(value) in (list, tuple, dict):
+        for _, item_node, item in get_children(node, value):
+            track_value(item_node, item, groups)
+
+
+def revalidate_value(
+    node: Node, value: Any, validate_fields: FieldsValidator
+) -> bool:
+    """ Валидирует измененные поля отслеживаемых экземпляров в значении.
+
+        Возвращает False, если значение нужно валидировать целиком (в нем
+        есть не отслеживаемые экземпляры или значения других типов на
+        местах моделей).
+    """
+
+    if node.kind is MODEL:
+        return isinstance(value, node.model) and \
+            revalidate(node, value, validate_fields)
+
+    value_type = type(value)
+    if node.kind is MAPPING:
+        if value_type is not dict:
+            return False
+    elif value_type is not list and value_type is not tuple:
+        return False
+
+    if node.kind is TUPLE and len(value) != len(node.items):
+        return False
+
+    if node.kind is SEQUENCE and node.items.kind is MODEL:
+        return revalidate_items(node.items, value, validate_fields)
+
+    is_valid = True
+    for index, item_node, item in get_children(node, value):
+        try:
+            if not revalidate_value(item_node, item, validate_fields):
+                is_valid = False
+        except ValidationError as error:
+            raise ValidationError(f"{index} -> {error}") from None
+
+    return is_valid
+
+
+def revalidate_items(
+    node: Node, items: Any, validate_fields: FieldsValidator
+) -> bool:
+    """ Версия revalidate_value для списков экземпляров модели `node`.
+
+        Неизмененные экземпляры pydantic.BaseModel без вложенных моделей
+        пропускаются без вызова revalidate (это самый частый случай в
+        больших списках).
+    """
+
+    model = node.model
+    has_fields = bool(node.fields)
+    is_valid = True
+
+    for index, item in enumerate(items):
+
+        if not isinstance(item, model):
+            is_valid = False
+            continue
+
+        if not has_fields:
+            fields_set = getattr(item, "__fields_set__", None)
+            if type(fields_set) is TrackedFieldsSet and not fields_set.dirty:
+                continue
+
+        try:
+            if not revalidate(node, item, validate_fields):
+                is_valid = False
+        except ValidationError as error:
+            raise ValidationError(f"{index} -> {error}") from None
+
+    return is_valid
+
+
+def revalidate(
+    node: Node, instance: Any, validate_fields: FieldsValidator
+) -> bool:
+    """ Валидирует измененные поля отслеживаемого экземпляра модели и
+        вложенных в него экземпляров.
+
+        Возвращает False, если экземпляр не отслеживается.
+    """
+
+    dirty = get_dirty(instance)
+    if dirty is None:
+        return False
+
+    names = set(dirty)
+    group = get_group(instance) if node.fields else None
+
+    if node.fields and (group is None or group.dirty):
+        # Вложенные экземпляры проверяются и в измененных полях: функция
+        # валидатора может принять их без валидации (например, pydantic
+        # их только копирует)
+        for _, name, field_node in node.fields:
+            try:
+                if not revalidate_value(
+                    field_node, getattr(instance, name, None),
+                    validate_fields,
+                ):
+                    names.add(name)
+            except ValidationError as error:
+                raise ValidationError(f"{name} -> {error}") from None
+        if group is not None:
+            group.dirty = False
+
+    if names:
+        for name, value in validate_fields(instance, names).items():
+            object.__setattr__(instance, name, value)
+        groups = get_child_groups(instance)
+        for _, name, field_node in node.fields:
+            if name in names:
+                track_value(field_node, getattr(instance, name, None), groups)
+        track(instance)
+
+    return True
+
+
+def validate_incremental(
+    validator: Callable, annotations: Dict[str, Any], values: Dict[str, Any],
+    is_replace: bool, extra: dict, is_model: Callable[[type], bool],
+    validate_fields: FieldsValidator,
+) -> Optional[Dict[str, Any]]:
+    """ Валидирует значения функцией валидатора бэкенда так, что у
+        отслеживаемых экземпляров валидируются только измененные поля (см.
+        описание модуля), а экземпляры моделей в значениях для замены
+        начинают отслеживаться.
+
+        В `extra` для функции валидатора нет ключа is_incremental.
+    """
+
+    inner_extra = {
+        key: value for key, value in extra.items()
+        if key != "is_incremental"
+    }
+
+    rest = values
+    for name, value in values.items():
+
+        node = get_node(annotations[name], is_model)
+        if node is None or node.kind is not MODEL or \
+                not isinstance(value, node.model):
+            continue
+
+        try:
+            is_tracked = revalidate(node, value, validate_fields)
+        except ValidationError as error:
+            raise ValidationError(f"{name} -> {error}") from None
+
+        if is_tracked:
+            if rest is values:
+                rest = dict(values)
+            del rest[name]
+
+    if not rest:
+        return None
+
+    if rest is not values:
+        annotations = {name: annotations[name] for name in rest}
+
+    result = validator(annotations, rest, is_replace, inner_extra)
+
+    if result:
+        for name, value in result.items():
+            node = get_node(annotations[name], is_model)
+            if node is not None:
+                track_value(node, value)
+
+    return result
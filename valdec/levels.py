@@ -0,0 +1,206 @@
+""" Уровни валидации декорированных функций.
+
+    1. `FULL` ("full"): полная валидация (по умолчанию).
+    2. `SHALLOW` ("shallow"): проверяются только типы значений верхнего
+       уровня (через isinstance), вложенные модели и элементы коллекций не
+       проверяются, значения не заменяются.
+    3. `OFF` ("off"): функция вызывается без валидации.
+
+    Уровень можно установить для отдельной функции, для модулей (по шаблону
+    имени модуля) и глобально. Приоритет: функция, затем модуль (если имя
+    модуля подходит к нескольким шаблонам, то действует последний
+    установленный), затем глобальный уровень.
+
+    Функция указывается ссылкой на нее (можно на декорированную) или
+    строкой "имя.модуля:имя_функции" (для методов - "модуль:Класс.метод").
+
+    Уровни можно изменять во время работы программы, без повторного
+    декорирования. Уровень каждой декорированной функции вычисляется
+    заранее (при декорировании и при каждом изменении уровней), поэтому его
+    проверка при вызове функции ничего не стоит.
+
+    Начальные уровни можно задать переменной окружения VALDEC_LEVELS,
+    например:
+    ```
+    VALDEC_LEVELS="shallow,myapp.handlers.*=full,myapp.jobs:run=off"
+    ```
+    Элемент без "=" - глобальный уровень, элемент с ":" в имени - уровень
+    функции, остальные - уровни модулей.
+"""
+
+import logging
+import os
+import threading
+import weakref
+from fnmatch import fnmatchcase
+from typing import Any, Callable, Dict, Optional, Union
+
+FULL = "full"
+SHALLOW = "shallow"
+OFF = "off"
+
+LEVELS = (FULL, SHALLOW, OFF)
+
+ENV_VARIABLE = "VALDEC_LEVELS"
+
+logger = logging.getLogger()
+
+_lock = threading.RLock()
+_global_level = FULL
+_module_levels: Dict[str, str] = {}
+_function_levels: Dict[str, str] = {}
+
+# Планы валидации декорированных функций (см. ValidationPlan.level)
+_plans: "weakref.WeakSet[Any]" = weakref.WeakSet()
+
+
+def check_level(level: str) -> str:
+    """ Возвращает уровень, если он правильный. Иначе поднимает ValueError.
+    """
+
+    if level not in LEVELS:
+        raise ValueError(f"Unknown validation level {level!r}, use {LEVELS}")
+
+    return LEVELS[LEVELS.index(level)]
+
+
+def get_function_name(func: Union[Callable, str]) -> str:
+    """ Возвращает имя функции в виде "имя.модуля:имя_функции"."""
+
+    if isinstance(func, str):
+        return func
+
+    return f"{func.__module__}:{func.__qualname__}"
+
+
+def resolve_level(func: Callable) -> str:
+    """ Возвращает действующий уровень валидации для функции."""
+
+    level = _function_levels.get(get_function_name(func))
+    if level is not None:
+        return level
+
+    module = func.__module__ or ""
+    for pattern, level in reversed(list(_module_levels.items())):
+        if fnmatchcase(module, pattern):
+            return level
+
+    return _global_level
+
+
+def update_plans():
+    """ Обновляет уровни валидации во всех планах."""
+
+    with _lock:
+        for plan in list(_plans):
+            plan.level = resolve_level(plan.func)
+
+
+def register(plan: Any):
+    """ Регистрирует план валидации декорированной функции и устанавливает
+        в нем действующий уровень валидации.
+    """
+
+    with _lock:
+        plan.level = resolve_level(plan.func)
+        _plans.add(plan)
+
+
+def get_level(func: Callable) -> str:
+    """ Возвращает действующий уровень валидации для функции."""
+
+    with _lock:
+        return resolve_level(func)
+
+
+def set_global_level(level: str):
+    """ Устанавливает глобальный уровень валидации."""
+
+    global _global_level
+
+    with _lock:
+        _global_level = check_level(level)
+        update_plans()
+
+
+def set_module_level(pattern: str, level: Optional[str]):
+    """ Устанавливает уровень валидации для модулей, имена которых
+        подходят к шаблону `pattern` (см. fnmatch).
+        Если level равен None, то уровень для шаблона удаляется.
+    """
+
+    with _lock:
+        _module_levels.pop(pattern, None)
+        if level is not None:
+            _module_levels[pattern] = check_level(level)
+        update_plans()
+
+
+def set_function_level(func: Union[Callable, str], level: Optional[str]):
+    """ Устанавливает уровень валидации для функции.
+        Если level равен None, то уровень для функции удаляется.
+    """
+
+    name = get_function_name(func)
+
+    with _lock:
+        _function_levels.pop(name, None)
+        if level is not None:
+            _function_levels[name] = check_level(level)
+        update_plans()
+
+
+def reset_levels():
+    """ Удаляет все установленные уровни (глобальный уровень становится
+        FULL).
+    """
+
+    global _global_level
+
+    with _lock:
+        _global_level = FULL
+        _module_levels.clear()
+        _function_levels.clear()
+        update_plans()
+
+
+def load_levels(value: Optional[str] = None):
+    """ Устанавливает уровни из строки в формате переменной окружения
+        VALDEC_LEVELS (если value равен None, то берется значение этой
+        переменной). Неправильные элементы пропускаются с предупреждением
+        в лог.
+    """
+
+    global _global_level
+
+    if value is None:
+        value = os.environ.get(ENV_VARIABLE, "")
+
+    with _lock:
+        for item in value.split(","):
+            item = item.strip()
+            if not item:
+                continue
+
+            name, separator, level = item.rpartition("=")
+            level = level.strip()
+            name = name.strip()
+
+            if level not in LEVELS or (separator and not name):
+                logger.warning(f"{ENV_VARIABLE}: wrong item {item!r}")
+                continue
+
+            level = check_level(level)
+
+            if not separator:
+                _global_level = level
+            elif ":" in name:
+                _function_levels[name] = level
+            else:
+                _module_levels.pop(name, None)
+                _module_levels[name] = level
+
+        update_plans()
+
+
+load_levels()
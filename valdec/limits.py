@@ -0,0 +1,147 @@
+""" Ограничения размера входящих значений (см. Settings.limits).
+
+    Перед передачей значений аргументов в функцию валидатора значения
+    проверяются одним обходом (без рекурсии, поэтому глубокая вложенность
+    не приводит к RecursionError):
+    1. max_depth: глубина вложенности коллекций (у списка чисел - 1, у
+       списка списков - 2).
+    2. max_items: общее количество элементов во всех коллекциях значения
+       (элементы словаря - его пары ключ-значение).
+    3. max_length: длина каждой строки и bytes (в том числе ключей
+       словарей).
+    4. max_keys: количество ключей каждого словаря.
+
+    Обход останавливается на первом превышении, а размер коллекции
+    проверяется до обхода ее элементов, поэтому слишком большие значения
+    отклоняются без их полного обхода. Коллекция, которая встречается в
+    значении несколько раз по ссылке, учитывается при каждом вхождении
+    (валидатор тоже обходит ее каждый раз), а коллекция, которая содержит
+    саму себя (через любое количество уровней), при повторном вхождении в
+    себя не обходится. Если max_items не задан, то общая коллекция
+    повторно обходится, только если встретилась глубже, чем раньше.
+    Обходятся только словари, списки, кортежи и множества (и их
+    наследники), остальные объекты (например, экземпляры моделей) не
+    обходятся.
+"""
+
+import sys
+from typing import Any, Dict, Optional
+
+from valdec.data_classes import Limits
+from valdec.errors import ValidationArgumentsError
+
+# Типы значений, которые не нужно проверять
+SCALAR_TYPES = frozenset((int, float, bool, type(None)))
+
+# Строковые типы
+STRING_TYPES = (str, bytes, bytearray)
+
+# Коллекции, элементы которых обходятся
+ITEMS_TYPES = (list, tuple, set, frozenset)
+
+NO_LIMIT = sys.maxsize
+
+# Метка в стеке обхода: выход из коллекции (после обхода ее элементов)
+EXIT = object()
+
+
+def get_limit(limit: Optional[int]) -> int:
+    """ Возвращает значение ограничения (NO_LIMIT, если оно не задано).
+    """
+
+    return NO_LIMIT if limit is None else limit
+
+
+def get_limits_error(limits: Limits, value: Any) -> Optional[str]:
+    """ Возвращает описание первого превышения ограничений в значении,
+        иначе None.
+    """
+
+    max_depth = get_limit(limits.max_depth)
+    max_items = get_limit(limits.max_items)
+    max_length = get_limit(limits.max_length)
+    max_keys = get_limit(limits.max_keys)
+
+    count = 0
+    # id коллекций на пути от значения до текущей коллекции (для остановки
+    # на циклических ссылках)
+    path = set()
+    # Наименьшая глубина, на которой встретилась каждая коллекция (если
+    # количество элементов не ограничено, то общие коллекции на той же или
+    # меньшей глубине повторно не обходятся)
+    depths: Optional[Dict[int, int]] = {} if max_items == NO_LIMIT else None
+    stack = [(value, 1)]
+    pop = stack.pop
+    push = stack.append
+
+    while stack:
+        value, depth = pop()
+
+        if value is EXIT:
+            # Вместо глубины - id коллекции, обход которой закончен
+            path.discard(depth)
+            continue
+
+        if isinstance(value, STRING_TYPES):
+            if len(value) > max_length:
+                return f"length {len(value)} exceeds max_length={max_length}"
+            continue
+
+        if isinstance(value, dict):
+            size = len(value)
+            if size > max_keys:
+                return f"{size} keys exceed max_keys={max_keys}"
+            items = value.items()
+        elif isinstance(value, ITEMS_TYPES):
+            size = len(value)
+            items = None
+        else:
+            continue
+
+        value_id = id(value)
+        if value_id in path:
+            continue
+        if depths is not None:
+            if depths.get(value_id, NO_LIMIT) <= depth:
+                continue
+            depths[value_id] = depth
+
+        if depth > max_depth:
+            return f"nesting depth exceeds max_depth={max_depth}"
+
+        count += size
+        if count > max_items:
+            return f"more than {max_items} items (max_items={max_items})"
+
+        depth += 1
+        path.add(value_id)
+        push((EXIT, value_id))
+
+        if items is None:
+            for item in value:
+                if type(item) not in SCALAR_TYPES:
+                    push((item, depth))
+            continue
+
+        for key, item in items:
+            if type(key) not in SCALAR_TYPES:
+                push((key, depth))
+            if type(item) not in SCALAR_TYPES:
+                push((item, depth))
+
+    return None
+
+
+def check_limits(limits: Limits, values: Dict[str, Any]):
+    """ Проверяет значения аргументов и поднимает ValidationArgumentsError,
+        если значение превышает ограничения.
+    """
+
+    for name, value in values.items():
+        if type(value) in SCALAR_TYPES:
+            continue
+        error = get_limits_error(limits, value)
+        if error is not None:
+            raise ValidationArgumentsError(
+                f"Validation error <limits>: {name}: {error}."
+            )
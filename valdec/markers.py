@@ -0,0 +1,217 @@
+""" Пометка экземпляров, которые valdec создал при замене значений
+    (см. Settings.is_trust_instances).
+
+    Экземпляры наследников pydantic.BaseModel помечаются заменой множества
+    `__fields_set__` на его наследника MarkedFieldsSet (у таких экземпляров
+    нет __weakref__, а добавить атрибут нельзя).
+    Остальные экземпляры (например, ValidatedDC) запоминаются в словаре со
+    слабыми ссылками.
+
+    Экземпляры также можно отслеживать (см. track и Settings.is_incremental):
+    для них можно узнать, каким полям были присвоены значения после
+    валидации (см. get_dirty). Отслеживаемые экземпляры pydantic.BaseModel,
+    кроме того, входят в группы (см. TrackingGroup) экземпляров, в которые
+    они вложены, поэтому об изменениях вложенных экземпляров можно узнать
+    без их обхода.
+"""
+
+import dataclasses
+import weakref
+from typing import Any, Dict, Optional, Set, Tuple
+
+_marked: "weakref.WeakValueDictionary[int, Any]" = \
+    weakref.WeakValueDictionary()
+
+# Ключ в __dict__ отслеживаемого экземпляра датакласса, по которому
+# хранятся значения его полей после валидации
+VALUES_KEY = "_values__valdec"
+
+# Имена полей датаклассов
+_field_names: Dict[type, Tuple[str, ...]] = {}
+
+
+class MarkedFieldsSet(set):
+    """ Множество `__fields_set__` экземпляра pydantic.BaseModel, который
+        был создан valdec.
+    """
+
+    __slots__ = ()
+
+
+class TrackingGroup:
+    """ Группа отслеживаемых экземпляров, вложенных в один экземпляр (см.
+        get_group).
+
+        :dirty: True, если после валидации полю какого-то экземпляра группы
+                было присвоено значение.
+    """
+
+    __slots__ = ("dirty", )
+
+    def __init__(self):
+        self.dirty = False
+
+
+class TrackedFieldsSet(MarkedFieldsSet):
+    """ Множество `__fields_set__` отслеживаемого экземпляра
+        pydantic.BaseModel (см. track).
+
+        При присваивании значения полю pydantic добавляет имя поля в
+        `__fields_set__`: оно запоминается в множестве `dirty`, а все группы
+        экземпляра помечаются как измененные.
+
+        :dirty:  Множество имен полей, которым присвоены значения.
+        :groups: Кортеж групп экземпляров, в которые вложен экземпляр.
+        :group:  Группа экземпляров, вложенных в экземпляр (или None).
+    """
+
+    __slots__ = ("dirty", "groups", "group")
+
+    def __init__(self, *args: Any):
+        super().__init__(*args)
+        self.dirty: Set[str] = set()
+        self.groups: Tuple[TrackingGroup, ...] = ()
+        self.group: Optional[TrackingGroup] = None
+
+    def add(self, name: str):
+        set.add(self, name)
+        self.dirty.add(name)
+        for group in self.groups:
+            group.dirty = True
+
+
+def mark(instance: Any) -> bool:
+    """ Помечает экземпляр как созданный valdec.
+
+        Возвращает False, если экземпляр пометить нельзя.
+    """
+
+    fields_set = getattr(instance, "__fields_set__", None)
+    if isinstance(fields_set, set):
+        if not isinstance(fields_set, MarkedFieldsSet):
+            object.__setattr__(
+                instance, "__fields_set__", MarkedFieldsSet(fields_set)
+            )
+        return True
+
+    try:
+        _marked[id(instance)] = instance
+    except TypeError:
+        return False
+
+    return True
+
+
+def is_marked(instance: Any) -> bool:
+    """ Возвращает True, если экземпляр был создан (и помечен) valdec."""
+
+    fields_set = getattr(instance, "__fields_set__", None)
+    if fields_set is not None:
+        return isinstance(fields_set, MarkedFieldsSet)
+
+    return _marked.get(id(instance)) is instance
+
+
+def get_field_names(cls: type) -> Tuple[str, ...]:
+    """ Возвращает имена полей датакласса."""
+
+    try:
+        return _field_names[cls]
+    except KeyError:
+        names = _field_names[cls] = tuple(
+            field.name for field in dataclasses.fields(cls)
+        )
+        return names
+
+
+def track(
+    instance: Any, groups: Tuple[TrackingGroup, ...] = ()
+) -> bool:
+    """ Начинает (или начинает заново) отслеживать присваивания значений
+        полям экземпляра.
+
+        Экземпляры pydantic.BaseModel получают `__fields_set__` типа
+        TrackedFieldsSet и добавляются в группы `groups`. Для экземпляров
+        датаклассов (например, ValidatedDC) в их __dict__ запоминаются
+        текущие значения полей, а группы не используются.
+
+        Возвращает False, если экземпляр отслеживать нельзя.
+    """
+
+    fields_set = getattr(instance, "__fields_set__", None)
+    if isinstance(fields_set, set):
+        if type(fields_set) is TrackedFieldsSet:
+            fields_set.dirty.clear()
+        else:
+            fields_set = TrackedFieldsSet(fields_set)
+            object.__setattr__(instance, "__fields_set__", fields_set)
+        for group in groups:
+            if group not in fields_set.groups:
+                fields_set.groups += (group, )
+        return True
+
+    cls = type(instance)
+    instance_dict = getattr(instance, "__dict__", None)
+    if instance_dict is None or not dataclasses.is_dataclass(cls):
+        return False
+
+    instance_dict[VALUES_KEY] = tuple(
+        getattr(instance, name) for name in get_field_names(cls)
+    )
+
+    return True
+
+
+def get_dirty(instance: Any) -> Optional[Set[str]]:
+    """ Возвращает множество имен полей, которым были присвоены значения
+        после начала отслеживания (см. track), или None, если экземпляр не
+        отслеживается.
+
+        Для датаклассов измененными считаются поля, значения которых - не
+        те же объекты, что были при начале отслеживания.
+    """
+
+    fields_set = getattr(instance, "__fields_set__", None)
+    if fields_set is not None:
+        if type(fields_set) is TrackedFieldsSet:
+            return fields_set.dirty
+        return None
+
+    values = getattr(instance, "__dict__", {}).get(VALUES_KEY)
+    if values is None:
+        return None
+
+    return {
+        name
+        for name, value in zip(get_field_names(type(instance)), values)
+        if getattr(instance, name) is not value
+    }
+
+
+def get_group(instance: Any) -> Optional[TrackingGroup]:
+    """ Возвращает группу экземпляров, вложенных в отслеживаемый экземпляр
+        pydantic.BaseModel (создается один раз), или None для остальных
+        экземпляров.
+    """
+
+    fields_set = getattr(instance, "__fields_set__", None)
+    if type(fields_set) is not TrackedFieldsSet:
+        return None
+
+    if fields_set.group is None:
+        fields_set.group = TrackingGroup()
+
+    return fields_set.group
+
+
+def get_child_groups(instance: Any) -> Tuple[TrackingGroup, ...]:
+    """ Возвращает кортеж групп, в которые нужно добавить экземпляры,
+        вложенные в отслеживаемый экземпляр: группы самого экземпляра и его
+        группа (см. get_group).
+    """
+
+    group = get_group(instance)
+    if group is None:
+        return ()
+
+    return instance.__fields_set__.groups + (group, )
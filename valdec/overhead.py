@@ -0,0 +1,258 @@
+""" Адаптивное ограничение стоимости валидации (см. Settings.overhead).
+
+    Обертка декоратора измеряет время валидации и время выполнения функции
+    при каждом полностью отвалидированном вызове, а контроллер
+    (OverheadController) хранит скользящее среднее их отношения:
+
+    1. Режим FULL: все вызовы валидируются полностью. Если отношение больше
+       Overhead.budget, то функция переходит в режим Overhead.mode.
+    2. Режим SAMPLED: полностью валидируется один вызов из
+       Overhead.sample_every, остальные вызываются без валидации.
+    3. Режим SHALLOW: полностью валидируется один вызов из
+       Overhead.sample_every, остальные проверяются поверхностно (см.
+       levels.SHALLOW).
+
+    В режимах SAMPLED и SHALLOW отношение измеряется по полностью
+    отвалидированным вызовам, и когда оно станет меньше
+    budget * Overhead.restore_ratio, функция возвращается в режим FULL.
+
+    Каждая смена режима записывается в лог (WARNING), передается в
+    Overhead.on_change, а текущие режимы и отношения всех функций можно
+    получить через get_stats (например, для метрик).
+
+    Контроллер работает только если действующий уровень функции - FULL
+    (см. модуль levels): при уровнях SHALLOW и OFF, а также внутри
+    `with valdec.trusted()` функция вызывается обычной оберткой.
+"""
+
+import functools
+import logging
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict
+
+from valdec import levels
+from valdec.context import trusted_context
+from valdec.data_classes import Overhead, Settings, ValidationPlan
+from valdec.utils import (async_validate_arguments, async_validate_result,
+                          check_shallow, get_values, validate_arguments,
+                          validate_result)
+
+FULL = "full"
+SAMPLED = "sampled"
+SHALLOW = "shallow"
+
+MODES = (SAMPLED, SHALLOW)
+
+logger = logging.getLogger()
+
+# Контроллеры всех декорированных функций (см. get_stats)
+_controllers: "weakref.WeakSet[OverheadController]" = weakref.WeakSet()
+
+
+class OverheadController:
+    """ Контроллер стоимости валидации одной декорированной функции.
+
+        :name:        Имя функции ("имя.модуля:имя_функции").
+        :overhead:    Настройки (см. Overhead).
+        :mode:        Текущий режим (FULL, SAMPLED или SHALLOW).
+        :ratio:       Скользящее среднее отношения времени валидации ко
+                      времени выполнения функции (или None).
+        :samples:     Количество измерений.
+        :transitions: Количество смен режима.
+    """
+
+    __slots__ = (
+        "name", "overhead", "mode", "ratio", "samples", "transitions",
+        "_counter", "_lock", "__weakref__",
+    )
+
+    def __init__(self, name: str, overhead: Overhead):
+
+        if overhead.mode not in MODES:
+            raise ValueError(
+                f"Unknown overhead mode {overhead.mode!r}, use {MODES}"
+            )
+
+        self.name = name
+        self.overhead = overhead
+        self.mode = FULL
+        self.ratio = None
+        self.samples = 0
+        self.transitions = 0
+        self._counter = 0
+        self._lock = threading.Lock()
+
+        _controllers.add(self)
+
+    def is_full_call(self) -> bool:
+        """ Возвращает True, если текущий вызов нужно валидировать
+            полностью.
+        """
+
+        if self.mode == FULL:
+            return True
+
+        self._counter += 1
+        if self._counter >= self.overhead.sample_every:
+            self._counter = 0
+            return True
+
+        return False
+
+    def record(self, validation_time: float, function_time: float):
+        """ Учитывает измерение полностью отвалидированного вызова и, при
+            необходимости, меняет режим.
+        """
+
+        overhead = self.overhead
+        ratio = validation_time / max(function_time, 1e-9)
+
+        with self._lock:
+
+            if self.ratio is None:
+                self.ratio = ratio
+            else:
+                self.ratio += overhead.smoothing * (ratio - self.ratio)
+            self.samples += 1
+
+            if self.samples < overhead.min_samples:
+                return
+
+            if self.mode == FULL:
+                if self.ratio > overhead.budget:
+                    self.change_mode(overhead.mode)
+            elif self.ratio < overhead.budget * overhead.restore_ratio:
+                self.change_mode(FULL)
+
+    def change_mode(self, mode: str):
+        """ Меняет режим, записывает смену в лог и вызывает
+            Overhead.on_change.
+        """
+
+        old_mode = self.mode
+        self.mode = mode
+        self.transitions += 1
+        self._counter = 0
+
+        logger.warning(
+            "valdec: %s validation overhead %.3f (budget %.3f), "
+            "mode %s -> %s",
+            self.name, self.ratio, self.overhead.budget, old_mode, mode,
+        )
+
+        on_change = self.overhead.on_change
+        if on_change is not None:
+            on_change(self.name, old_mode, mode, self.ratio)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """ Возвращает словарь с текущим состоянием контроллера."""
+
+        return {
+            "mode": self.mode,
+            "ratio": self.ratio,
+            "samples": self.samples,
+            "transitions": self.transitions,
+        }
+
+
+def get_stats() -> Dict[str, Dict[str, Any]]:
+    """ Возвращает словарь {имя функции: состояние контроллера} для всех
+        функций с контроллерами.
+    """
+
+    return {
+        controller.name: controller.get_stats()
+        for controller in list(_controllers)
+    }
+
+
+def make_controlled_wrapper(
+    wrapper: Callable, plan: ValidationPlan, settings: Settings,
+    is_async: bool,
+) -> Callable:
+    """ Создает обертку над оберткой декоратора `wrapper`, которая
+        валидирует вызовы в режиме контроллера плана (см. описание модуля).
+    """
+
+    func = plan.func
+    controller = plan.controller
+    perf_counter = time.perf_counter
+
+    def check_shallow_arguments(args: tuple, kwargs: Dict[str, Any]):
+        if plan.annotations:
+            check_shallow(plan, get_values(plan, args, kwargs), True)
+
+    def check_shallow_result(result: Any) -> Any:
+        if plan.result_annotations is not None:
+            check_shallow(plan, {"return": result}, False)
+        if settings.result_dumps is not None:
+            return settings.result_dumps(result)
+        return result
+
+    def finish(result: Any, start: float, body_start: float,
+               body_end: float) -> Any:
+        end = perf_counter()
+        controller.record(
+            (body_start - start) + (end - body_end), body_end - body_start
+        )
+        if settings.result_dumps is not None:
+            return settings.result_dumps(result)
+        return result
+
+    if not is_async:
+
+        def controlled_wrapper(*args, **kwargs):
+
+            if trusted_context.get() or plan.level != levels.FULL:
+                return wrapper(*args, **kwargs)
+
+            if controller.is_full_call():
+                start = perf_counter()
+                args, kwargs = validate_arguments(
+                    plan, args, kwargs, settings
+                )
+                body_start = perf_counter()
+                result = func(*args, **kwargs)
+                body_end = perf_counter()
+                result = validate_result(plan, result, settings)
+                return finish(result, start, body_start, body_end)
+
+            if controller.mode == SHALLOW:
+                check_shallow_arguments(args, kwargs)
+                return check_shallow_result(func(*args, **kwargs))
+
+            result = func(*args, **kwargs)
+            if settings.result_dumps is not None:
+                return settings.result_dumps(result)
+            return result
+
+    else:
+
+        async def controlled_wrapper(*args, **kwargs):
+
+            if trusted_context.get() or plan.level != levels.FULL:
+                return await wrapper(*args, **kwargs)
+
+            if controller.is_full_call():
+                start = perf_counter()
+                args, kwargs = await async_validate_arguments(
+                    plan, args, kwargs, settings
+                )
+                body_start = perf_counter()
+                result = await func(*args, **kwargs)
+                body_end = perf_counter()
+                result = await async_validate_result(plan, result, settings)
+                return finish(result, start, body_start, body_end)
+
+            if controller.mode == SHALLOW:
+                check_shallow_arguments(args, kwargs)
+                return check_shallow_result(await func(*args, **kwargs))
+
+            result = await func(*args, **kwargs)
+            if settings.result_dumps is not None:
+                return settings.result_dumps(result)
+            return result
+
+    return functools.wraps(wrapper)(controlled_wrapper)
@@ -0,0 +1,280 @@
+""" Параллельная валидация больших коллекций (см. Settings.chunk_size).
+
+    Значения полей с аннотацией List[...], в которых больше `chunk_size`
+    элементов, делятся на части по `chunk_size` элементов. Части
+    валидируются параллельно в пуле (Settings.executor, по умолчанию - пул
+    процессов, а в сборках CPython без GIL - пул потоков), а результаты
+    собираются в исходном порядке.
+
+    Для пула процессов функция валидатора, аннотации и значения должны
+    сериализоваться pickle (например, функция валидатора и классы моделей
+    должны быть объявлены на уровне модуля). Если часть не удалось
+    отправить в пул или получить из него её результат (например, класс
+    модели объявлен внутри функции), то часть валидируется в текущем
+    процессе.
+
+    Делятся только значения полей с обобщенной аннотацией List[...] (или
+    list[...]). Ограниченные списки (например, conlist из pydantic)
+    валидируются целиком, так как их ограничения относятся ко всему
+    списку.
+
+    Если часть не прошла валидацию, то её элементы валидируются по одному,
+    и в сообщении об ошибке указываются индексы элементов во всей
+    коллекции (не более MAX_ERRORS ошибок на поле).
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import (Executor, Future, ProcessPoolExecutor,
+                                ThreadPoolExecutor)
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+logger = logging.getLogger()
+
+MAX_ERRORS = 10
+
+_executor: Optional[Executor] = None
+_lock = threading.Lock()
+
+# Результат валидации части (см. validate_chunk)
+ChunkResult = Tuple[Optional[list], List[Tuple[int, str]]]
+
+# {имя поля: [(индекс начала части, future, задача валидации части)]}
+Chunks = Dict[str, List[Tuple[int, Future, Callable[[], ChunkResult]]]]
+
+
+def is_free_threaded() -> bool:
+    """ Возвращает True, если интерпретатор работает без GIL."""
+
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def get_default_executor() -> Executor:
+    """ Возвращает пул по умолчанию (создается при первом обращении)."""
+
+    global _executor
+
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(os.cpu_count()) \
+                if is_free_threaded() else ProcessPoolExecutor()
+
+    return _executor
+
+
+def get_chunked_names(
+    annotations: Dict[str, Any], values: Dict[str, Any], chunk_size: int
+) -> Tuple[str, ...]:
+    """ Возвращает имена полей с аннотацией List[...], в значениях которых
+        больше `chunk_size` элементов.
+
+        Классы списков с ограничениями (например, conlist из pydantic, у
+        которых тоже есть __origin__ = list) не учитываются.
+    """
+
+    return tuple(
+        name for name, value in values.items()
+        if isinstance(value, (list, tuple)) and len(value) > chunk_size and
+        is_list_annotation(annotations[name])
+    )
+
+
+def is_list_annotation(annotation: Any) -> bool:
+    """ Возвращает True, если аннотация - List[...] или list[...] с типом
+        элементов.
+    """
+
+    # Классы (например, conlist) тоже могут иметь __origin__, но их
+    # ограничения относятся ко всему списку
+    if issubclass(type(annotation), type):
+        return False
+
+    if getattr(annotation, "__origin__", None) is not list:
+        return False
+
+    args = getattr(annotation, "__args__", ())
+
+    return len(args) == 1 and not isinstance(args[0], TypeVar)
+
+
+def validate_chunk(
+    validator: Callable, name: str, annotation: Any, chunk: list,
+    is_replace: bool, extra: dict,
+) -> ChunkResult:
+    """ Валидирует часть коллекции (выполняется в пуле).
+
+        Возвращает отвалидированные элементы (или None, если их не нужно
+        заменять) и список пар (индекс в части, описание ошибки).
+    """
+
+    try:
+        result = validator(
+            {name: annotation}, {name: chunk}, is_replace, extra
+        )
+    except Exception:
+        pass
+    else:
+        return (result or {}).get(name), []
+
+    errors = []
+    item_annotation = annotation.__args__[0]
+
+    for index, item in enumerate(chunk):
+        try:
+            validator({name: item_annotation}, {name: item}, False, extra)
+        except Exception as error:
+            errors.append((index, f"{type(error).__name__}: {error}"))
+            if len(errors) >= MAX_ERRORS:
+                break
+
+    if not errors:
+        # Часть целиком не прошла валидацию, а элементы по отдельности
+        # прошли (например, ограничение на длину списка)
+        errors.append((0, "chunk validation failed"))
+
+    return None, errors
+
+
+def submit_chunks(
+    executor: Optional[Executor], validator: Callable,
+    annotations: Dict[str, Any], values: Dict[str, Any],
+    names: Tuple[str, ...], chunk_size: int, is_replace: bool, extra: dict,
+) -> Chunks:
+    """ Отправляет части коллекций на валидацию в пул.
+
+        Возвращает словарь {имя поля: [(индекс начала части, future,
+        задача)]} (см. Chunks).
+    """
+
+    executor = executor or get_default_executor()
+    chunks: Chunks = {}
+
+    for name in names:
+        value = values[name]
+        field_chunks = chunks[name] = []
+        for start in range(0, len(value), chunk_size):
+            task = functools.partial(
+                validate_chunk, validator, name, annotations[name],
+                list(value[start:start + chunk_size]), is_replace, extra,
+            )
+            field_chunks.append((start, submit_task(executor, task), task))
+
+    return chunks
+
+
+def submit_task(
+    executor: Executor, task: Callable[[], ChunkResult]
+) -> Future:
+    """ Отправляет задачу в пул. Если её не удалось отправить, то
+        возвращает future без результата (задача будет выполнена в текущем
+        процессе, см. get_chunk_result).
+    """
+
+    try:
+        return executor.submit(task)
+    except Exception as error:
+        future: Future = Future()
+        future.set_exception(error)
+        return future
+
+
+def get_chunk_result(
+    name: str, error: BaseException, task: Callable[[], ChunkResult]
+) -> ChunkResult:
+    """ Валидирует часть в текущем процессе, если пул не вернул результат
+        её валидации (ошибка `error`, например, при сериализации pickle).
+    """
+
+    logger.debug(
+        "valdec: chunk of %s is validated in process: %s: %s",
+        name, type(error).__name__, error,
+    )
+
+    return task()
+
+
+def cancel_chunks(chunks: Chunks):
+    """ Отменяет валидацию частей, которая еще не началась."""
+
+    for field_chunks in chunks.values():
+        for _, future, _ in field_chunks:
+            future.cancel()
+
+
+def merge_chunks(
+    values: Dict[str, Any], chunks: Chunks,
+    results: Dict[str, List[ChunkResult]], chunk_size: int,
+) -> Tuple[Dict[str, Any], List[str]]:
+    """ Собирает результаты валидации частей в исходном порядке.
+
+        Возвращает словарь значений для замены и список описаний ошибок.
+    """
+
+    replaceable = {}
+    errors = []
+
+    for name, field_results in results.items():
+
+        value = values[name]
+        items: List[Any] = []
+        is_replaced = False
+        field_errors = []
+
+        for (start, _, _), (result, chunk_errors) in zip(
+            chunks[name], field_results
+        ):
+            for index, error in chunk_errors:
+                field_errors.append(f"{name}[{start + index}]: {error}")
+            if result is None:
+                items.extend(value[start:start + chunk_size])
+            else:
+                items.extend(result)
+                is_replaced = True
+
+        errors.extend(field_errors[:MAX_ERRORS])
+        if is_replaced:
+            replaceable[name] = items
+
+    return replaceable, errors
+
+
+def collect_chunks(
+    values: Dict[str, Any], chunks: Chunks, chunk_size: int
+) -> Tuple[Dict[str, Any], List[str]]:
+    """ Ожидает результаты валидации частей (см. merge_chunks)."""
+
+    results = {}
+    for name, field_chunks in chunks.items():
+        field_results = results[name] = []
+        for _, future, task in field_chunks:
+            try:
+                field_results.append(future.result())
+            except Exception as error:
+                field_results.append(get_chunk_result(name, error, task))
+
+    return merge_chunks(values, chunks, results, chunk_size)
+
+
+async def async_collect_chunks(
+    values: Dict[str, Any], chunks: Chunks, chunk_size: int
+) -> Tuple[Dict[str, Any], List[str]]:
+    """ Асинхронная версия collect_chunks."""
+
+    results = {}
+    for name, field_chunks in chunks.items():
+        field_results = await asyncio.gather(*(
+            asyncio.wrap_future(future) for _, future, _ in field_chunks
+        ), return_exceptions=True)
+        results[name] = [
+            get_chunk_result(name, result, task)
+            if isinstance(result, Exception) else result
+            for (_, _, task), result in zip(field_chunks, field_results)
+        ]
+
+    return merge_chunks(values, chunks, results, chunk_size)
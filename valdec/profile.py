@@ -0,0 +1,338 @@
+""" Профилирование стоимости валидации декорированной функции.
+
+    Запуск:
+        python -m valdec.profile path.to.module:func --args-json sample.json
+            [--number 1000]
+
+    Функция (или метод класса, например module:Class.method) должна быть
+    декорирована validate или async_validate. Файл с аргументами содержит
+    объект {"args": [...], "kwargs": {...}}, список (позиционные аргументы)
+    или объект без ключей args и kwargs (именованные аргументы).
+
+    Для каждого этапа вызова выводится среднее время (мкс) и его доля во
+    времени вызова декорированной функции:
+    1. binding:     связывание аргументов с именами параметров.
+    2. model:       получение класса для валидации (из кэша бэкенда).
+    3. validation:  валидация аргументов функцией валидатора (без
+                    получения класса).
+    4. replacement: замена значений экземплярами классов (разница между
+                    валидацией с заменой и без нее) и подстановка их в
+                    аргументы функции.
+    5. body:        тело функции.
+    6. result:      валидация возвращаемого значения.
+    Затем выводится время валидации каждого поля по отдельности.
+
+    Как и при вызове декорированной функции, поля, для которых есть
+    правила (Settings.routes, например Buffer или Columns), валидируются
+    функциями валидаторов из правил, а остальные - функцией валидатора из
+    настроек.
+
+    Этапы измеряются по отдельности, поэтому их сумма может немного
+    отличаться от времени вызова декорированной функции.
+"""
+
+import argparse
+import asyncio
+import importlib
+import inspect
+import json
+import sys
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from valdec.data_classes import Settings, ValidationPlan
+from valdec.utils import (async_route_values, get_annotations, get_values,
+                          is_async_validator, replace_args_kwargs,
+                          route_values)
+
+DEFAULT_NUMBER = 1000
+
+STAGES = ("binding", "model", "validation", "replacement", "body", "result")
+
+
+def get_function(path: str) -> Callable:
+    """ Импортирует функцию по пути вида "path.to.module:func"."""
+
+    module_name, _, qualname = path.partition(":")
+    if not module_name or not qualname:
+        raise ValueError(f"Expected 'path.to.module:func', got {path!r}")
+
+    obj: Any = importlib.import_module(module_name)
+    for name in qualname.split("."):
+        obj = getattr(obj, name)
+
+    return obj
+
+
+def get_plan_settings(func: Callable) -> Tuple[ValidationPlan, Settings]:
+    """ Возвращает план валидации и настройки декорированной функции."""
+
+    plan_settings = getattr(func, "__valdec__", None)
+    if plan_settings is None:
+        raise TypeError(
+            f"{func!r} is not decorated with validate or async_validate"
+        )
+
+    return plan_settings
+
+
+def load_arguments(path: str) -> Tuple[tuple, Dict[str, Any]]:
+    """ Загружает аргументы вызова из JSON файла (см. описание модуля)."""
+
+    with open(path, "rb") as file:
+        data = json.load(file)
+
+    if isinstance(data, list):
+        return tuple(data), {}
+
+    if isinstance(data, dict) and set(data) <= {"args", "kwargs"} and data:
+        return tuple(data.get("args", ())), dict(data.get("kwargs", {}))
+
+    if isinstance(data, dict):
+        return (), data
+
+    raise ValueError("Arguments JSON must be a list or an object")
+
+
+def measure(func: Callable[[], Any], number: int) -> float:
+    """ Возвращает среднее время (в секундах) вызова функции без
+        аргументов.
+    """
+
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+
+    return (time.perf_counter() - start) / number
+
+
+def get_model_getter(
+    validator: Callable, annotations: Dict[str, Any], extra: dict
+) -> Optional[Callable[[], Any]]:
+    """ Возвращает функцию, которая получает класс для валидации полей из
+        `annotations` так же, как функция валидатора (если её модуль
+        содержит get_validator_class и get_base_val_class), иначе None.
+    """
+
+    module = sys.modules.get(getattr(validator, "__module__", None) or "")
+    get_validator_class = getattr(module, "get_validator_class", None)
+    get_base_val_class = getattr(module, "get_base_val_class", None)
+
+    if get_validator_class is None or get_base_val_class is None or \
+            extra.get("is_strict"):
+        return None
+
+    base_val_class = get_base_val_class(extra)
+
+    return lambda: get_validator_class(annotations, base_val_class)
+
+
+def make_routed_validator(
+    plan: ValidationPlan, settings: Settings, call: Callable
+) -> Callable[..., Dict[str, Any]]:
+    """ Возвращает функцию, которая валидирует значения так же, как
+        validate_values: поля с правилами (см. Settings.routes) -
+        функциями валидаторов из правил, остальные - функцией валидатора
+        из настроек. Функция возвращает словарь значений для замены.
+
+        :call: Функция для вызова функций валидаторов (выполняет
+               корутины).
+    """
+
+    validator = settings.validator
+    extra = settings.extra
+    routes = plan.routes or {}
+    is_async = is_async_validator(validator) or any(
+        is_async_validator(route.validator) for route in routes.values()
+    )
+    route = async_route_values if is_async else route_values
+
+    def validate_routed(
+        annotations: Dict[str, Any], values: Dict[str, Any],
+        is_replace: bool, is_arguments: bool = True,
+    ) -> Dict[str, Any]:
+
+        replaceable: Dict[str, Any] = {}
+        if routes:
+            replaceable, values = call(
+                route, routes, annotations, values, is_replace, extra,
+                is_arguments,
+            )
+            annotations = {name: annotations[name] for name in values}
+        if values:
+            replaceable.update(call(
+                validator, annotations, values, is_replace, extra
+            ) or {})
+
+        return replaceable
+
+    return validate_routed
+
+
+def profile_function(
+    func: Callable, args: tuple, kwargs: Dict[str, Any],
+    number: int = DEFAULT_NUMBER,
+) -> Tuple[Dict[str, float], Dict[str, float], float]:
+    """ Измеряет стоимость этапов вызова декорированной функции и
+        валидации каждого поля (см. описание модуля).
+
+        Возвращает словарь {этап: время}, словарь {имя поля: время} и время
+        вызова декорированной функции (в секундах).
+    """
+
+    plan, settings = get_plan_settings(func)
+    validator = settings.validator
+    extra = settings.extra
+    loop = asyncio.new_event_loop()
+
+    def call(target: Callable, *call_args, **call_kwargs) -> Any:
+        result = target(*call_args, **call_kwargs)
+        if inspect.isawaitable(result):
+            result = loop.run_until_complete(result)
+        return result
+
+    validate_routed = make_routed_validator(plan, settings, call)
+
+    try:
+        values = get_values(plan, args, kwargs)
+        annotations = get_annotations(plan, values)
+
+        replaceable = validate_routed(
+            annotations, values, settings.is_replace_args
+        )
+        new_args, new_kwargs = replace_args_kwargs(
+            plan, args, dict(kwargs), replaceable
+        )
+        result = call(plan.func, *new_args, **new_kwargs)
+
+        stages = dict.fromkeys(STAGES, 0.0)
+
+        stages["binding"] = measure(
+            lambda: get_values(plan, args, kwargs), number
+        )
+
+        # Класс для валидации создается только для полей без правил
+        model_annotations = {
+            name: annotation for name, annotation in annotations.items()
+            if name not in plan.routes
+        }
+        get_model = get_model_getter(validator, model_annotations, extra)
+        if get_model is not None and model_annotations:
+            stages["model"] = measure(get_model, number)
+
+        validation = measure(
+            lambda: validate_routed(annotations, values, False), number
+        )
+        stages["validation"] = max(validation - stages["model"], 0.0)
+
+        if settings.is_replace_args:
+            replacement = measure(
+                lambda: validate_routed(annotations, values, True), number,
+            ) + measure(
+                lambda: replace_args_kwargs(
+                    plan, args, dict(kwargs), replaceable
+                ),
+                number,
+            )
+            stages["replacement"] = max(replacement - validation, 0.0)
+
+        stages["body"] = measure(
+            lambda: call(plan.func, *new_args, **new_kwargs), number
+        )
+
+        fields_values = dict(values)
+        fields_annotations = dict(annotations)
+        if plan.result_annotations is not None:
+            stages["result"] = measure(
+                lambda: validate_routed(
+                    plan.result_annotations, {"return": result},
+                    settings.is_replace_result, is_arguments=False,
+                ),
+                number,
+            )
+            fields_values["return"] = result
+            fields_annotations.update(plan.result_annotations)
+
+        def make_field_call(
+            field_validator: Callable, name: str
+        ) -> Callable[[], Any]:
+            field_annotations = {name: fields_annotations[name]}
+            field_values = {name: fields_values[name]}
+            return lambda: call(
+                field_validator, field_annotations, field_values, False,
+                extra,
+            )
+
+        fields = {}
+        for name in fields_values:
+            route = plan.routes.get(name)
+            field_call = make_field_call(
+                validator if route is None else route.validator, name
+            )
+            if route is not None:
+                try:
+                    field_call()
+                except Exception:
+                    # Значение не прошло правило и валидируется функцией из
+                    # настроек
+                    field_call = make_field_call(validator, name)
+            fields[name] = measure(field_call, number)
+
+        total = measure(lambda: call(func, *args, **kwargs), number)
+
+    finally:
+        loop.close()
+
+    return stages, fields, total
+
+
+def format_report(
+    path: str, number: int, stages: Dict[str, float],
+    fields: Dict[str, float], total: float,
+) -> str:
+    """ Возвращает текст отчета с результатами profile_function."""
+
+    def row(name: str, elapsed: float) -> str:
+        share = elapsed / total * 100 if total else 0.0
+        return f"{name:<24} {elapsed * 1e6:12.2f} {share:8.1f}"
+
+    lines = [
+        f"{path} ({number} calls)",
+        "",
+        f"{'stage':<24} {'us/call':>12} {'%':>8}",
+    ]
+    lines.extend(row(name, elapsed) for name, elapsed in stages.items())
+    lines.append(row("total (decorated call)", total))
+    lines.extend(["", f"{'field':<24} {'us/call':>12} {'%':>8}"])
+    lines.extend(row(name, elapsed) for name, elapsed in fields.items())
+
+    return "\n".join(lines)
+
+
+def main(argv: Any = None):
+
+    parser = argparse.ArgumentParser(
+        prog="python -m valdec.profile",
+        description="Break down validation cost of a decorated function.",
+    )
+    parser.add_argument("function", help="path.to.module:func")
+    parser.add_argument(
+        "--args-json", required=True,
+        help="JSON file with call arguments",
+    )
+    parser.add_argument("--number", type=int, default=DEFAULT_NUMBER)
+    options = parser.parse_args(argv)
+
+    func = get_function(options.function)
+    args, kwargs = load_arguments(options.args_json)
+    stages, fields, total = profile_function(
+        func, args, kwargs, options.number
+    )
+
+    print(format_report(
+        options.function, options.number, stages, fields, total
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+""" Компактные записи для отвалидированных данных (см. Settings.is_compact).
+
+    При замене значений функции валидаторов создают экземпляры классов
+    валидации (моделей pydantic, ValidatedDC). У каждого такого экземпляра
+    есть свой __dict__ (а у моделей pydantic - еще и __fields_set__), и для
+    данных с миллионами вложенных объектов это занимает много памяти.
+
+    Здесь экземпляры моделей и датаклассов заменяются записями - экземплярами
+    классов со __slots__ (без __dict__), которые создаются один раз для
+    каждого класса модели (см. get_record_class). Записи доступны только для
+    чтения, к полям можно обращаться "через точку", а словарь с полями можно
+    получить через dict(record) или record._asdict() (поэтому запись можно
+    передать туда, где ожидается словарь, например в модель pydantic).
+"""
+
+import dataclasses
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from valdec.caches import Cache
+
+# Наибольшее количество классов моделей, для которых хранятся классы записей
+MAX_MODELS = 1024
+
+# Кэш классов записей. Ключ - класс модели, значение - класс записи (вместе
+# с функцией для создания записей, см. create_maker).
+_records = Cache(maxsize=MAX_MODELS)
+
+# Типы значений, которые не нужно обходить
+SCALAR_TYPES = frozenset((int, float, str, bytes, bool, type(None)))
+
+
+class Record:
+    """ Базовый класс записей (см. get_record_class).
+
+        :_fields:  Кортеж имен полей.
+        :_model:   Класс модели, для которой создан класс записи.
+        :_setters: Кортеж функций для записи значений полей (используются
+                   только при создании записи, см. create_maker).
+        :_make:    Функция, которая создает запись из экземпляра модели (см.
+                   create_maker).
+    """
+
+    __slots__ = ()
+
+    _fields: Tuple[str, ...] = ()
+    _model: Optional[type] = None
+    _setters: Tuple[Any, ...] = ()
+    _make: Optional[Callable[[Any, Optional[dict]], "Record"]] = None
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __delattr__(self, name: str):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def keys(self) -> Tuple[str, ...]:
+        return self._fields
+
+    def __getitem__(self, name: str) -> Any:
+        if name in self._fields:
+            return getattr(self, name)
+        raise KeyError(name)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._fields)
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def _asdict(self) -> Dict[str, Any]:
+        """ Возвращает словарь с именами полей и их значениями."""
+
+        return {name: getattr(self, name) for name in self._fields}
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is type(self):
+            return all(
+                getattr(self, name) == getattr(other, name)
+                for name in self._fields
+            )
+        return NotImplemented
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        values = ", ".join(
+            f"{name}={getattr(self, name)!r}" for name in self._fields
+        )
+        return f"{type(self).__name__}({values})"
+
+
+def get_model_fields(model: type) -> Tuple[str, ...]:
+    """ Возвращает имена полей модели pydantic или датакласса."""
+
+    if dataclasses.is_dataclass(model):
+        return tuple(field.name for field in dataclasses.fields(model))
+
+    return tuple(model.__fields__)
+
+
+MAKER_SOURCE = """
+def make(_value, _memo):
+    _record = _new(_cls)
+{fields}
+    return _record
+"""
+
+FIELD_SOURCE = """
+    _item = _value.{name}
+    _set_{index}(_record, _item if type(_item) in _scalar_types
+                 else _to_record(_item, _memo))"""
+
+
+def create_record_class(model: type) -> type:
+    """ Создает класс записи для класса модели."""
+
+    names = get_model_fields(model)
+
+    cls = type(f"{model.__name__}Record", (Record, ), {
+        "__slots__": names,
+        "__module__": model.__module__,
+        "_fields": names,
+        "_model": model,
+    })
+    cls._setters = tuple(getattr(cls, name).__set__ for name in names)
+    cls._make = staticmethod(create_maker(cls))
+
+    return cls
+
+
+def get_record_class(model: type) -> type:
+    """ Возвращает класс записи для класса модели (создается один раз)."""
+
+    return _records.get(model, create_record_class, model)
+
+
+def create_maker(cls: type) -> Callable[[Any, Optional[dict]], Record]:
+    """ Создает функцию, которая создает запись класса cls из экземпляра
+        модели.
+
+        Код функции генерируется для каждого класса записи: значения полей
+        читаются и записываются без циклов и без поиска по именам, а
+        значения простых типов не передаются в to_record.
+    """
+
+    namespace: Dict[str, Any] = {
+        "_new": object.__new__,
+        "_cls": cls,
+        "_scalar_types": SCALAR_TYPES,
+        "_to_record": to_record,
+    }
+    fields = []
+
+    for index, (name, setter) in enumerate(zip(cls._fields, cls._setters)):
+        namespace[f"_set_{index}"] = setter
+        fields.append(FIELD_SOURCE.format(name=name, index=index))
+
+    exec(MAKER_SOURCE.format(fields="".join(fields)), namespace)
+
+    return namespace["make"]
+
+
+def is_model_instance(value: Any) -> bool:
+    """ Возвращает True, если значение - экземпляр модели pydantic или
+        датакласса.
+    """
+
+    cls = type(value)
+
+    return hasattr(value, "__fields_set__") and hasattr(cls, "__fields__") \
+        or dataclasses.is_dataclass(cls)
+
+
+def to_record(value: Any, memo: Optional[dict] = None) -> Any:
+    """ Заменяет экземпляры моделей записями в значении (в том числе в
+        списках, кортежах и словарях).
+
+        Если передан словарь memo, то для каждого экземпляра модели
+        создается одна запись, даже если экземпляр встречается несколько
+        раз (см. модуль identity).
+    """
+
+    value_type = type(value)
+
+    if value_type in SCALAR_TYPES:
+        return value
+
+    cls = _records.lookup(value_type)
+    if cls is None:
+
+        if value_type is list:
+            return [to_record(item, memo) for item in value]
+
+        if value_type is tuple:
+            return tuple(to_record(item, memo) for item in value)
+
+        if value_type is dict:
+            return {
+                key: to_record(item, memo) for key, item in value.items()
+            }
+
+        if isinstance(value, Record) or not is_model_instance(value):
+            return value
+
+        cls = get_record_class(value_type)
+
+    maker = cls._make
+
+    if memo is None:
+        return maker(value, None)
+
+    record = memo.get(id(value))
+    if record is None:
+        record = memo[id(value)] = maker(value, memo)
+
+    return record
+
+
+def to_records(
+    values: Dict[str, Any], memo: Optional[dict] = None
+) -> Dict[str, Any]:
+    """ Заменяет экземпляры моделей записями в значениях полей (см.
+        to_record).
+    """
+
+    return {name: to_record(value, memo) for name, value in values.items()}
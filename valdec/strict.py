@@ -0,0 +1,270 @@
+""" Строгая проверка значений (см. Settings.is_strict).
+
+    Значение считается валидным, только если оно уже соответствует
+    аннотации без приведения типов:
+    1. Для встроенных типов (int, str, list, ...) тип значения должен в
+       точности совпадать с аннотацией ("1" и True не являются валидными
+       значениями для int, список - для Tuple).
+    2. Для остальных классов (моделей pydantic, датаклассов) значение
+       должно быть экземпляром класса (словари не принимаются).
+    3. Для аннотаций typing (List, Dict, Tuple, Union, Optional, Literal,
+       ...) проверяются и элементы коллекций.
+    4. Для ограниченных типов (например, conint, constr, StrictStr из
+       pydantic) проверяется их встроенный базовый тип и ограничения из
+       атрибутов класса (gt, ge, lt, le, multiple_of, min_length,
+       max_length, regex, min_items, max_items). Преобразования (например,
+       to_lower) не выполняются, а значение должно уже им соответствовать.
+
+    Значения не изменяются и не копируются, поэтому заменять нечего.
+"""
+
+import collections.abc
+import inspect
+import math
+import re
+import typing
+from typing import Any, Dict, List, Optional, Tuple, TypeVar, Union
+
+from valdec.data_classes import Discriminated
+from valdec.errors import ValidationError
+
+NoneType = type(None)
+
+# Коллекции, элементы которых имеют одну аннотацию
+ITEMS_ORIGINS = (
+    list, set, frozenset,
+    collections.abc.Sequence, collections.abc.MutableSequence,
+    collections.abc.Set, collections.abc.MutableSet,
+    collections.abc.Collection,
+)
+
+# Коллекции с ключами и значениями
+MAPPING_ORIGINS = (
+    dict, collections.abc.Mapping, collections.abc.MutableMapping,
+)
+
+
+def is_constrained(annotation: type) -> bool:
+    """ Возвращает True, если класс - ограниченный тип pydantic (среди его
+        базовых классов есть классы из pydantic, но он не модель).
+    """
+
+    return not hasattr(annotation, "__fields__") and any(
+        base.__module__.startswith("pydantic")
+        for base in annotation.__mro__[1:]
+    )
+
+
+def get_base(annotation: type) -> type:
+    """ Возвращает класс, экземпляром которого должно быть значение.
+
+        Для ограниченных типов pydantic (conint, constr, ConstrainedDate,
+        ...) - это их базовый класс не из pydantic (int, str, date, ...),
+        для остальных классов - сам класс.
+    """
+
+    if annotation.__name__ == "StrictBool":
+        # В pydantic v1 StrictBool наследуется от int
+        return bool
+
+    if is_constrained(annotation):
+        for base in annotation.__mro__[1:]:
+            if not base.__module__.startswith("pydantic") and \
+                    base is not object:
+                return base
+
+    return annotation
+
+
+def get_constraints_error(annotation: type, value: Any) -> Optional[str]:
+    """ Возвращает описание ошибки, если значение не соответствует
+        ограничениям из атрибутов класса `annotation`, иначе None.
+    """
+
+    def get(name: str) -> Any:
+        return getattr(annotation, name, None)
+
+    for name, check in (
+        ("gt", lambda limit: value > limit),
+        ("ge", lambda limit: value >= limit),
+        ("lt", lambda limit: value < limit),
+        ("le", lambda limit: value <= limit),
+    ):
+        limit = get(name)
+        if limit is not None and not check(limit):
+            return f"value {value!r} does not satisfy {name}={limit!r}"
+
+    multiple_of = get("multiple_of")
+    if multiple_of is not None and value % multiple_of:
+        return f"value {value!r} is not a multiple of {multiple_of!r}"
+
+    if get("allow_inf_nan") is False and not math.isfinite(value):
+        return f"value {value!r} is not finite"
+
+    for name, check in (
+        ("min_length", lambda limit: len(value) >= limit),
+        ("max_length", lambda limit: len(value) <= limit),
+        ("min_items", lambda limit: len(value) >= limit),
+        ("max_items", lambda limit: len(value) <= limit),
+    ):
+        limit = get(name)
+        if limit is not None and not check(limit):
+            return f"length {len(value)} does not satisfy {name}={limit}"
+
+    regex = get("regex")
+    if regex is not None and not re.match(regex, value):
+        pattern = getattr(regex, "pattern", regex)
+        return f"value {value!r} does not match {pattern!r}"
+
+    return None
+
+
+def get_strict_error(annotation: Any, value: Any) -> Optional[str]:
+    """ Возвращает описание ошибки, если значение не соответствует
+        аннотации строго (см. описание модуля), иначе None.
+    """
+
+    if annotation is Any or isinstance(annotation, TypeVar):
+        return None
+
+    if annotation is None or annotation is NoneType:
+        return None if value is None else f"value {value!r} is not None"
+
+    if isinstance(annotation, Discriminated):
+        return get_strict_error(annotation.union, value)
+
+    origin = getattr(annotation, "__origin__", None)
+
+    if origin is Union:
+        for arg in annotation.__args__:
+            if get_strict_error(arg, value) is None:
+                return None
+        return f"value {value!r} does not match {annotation!r}"
+
+    if origin is getattr(typing, "Literal", None):
+        for arg in annotation.__args__:
+            if type(value) is type(arg) and value == arg:
+                return None
+        return f"value {value!r} is not one of {annotation.__args__!r}"
+
+    if origin is not None:
+        error = get_generic_error(annotation, origin, value)
+        if error is None and inspect.isclass(annotation):
+            # Например, conlist из pydantic
+            error = get_constraints_error(annotation, value)
+        return error
+
+    if not inspect.isclass(annotation):
+        return f"annotation {annotation!r} is not supported in strict mode"
+
+    base = get_base(annotation)
+
+    if base.__module__ == "builtins":
+        if type(value) is not base:
+            return f"value of type {type(value).__name__!r} is not " \
+                f"{base.__name__!r}"
+    elif not isinstance(value, base):
+        return f"value of type {type(value).__name__!r} is not an " \
+            f"instance of {base.__name__!r}"
+
+    if is_constrained(annotation):
+        error = get_constraints_error(annotation, value)
+        if error is not None:
+            return error
+
+        item_type = getattr(annotation, "item_type", None)
+        if item_type is not None:
+            return get_items_error(item_type, value)
+
+    return None
+
+
+def get_items_error(annotation: Any, items: Any) -> Optional[str]:
+    """ Возвращает описание ошибки первого элемента коллекции, который не
+        соответствует аннотации, иначе None.
+    """
+
+    for index, item in enumerate(items):
+        error = get_strict_error(annotation, item)
+        if error is not None:
+            return f"[{index}]: {error}"
+
+    return None
+
+
+def get_generic_error(
+    annotation: Any, origin: Any, value: Any
+) -> Optional[str]:
+    """ Возвращает описание ошибки для аннотаций-коллекций typing (List,
+        Tuple, Dict, ...), иначе None.
+    """
+
+    if not inspect.isclass(origin):
+        return f"annotation {annotation!r} is not supported in strict mode"
+
+    if origin.__module__ == "builtins":
+        if type(value) is not origin:
+            return f"value of type {type(value).__name__!r} is not " \
+                f"{origin.__name__!r}"
+    elif not isinstance(value, origin):
+        return f"value of type {type(value).__name__!r} is not an " \
+            f"instance of {origin.__name__!r}"
+
+    args = getattr(annotation, "__args__", None) or ()
+    if not args or isinstance(value, (str, bytes)):
+        return None
+
+    if origin is tuple:
+        if len(args) == 2 and args[1] is Ellipsis:
+            return get_items_error(args[0], value)
+        if args == ((), ):
+            args = ()
+        if len(value) != len(args):
+            return f"tuple length {len(value)} is not {len(args)}"
+        for index, (arg, item) in enumerate(zip(args, value)):
+            error = get_strict_error(arg, item)
+            if error is not None:
+                return f"[{index}]: {error}"
+        return None
+
+    if origin in MAPPING_ORIGINS and len(args) == 2:
+        for key, item in value.items():
+            error = get_strict_error(args[0], key) or \
+                get_strict_error(args[1], item)
+            if error is not None:
+                return f"[{key!r}]: {error}"
+        return None
+
+    if origin in ITEMS_ORIGINS and len(args) == 1:
+        return get_items_error(args[0], value)
+
+    return None
+
+
+def get_strict_errors(
+    annotations: Dict[str, Any], values: Dict[str, Any]
+) -> List[Tuple[str, str]]:
+    """ Возвращает список пар (имя поля, описание ошибки) для значений,
+        которые не соответствуют аннотациям строго.
+    """
+
+    errors = []
+
+    for name, value in values.items():
+        error = get_strict_error(annotations[name], value)
+        if error is not None:
+            errors.append((name, error))
+
+    return errors
+
+
+def check_strict(annotations: Dict[str, Any], values: Dict[str, Any]):
+    """ Проверяет значения строго и поднимает ValidationError с описаниями
+        всех ошибок, если хотя бы одно значение не прошло проверку.
+    """
+
+    errors = get_strict_errors(annotations, values)
+    if errors:
+        raise ValidationError(
+            "\n".join(f"{name}: {error}" for name, error in errors)
+        )
@@ -1,109 +1,1048 @@
+import asyncio
+import collections.abc
+import copy
+import dataclasses
 import inspect
+import json
 import logging
-from typing import Any, Callable, Dict, List, Tuple
+import sys
+import types
+import typing
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
-from valdec.data_classes import FieldData, Settings
-from valdec.errors import ValidationArgumentsError, ValidationReturnError
+from valdec import levels, parallel
+from valdec.audit import get_auditor
+from valdec.caches import Cache, WeakCache
+from valdec.columns import ColumnBatch, is_columns, make_validator
+from valdec.data_classes import (Buffer, Columns, Discriminated, Route,
+                                 Settings, ValidationPlan)
+from valdec.errors import (JSONParsingArgumentsError, JSONParsingError,
+                           ValidationArgumentsError, ValidationError,
+                           ValidationReturnError)
+from valdec.limits import check_limits
+from valdec.markers import is_marked, mark
+from valdec.validator_buffer import buffer_route
 
 logger = logging.getLogger()
 
+# Планы валидации (без функций) для объектов кода функций. Количество
+# планов для одного объекта кода ограничено: замыкания из одной фабрики
+# могут отличаться аннотациями (например, классами, которые создаются во
+# время работы программы), и кэш не должен удерживать их все.
+_plans = WeakCache(maxsize=64)
 
-def get_data_with_annotations(
-    func: Callable, args: Tuple[Any, ...], kwargs: Dict[str, Any]
-) -> List[FieldData]:
-    """ Связывает аргументы функции имеющие аннотации с полученными(!) данными.
+# Правила, которые действуют всегда (перед правилами из настроек), см.
+# Settings.routes
+BUILTIN_ROUTES = (buffer_route, )
 
-        Возвращает список с полной информацией о каждом полученном значении,
-        а именно: имя аргумента, полученное значение, аннотация из сигнатуры
-        функции (см. FieldData).
-    """
-
-    signature = inspect.signature(func)
-    parameters = signature.parameters
-    bound = signature.bind(*args, **kwargs)
+# Правила для аннотаций Columns для каждой функции валидатора
+_columns_routes = Cache()
 
-    return [
-        FieldData(name, value, parameters[name].annotation)
-        for name, value in bound.arguments.items()
-        if parameters[name].annotation is not inspect._empty
-    ]
+POSITIONAL_KINDS = (
+    inspect.Parameter.POSITIONAL_ONLY,
+    inspect.Parameter.POSITIONAL_OR_KEYWORD,
+)
+KEYWORD_KINDS = (
+    inspect.Parameter.POSITIONAL_OR_KEYWORD,
+    inspect.Parameter.KEYWORD_ONLY,
+)
 
 
-def get_data_for_validation(
-    fields: List[FieldData], names: Tuple[Any, ...], exclude: bool
-) -> List[FieldData]:
-    """ Формирует и возвращает окончательный список данных для валидации.
+def is_selected(name: str, names: Tuple[Any, ...], exclude: bool) -> bool:
+    """ Возвращает True, если поле с именем `name` подлежит валидации.
 
-        :fields:  Список с полной информацией о каждом поле (имя из сигнатуры
-                  функции, полученное значение, аннотация).
         :names:   Имена полей подлежащих включению или исключению из валидации.
-        :exclude: Если `True`, то для валидации будут отобраны поля из
-                  `fields` с именами которых нет в `names`.
-                  Если `False`, то будут отобраны поля из `fields` имена
-                  которых есть в `names`. Но если при этом `names` пустой, то
-                  будут отобраны все поля из fields.
+        :exclude: Если `True`, то для валидации будут отобраны поля с
+                  именами которых нет в `names`.
+                  Если `False`, то будут отобраны поля имена которых есть
+                  в `names`. Но если при этом `names` пустой, то будут
+                  отобраны все поля.
     """
 
     if exclude:
-        return [field for field in fields if field.name not in names]
+        return name not in names
+
+    return not names or name in names
+
+
+def get_discriminator_tags(cls: type, field: str) -> Tuple[Any, ...]:
+    """ Возвращает значения поля-дискриминатора `field` класса `cls`: из
+        аннотации Literal или значение по умолчанию.
+    """
+
+    try:
+        hints = typing.get_type_hints(cls)
+    except Exception:
+        hints = getattr(cls, "__annotations__", {})
+
+    annotation = hints.get(field)
+    literal = getattr(typing, "Literal", None)
+    if literal is not None and \
+            getattr(annotation, "__origin__", None) is literal:
+        return annotation.__args__
+
+    default = None
+    model_fields = getattr(cls, "__fields__", None)
+    if isinstance(model_fields, dict) and field in model_fields:
+        default = model_fields[field].default
+    elif dataclasses.is_dataclass(cls):
+        for dataclass_field in dataclasses.fields(cls):
+            if dataclass_field.name == field and \
+                    dataclass_field.default is not dataclasses.MISSING:
+                default = dataclass_field.default
+
+    if default is None:
+        raise TypeError(
+            f"{cls} has no Literal annotation or default value "
+            f"for the discriminator field {field!r}"
+        )
+
+    return (default, )
+
+
+def get_discriminator_index(annotation: Discriminated) -> Dict[Any, type]:
+    """ Возвращает индекс {значение поля-дискриминатора: класс} для
+        аннотации Discriminated (создает его при первом вызове).
+    """
+
+    index = annotation.index
+    if index is not None:
+        return index
+
+    index = {}
+    for cls in annotation.union.__args__:
+        for tag in get_discriminator_tags(cls, annotation.field):
+            if tag in index:
+                raise TypeError(
+                    f"{annotation}: value {tag!r} of the discriminator "
+                    f"is used in {index[tag]} and {cls}"
+                )
+            index[tag] = cls
+
+    annotation.index = index
+
+    return index
+
+
+def get_discriminated_class(
+    name: str, annotation: Discriminated, value: Any
+) -> type:
+    """ Возвращает класс из Union, которым должно валидироваться значение
+        `value` поля `name` с аннотацией Discriminated.
+    """
+
+    index = get_discriminator_index(annotation)
+    field = annotation.field
+
+    if isinstance(value, dict):
+        tag = value.get(field)
     else:
-        if names:
-            return [field for field in fields if field.name in names]
+        tag = getattr(value, field, None)
+
+    cls = index.get(tag)
+    if cls is None:
+        raise ValidationError(
+            f"{name}: wrong value {tag!r} of the discriminator {field!r}, "
+            f"expected one of {list(index)}"
+        )
+
+    return cls
+
+
+def get_discriminated(annotation: Any) -> Optional[Discriminated]:
+    """ Возвращает аннотацию Discriminated, если аннотация - Discriminated
+        или Optional[Discriminated], иначе None.
+    """
+
+    if isinstance(annotation, Discriminated):
+        return annotation
+
+    if getattr(annotation, "__origin__", None) is Union:
+        args = annotation.__args__
+        if len(args) == 2 and type(None) in args:
+            arg = args[0] if args[1] is type(None) else args[1]
+            if isinstance(arg, Discriminated):
+                return arg
+
+    return None
+
+
+def has_discriminated(annotation: Any) -> bool:
+    """ Возвращает True, если в аннотации (в том числе вложенной) есть
+        Discriminated.
+    """
+
+    if isinstance(annotation, Discriminated):
+        return True
+
+    return any(
+        has_discriminated(arg)
+        for arg in getattr(annotation, "__args__", None) or ()
+    )
+
+
+def check_discriminated(name: str, annotation: Any):
+    """ Создает индекс аннотации Discriminated поля `name` (см.
+        get_discriminator_index).
+
+        Discriminated поддерживается только как сама аннотация или в
+        Optional. Для других аннотаций, в которых есть Discriminated
+        (например, List[Discriminated(...)]), поднимает TypeError.
+    """
+
+    discriminated = get_discriminated(annotation)
+    if discriminated is not None:
+        get_discriminator_index(discriminated)
+    elif has_discriminated(annotation):
+        raise TypeError(
+            f"{name}: Discriminated can be used only as the annotation "
+            f"itself or in Optional, not in {annotation!r}"
+        )
+
+
+def resolve_discriminated(
+    annotations: Dict[str, Any], values: Dict[str, Any]
+) -> Dict[str, Any]:
+    """ Заменяет аннотации Discriminated (и Optional[Discriminated]) на
+        классы, которыми должны валидироваться полученные значения (см.
+        get_discriminated_class). Для значения None аннотации
+        Optional[Discriminated] заменяются на NoneType.
+
+        Если таких аннотаций нет, то возвращает исходный словарь.
+
+        Используется функциями валидаторами.
+    """
+
+    resolved = None
+
+    for name, annotation in annotations.items():
+
+        discriminated = get_discriminated(annotation)
+        if discriminated is None:
+            continue
+
+        if resolved is None:
+            resolved = dict(annotations)
+
+        value = values[name]
+        if value is None and discriminated is not annotation:
+            resolved[name] = type(None)
         else:
-            return fields
+            resolved[name] = get_discriminated_class(
+                name, discriminated, value
+            )
 
+    return annotations if resolved is None else resolved
 
-def get_annotations_values_dicts(
-    fields: List[FieldData],
-) -> Tuple[Dict[str, Any], Dict[str, Any]]:
-    """ Возвращает словари с аннотациями и значениями полей."""
+
+def get_annotation_classes(annotation: Any) -> Tuple[type, ...]:
+    """ Возвращает кортеж классов из аннотации: саму аннотацию, если она
+        класс, или классы из Union (Optional). Для остальных аннотаций
+        возвращает пустой кортеж.
+    """
+
+    if isinstance(annotation, Discriminated):
+        annotation = annotation.union
+
+    if annotation is not Any and inspect.isclass(annotation):
+        return (annotation, )
+
+    if getattr(annotation, "__origin__", None) is Union:
+        return tuple(
+            cls for arg in annotation.__args__
+            for cls in get_annotation_classes(arg)
+        )
+
+    return tuple()
+
+
+def get_shallow_types(annotation: Any) -> Optional[Tuple[type, ...]]:
+    """ Возвращает кортеж типов для поверхностной проверки значения с
+        аннотацией `annotation` через isinstance (проверяется только тип
+        самого значения, но не его элементов или полей).
+
+        Для классов моделей (наследников pydantic.BaseModel, датаклассов)
+        допускаются также словари, из которых они создаются.
+        Для ограниченных типов pydantic (StrictInt, ConstrainedStr, ...)
+        проверяется их встроенный базовый тип.
+
+        Возвращает None, если значение с такой аннотацией нельзя проверить
+        поверхностно (например, Any или строковая аннотация).
+    """
+
+    if annotation is None or annotation is type(None):
+        return (type(None), )
+
+    if isinstance(annotation, Discriminated):
+        return get_shallow_types(annotation.union)
+
+    if isinstance(annotation, Buffer):
+        return annotation.types
+
+    if isinstance(annotation, Columns):
+        return (collections.abc.Mapping, ColumnBatch)
+
+    origin = getattr(annotation, "__origin__", None)
+
+    if origin is Union:
+        types = []
+        for arg in annotation.__args__:
+            arg_types = get_shallow_types(arg)
+            if arg_types is None:
+                return None
+            types.extend(arg_types)
+        return tuple(types)
+
+    if origin is not None:
+        return (origin, ) if inspect.isclass(origin) else None
+
+    if annotation is Any or not inspect.isclass(annotation):
+        return None
+
+    if annotation is float:
+        return (float, int)
+
+    if dataclasses.is_dataclass(annotation) or \
+            hasattr(annotation, "__fields__"):
+        return (annotation, dict)
+
+    if annotation.__module__.startswith("pydantic"):
+        for base in annotation.__mro__:
+            if base.__module__ == "builtins":
+                return (base, )
+
+    return (annotation, )
+
+
+def has_own_signature(func: Callable) -> bool:
+    """ Возвращает True, если func - обычная функция, сигнатура которой
+        вычисляется по её объекту кода (и значениям по умолчанию).
+    """
+
+    if type(func) is not types.FunctionType:
+        return False
+
+    attributes = func.__dict__
+
+    return "__wrapped__" not in attributes and \
+        "__signature__" not in attributes
+
+
+def get_plan_key(
+    func: Callable, names: Tuple[Any, ...], exclude: bool
+) -> Optional[Tuple[Any, ...]]:
+    """ Возвращает ключ плана валидации функции в кэше _plans (для объекта
+        кода функции) или None, если план для функции нельзя брать из кэша.
+
+        Функции с одним объектом кода (например, замыкания, которые
+        создаются при каждом вызове фабрики) могут отличаться аннотациями
+        и наличием значений по умолчанию, поэтому они входят в ключ.
+    """
+
+    if not has_own_signature(func):
+        return None
+
+    defaults = func.__defaults__
+    kwdefaults = func.__kwdefaults__
+
+    return (
+        tuple(func.__annotations__.items()),
+        names,
+        exclude,
+        len(defaults) if defaults else 0,
+        tuple(kwdefaults) if kwdefaults else (),
+    )
+
+
+def create_plan_template(
+    func: Callable, names: Tuple[Any, ...], exclude: bool
+) -> ValidationPlan:
+    """ Создает план валидации для кэша: без ссылок на функцию и на её
+        сигнатуру (в которой есть значения по умолчанию), чтобы кэш не
+        удерживал их.
+    """
+
+    template = create_validation_plan(func, names, exclude)
+    template.func = None
+    template._signature = None
+
+    return template
+
+
+def get_validation_plan(
+    func: Callable, names: Tuple[Any, ...], exclude: bool
+) -> ValidationPlan:
+    """ Возвращает план валидации для функции (см. ValidationPlan).
+
+        Все, что не зависит от самой функции (а только от её объекта кода,
+        аннотаций и аргументов декоратора), вычисляется один раз и берется
+        из кэша _plans. Кэш хранит объекты кода по слабым ссылкам, поэтому
+        функции, которые создаются и декорируются во время работы программы,
+        удаляются вместе со своими планами.
+
+        :func:    Декорируемая функция.
+        :names:   Имена полей подлежащих включению или исключению из валидации.
+        :exclude: Флаг исключения (см. is_selected).
+    """
+
+    key = get_plan_key(func, names, exclude)
+    if key is None:
+        return create_validation_plan(func, names, exclude)
+
+    template = _plans.get(
+        func.__code__, key, create_plan_template, func, names, exclude
+    )
+
+    plan = copy.copy(template)
+    plan.func = func
+
+    return plan
+
+
+def create_validation_plan(
+    func: Callable, names: Tuple[Any, ...], exclude: bool
+) -> ValidationPlan:
+    """ Создает план валидации для функции (см. ValidationPlan).
+
+        :func:    Декорируемая функция.
+        :names:   Имена полей подлежащих включению или исключению из валидации.
+        :exclude: Флаг исключения (см. is_selected).
+    """
+
+    signature = inspect.signature(func)
 
     annotations = {}
+    positions = {}
+    keywords = []
+    var_positional = None
+    var_keyword = None
+    positional_count = 0
+    keyword_indexes = {}
+    required = []
+    has_var_positional = False
+    has_var_keyword = False
+
+    for parameter in signature.parameters.values():
+
+        name = parameter.name
+        kind = parameter.kind
+        index = positional_count
+
+        if kind in POSITIONAL_KINDS:
+            positional_count += 1
+        if kind is inspect.Parameter.POSITIONAL_OR_KEYWORD:
+            keyword_indexes[name] = index
+        if kind is inspect.Parameter.KEYWORD_ONLY:
+            keyword_indexes[name] = index = sys.maxsize
+        if kind is inspect.Parameter.VAR_POSITIONAL:
+            has_var_positional = True
+        if kind is inspect.Parameter.VAR_KEYWORD:
+            has_var_keyword = True
+
+        if parameter.default is inspect.Parameter.empty and kind not in (
+            inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD,
+        ):
+            required.append((name, index))
+
+        if parameter.annotation is inspect.Parameter.empty or \
+                not is_selected(name, names, exclude):
+            continue
+
+        annotations[name] = parameter.annotation
+        check_discriminated(name, parameter.annotation)
+
+        if kind in POSITIONAL_KINDS:
+            positions[name] = index
+        if kind in KEYWORD_KINDS:
+            keywords.append(name)
+        if kind is inspect.Parameter.VAR_POSITIONAL:
+            var_positional = name
+        if kind is inspect.Parameter.VAR_KEYWORD:
+            var_keyword = name
+
+    result_annotations = None
+    if is_selected("return", names, exclude):
+        annotation = func.__annotations__.get("return")
+        if annotation is None:
+            annotation = type(None)
+        check_discriminated("return", annotation)
+        result_annotations = {"return": annotation}
+
+    classes = {}
+    shallow_types = {}
+    for fields_annotations in (annotations, result_annotations or {}):
+        for name, annotation in fields_annotations.items():
+            annotation_classes = get_annotation_classes(annotation)
+            if annotation_classes:
+                classes[name] = annotation_classes
+            types = get_shallow_types(annotation)
+            if types is not None:
+                shallow_types[name] = types
+
+    return ValidationPlan(
+        func=func,
+        signature=signature,
+        annotations=annotations,
+        positions=positions,
+        keywords=tuple(keywords),
+        var_positional=var_positional,
+        var_keyword=var_keyword,
+        positional_count=positional_count,
+        max_positional=None if has_var_positional else positional_count,
+        keyword_indexes=keyword_indexes,
+        required=tuple(required),
+        has_var_keyword=has_var_keyword,
+        result_annotations=result_annotations,
+        classes=classes,
+        shallow_types=shallow_types,
+    )
+
+
+def is_simple_call(
+    plan: ValidationPlan, args: tuple, kwargs: Dict[str, Any]
+) -> bool:
+    """ Возвращает True, если аргументы вызова можно связать с именами
+        параметров без `inspect.Signature.bind`.
+
+        Для всех остальных вызовов (в том числе ошибочных) используется
+        `bind`, который, при необходимости, и поднимет TypeError.
+    """
+
+    args_count = len(args)
+
+    if plan.max_positional is not None and args_count > plan.max_positional:
+        return False
+
+    for name, index in plan.required:
+        if index >= args_count and name not in kwargs:
+            return False
+
+    for name in kwargs:
+        index = plan.keyword_indexes.get(name)
+        if index is None:
+            if not plan.has_var_keyword or plan.var_keyword is not None:
+                return False
+        elif index < args_count:
+            return False
+
+    return True
+
+
+def get_values(
+    plan: ValidationPlan, args: tuple, kwargs: Dict[str, Any]
+) -> Dict[str, Any]:
+    """ Связывает отобранные для валидации аргументы функции с полученными(!)
+        значениями.
+
+        Возвращает словарь с именами аргументов и их значениями.
+    """
+
+    annotations = plan.annotations
+
+    if not is_simple_call(plan, args, kwargs):
+        bound = plan.signature.bind(*args, **kwargs)
+        return {
+            name: value for name, value in bound.arguments.items()
+            if name in annotations
+        }
+
     values = {}
+    args_count = len(args)
+
+    for name, index in plan.positions.items():
+        if index >= args_count:
+            break
+        values[name] = args[index]
+
+    if plan.var_positional is not None and \
+            args_count > plan.positional_count:
+        values[plan.var_positional] = args[plan.positional_count:]
+
+    if kwargs:
+        for name in plan.keywords:
+            if name in kwargs:
+                values[name] = kwargs[name]
+
+    return values
+
+
+def get_annotations(
+    plan: ValidationPlan, values: Dict[str, Any]
+) -> Dict[str, Any]:
+    """ Возвращает словарь с аннотациями для полученных значений.
+
+        Если получены значения для всех отобранных аргументов, то
+        возвращается словарь из плана (без создания нового).
+    """
+
+    annotations = plan.annotations
+    if len(values) == len(annotations):
+        return annotations
+
+    return {name: annotations[name] for name in values}
+
+
+def get_validator_class_name(
+    base_val_class: type, annotations: Dict[str, Any]
+) -> str:
+    """ Возвращает имя класса для валидации полей из `annotations`: имя
+        базового класса и имена полей, например "ModelForValidation[a, b]".
+
+        По имени видно, какие поля валидирует класс (в сообщениях об
+        ошибках, в repr и при профилировании).
+    """
+
+    return f"{base_val_class.__name__}[{', '.join(annotations)}]"
+
+
+def is_json_annotation(
+    annotation: Any, is_model: Callable[[type], bool]
+) -> bool:
+    """ Возвращает True, если аннотация - класс модели или List[модель]
+        (модель определяется функцией is_model), или Discriminated
+        (Optional[Discriminated]) с моделями.
+    """
+
+    discriminated = get_discriminated(annotation)
+    if discriminated is not None:
+        return all(
+            inspect.isclass(cls) and is_model(cls)
+            for cls in discriminated.union.__args__
+        )
+
+    if getattr(annotation, "__origin__", None) is list:
+        annotation = annotation.__args__[0]
+
+    return inspect.isclass(annotation) and is_model(annotation)
+
+
+def parse_json_values(
+    annotations: Dict[str, Any], values: Dict[str, Any],
+    is_model: Callable[[type], bool], loads: Callable = json.loads,
+) -> Dict[str, Any]:
+    """ Разбирает как JSON значения-строки (str, bytes, bytearray) полей, в
+        аннотации которых модель или List[модель] (см. is_json_annotation).
+
+        Возвращает словарь значений, в котором такие строки заменены на
+        результат их разбора (если таких строк нет, то возвращается
+        исходный словарь). Если строку разобрать не удалось, то поднимает
+        JSONParsingError.
+
+        Используется функциями валидаторами, если в параметре `extra` есть
+        ключ `is_parse_json` со значением True.
+    """
+
+    parsed = None
+
+    for name, value in values.items():
+        if isinstance(value, (str, bytes, bytearray)) and \
+                is_json_annotation(annotations[name], is_model):
+            try:
+                data = loads(value)
+            except ValueError as error:
+                raise JSONParsingError(f"{name}: invalid JSON: {error}")
+            if parsed is None:
+                parsed = dict(values)
+            parsed[name] = data
+
+    return values if parsed is None else parsed
 
-    for field in fields:
-        field_name = field.name
-        annotations[field_name] = field.annotation
-        values[field_name] = field.value
 
-    return annotations, values
+def get_error_class(
+    is_arguments: bool, error: Optional[Exception] = None
+) -> type:
+    """ Возвращает класс исключения для ошибок валидации аргументов или
+        результата.
+
+        Если ошибка `error` аргументов - ошибка разбора JSON, то
+        возвращается JSONParsingArgumentsError (наследник и
+        ValidationArgumentsError, и JSONParsingError).
+    """
+
+    if is_arguments:
+        if isinstance(error, JSONParsingError):
+            return JSONParsingArgumentsError
+        return ValidationArgumentsError
+
+    return ValidationReturnError
+
+
+def start_chunks(
+    annotations: Dict[str, Any], values: Dict[str, Any],
+    validator: Callable, is_replace: bool, extra: dict, chunk_size: int,
+    executor: Optional[Executor],
+) -> Tuple[Dict[str, Any], Dict[str, Any], Optional[parallel.Chunks]]:
+    """ Отправляет большие коллекции на параллельную валидацию по частям
+        (см. модуль parallel).
+
+        Возвращает аннотации и значения остальных полей и части (или None,
+        если больших коллекций нет).
+    """
+
+    names = parallel.get_chunked_names(annotations, values, chunk_size)
+    if not names:
+        return annotations, values, None
+
+    chunks = parallel.submit_chunks(
+        executor, validator, annotations, values, names, chunk_size,
+        is_replace, extra,
+    )
+    values = {name: v for name, v in values.items() if name not in names}
+    annotations = {name: annotations[name] for name in values}
+
+    return annotations, values, chunks
+
+
+def finish_chunks(
+    result: Optional[Dict[str, Any]], replaceable: Dict[str, Any],
+    errors: List[str], is_replace: bool, is_arguments: bool,
+) -> Optional[Dict[str, Any]]:
+    """ Объединяет результат валидации остальных полей с результатами
+        валидации частей коллекций (или поднимает исключение с ошибками).
+    """
+
+    if errors:
+        raise get_error_class(is_arguments)(
+            f"Validation error {ValidationError}: {chr(10).join(errors)}."
+        )
+
+    if is_replace and replaceable:
+        result = {**(result or {}), **replaceable}
+
+    return result
 
 
 def run_validation(
-    fields: List[FieldData],
+    annotations: Dict[str, Any],
+    values: Dict[str, Any],
     validator: Callable,
     is_replace: bool,
     extra: dict,
     is_arguments: bool,
-) -> Dict[str, Any]:
-    """ Преобразует список полей в словари, запускает валидацию и возвращает
-        ее результат.
+    chunk_size: int = 0,
+    executor: Optional[Executor] = None,
+) -> Optional[Dict[str, Any]]:
+    """ Запускает валидацию и возвращает ее результат.
+
+        Если chunk_size больше 0, то большие коллекции валидируются по
+        частям параллельно (см. модуль parallel).
     """
+
+    all_values = values
+    chunks = None
+    if chunk_size:
+        annotations, values, chunks = start_chunks(
+            annotations, values, validator, is_replace, extra, chunk_size,
+            executor,
+        )
+
     try:
-        annotations, values = get_annotations_values_dicts(fields)
-        result = validator(
-            annotations, values, is_replace, extra
+        result = None
+        if values or chunks is None:
+            result = validator(annotations, values, is_replace, extra)
+    except Exception as error:
+
+        if chunks is not None:
+            parallel.cancel_chunks(chunks)
+
+        raise get_error_class(is_arguments, error)(
+            f"Validation error {type(error)}: {str(error)}."
+        ) from error
+
+    if chunks is not None:
+        replaceable, errors = parallel.collect_chunks(
+            all_values, chunks, chunk_size
+        )
+        result = finish_chunks(
+            result, replaceable, errors, is_replace, is_arguments
         )
+
+    return result
+
+
+def get_columns_route(validator: Callable) -> Route:
+    """ Возвращает правило для аннотаций Columns, которое валидирует
+        колонки функцией `validator` (см. модуль columns).
+    """
+
+    return _columns_routes.get(
+        validator,
+        lambda: Route(
+            is_match=is_columns, validator=make_validator(validator),
+            is_fallback=False,
+        ),
+    )
+
+
+def get_routes(
+    plan: ValidationPlan, routes: Tuple[Route, ...], validator: Callable
+) -> Dict[str, Route]:
+    """ Возвращает словарь с именами полей плана (в том числе "return") и
+        первыми подходящими для их аннотаций правилами: из BUILTIN_ROUTES,
+        правилом для Columns (с функцией валидатора `validator`) и из
+        `routes` (см. Settings.routes).
+    """
+
+    result = {}
+    routes = BUILTIN_ROUTES + (get_columns_route(validator), ) + \
+        tuple(routes)
+    result_annotations = plan.result_annotations or {}
+
+    for fields_annotations in (plan.annotations, result_annotations):
+        for name, annotation in fields_annotations.items():
+            for route in routes:
+                if route.is_match(annotation):
+                    result[name] = route
+                    break
+
+    return result
+
+
+def split_routed_values(
+    routes: Dict[str, Route], values: Dict[str, Any]
+) -> Tuple[Dict[Route, Dict[str, Any]], Dict[str, Any]]:
+    """ Разделяет значения на группы по правилам.
+
+        Возвращает словарь {правило: значения} и значения полей без правил.
+    """
+
+    groups: Dict[Route, Dict[str, Any]] = {}
+    rest = {}
+
+    for name, value in values.items():
+        route = routes.get(name)
+        if route is None:
+            rest[name] = value
+        else:
+            groups.setdefault(route, {})[name] = value
+
+    return groups, rest
+
+
+def route_values(
+    routes: Dict[str, Route], annotations: Dict[str, Any],
+    values: Dict[str, Any], is_replace: bool, extra: dict,
+    is_arguments: bool,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """ Валидирует значения полей, для которых есть правила, функциями
+        валидаторов из правил (см. Settings.routes).
+
+        Возвращает словарь значений для замены и значения, которые нужно
+        валидировать функцией валидатора из настроек: значения полей без
+        правил и значения групп, которые не прошли валидацию по правилам
+        с Route.is_fallback (для остальных правил поднимается исключение,
+        как в run_validation).
+    """
+
+    groups, rest = split_routed_values(routes, values)
+    replaceable = {}
+
+    for route, group_values in groups.items():
+        group_annotations = {name: annotations[name] for name in group_values}
+        if not route.is_fallback:
+            result = run_validation(
+                group_annotations, group_values, route.validator,
+                is_replace, extra, is_arguments,
+            )
+        else:
+            try:
+                result = route.validator(
+                    group_annotations, group_values, is_replace, extra
+                )
+            except Exception:
+                rest.update(group_values)
+                continue
+        if result:
+            replaceable.update(result)
+
+    return replaceable, rest
+
+
+async def async_route_values(
+    routes: Dict[str, Route], annotations: Dict[str, Any],
+    values: Dict[str, Any], is_replace: bool, extra: dict,
+    is_arguments: bool,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """ Асинхронная версия route_values (функции валидаторов из правил
+        могут быть асинхронными).
+    """
+
+    groups, rest = split_routed_values(routes, values)
+    replaceable = {}
+
+    for route, group_values in groups.items():
+        group_annotations = {name: annotations[name] for name in group_values}
+        if not route.is_fallback:
+            result = await async_run_validation(
+                group_annotations, group_values, route.validator,
+                is_replace, extra, is_arguments,
+            )
+        else:
+            try:
+                result = route.validator(
+                    group_annotations, group_values, is_replace, extra
+                )
+                if inspect.isawaitable(result):
+                    result = await result
+            except Exception:
+                rest.update(group_values)
+                continue
+        if result:
+            replaceable.update(result)
+
+    return replaceable, rest
+
+
+def merge_replaceable(
+    routed: Optional[Dict[str, Any]], replaceable: Optional[Dict[str, Any]]
+) -> Optional[Dict[str, Any]]:
+    """ Объединяет значения для замены, полученные по правилам и функцией
+        валидатора из настроек.
+    """
+
+    if not routed:
+        return replaceable
+
+    if replaceable:
+        routed.update(replaceable)
+
+    return routed
+
+
+def is_async_validator(validator: Callable) -> bool:
+    """ Возвращает True, если функция для валидации асинхронная."""
+
+    return inspect.iscoroutinefunction(validator) or \
+        inspect.iscoroutinefunction(getattr(validator, "__call__", None))
+
+
+def check_sync_validators(settings: Settings):
+    """ Поднимает TypeError, если функция валидатора из настроек или из
+        какого-либо правила (см. Settings.routes) асинхронная (для
+        синхронного декоратора).
+    """
+
+    validators = [settings.validator]
+    validators.extend(route.validator for route in settings.routes)
+
+    for validator in validators:
+        if is_async_validator(validator):
+            raise TypeError(
+                f"Validator {validator!r} is a coroutine function, "
+                "it can only be used with the async_validate decorator."
+            )
+
+
+async def gather_validation(
+    annotations: Dict[str, Any],
+    values: Dict[str, Any],
+    validator: Callable,
+    is_replace: bool,
+    extra: dict,
+) -> Optional[Dict[str, Any]]:
+    """ Вызывает validator отдельно для каждого поля и выполняет эти вызовы
+        конкурентно.
+
+        Возвращает объединенный результат всех вызовов. Если валидация
+        хотя бы одного поля закончилась неудачно, то поднимает исключение с
+        сообщениями обо всех ошибках.
+    """
+
+    results = await asyncio.gather(*(
+        validator({name: annotations[name]}, {name: value}, is_replace, extra)
+        for name, value in values.items()
+    ), return_exceptions=True)
+
+    replaceable = {}
+    errors = []
+
+    for result in results:
+        if isinstance(result, BaseException):
+            if not isinstance(result, Exception):
+                raise result
+            errors.append(f"{type(result)}: {str(result)}")
+        elif result:
+            replaceable.update(result)
+
+    if errors:
+        raise ValidationError("\n".join(errors))
+
+    return replaceable or None
+
+
+async def async_run_validation(
+    annotations: Dict[str, Any],
+    values: Dict[str, Any],
+    validator: Callable,
+    is_replace: bool,
+    extra: dict,
+    is_arguments: bool,
+    is_concurrent: bool = False,
+    chunk_size: int = 0,
+    executor: Optional[Executor] = None,
+) -> Optional[Dict[str, Any]]:
+    """ Асинхронная версия run_validation.
+
+        Функция для валидации может быть как обычной, так и асинхронной.
+        Если is_concurrent равен True, и validator асинхронный, то поля
+        будут валидироваться конкурентно (см. gather_validation).
+        Большие коллекции валидируются по частям (см. chunk_size) только
+        обычной (не асинхронной) функцией валидатора.
+    """
+
+    is_async = is_async_validator(validator)
+
+    all_values = values
+    chunks = None
+    if chunk_size and not is_async:
+        annotations, values, chunks = start_chunks(
+            annotations, values, validator, is_replace, extra, chunk_size,
+            executor,
+        )
+
+    try:
+        result = None
+        if is_concurrent and len(values) > 1 and is_async:
+            result = await gather_validation(
+                annotations, values, validator, is_replace, extra
+            )
+        elif values or chunks is None:
+            result = validator(annotations, values, is_replace, extra)
+            if inspect.isawaitable(result):
+                result = await result
     except Exception as error:
 
-        error_class = ValidationArgumentsError if is_arguments \
-            else ValidationReturnError
+        if chunks is not None:
+            parallel.cancel_chunks(chunks)
+
+        raise get_error_class(is_arguments, error)(
+            f"Validation error {type(error)}: {str(error)}."
+        ) from error
 
-        raise error_class(f"Validation error {type(error)}: {str(error)}.")
+    if chunks is not None:
+        replaceable, errors = await parallel.async_collect_chunks(
+            all_values, chunks, chunk_size
+        )
+        result = finish_chunks(
+            result, replaceable, errors, is_replace, is_arguments
+        )
 
     return result
 
 
 def replace_args_kwargs(
-    func: Callable, args: tuple, kwargs: Dict[str, Any],
+    plan: ValidationPlan, args: tuple, kwargs: Dict[str, Any],
     replaceable_arguments: Dict[str, Any],
 ) -> Tuple[tuple, Dict[str, Any]]:
     """ Производит замену значений аргументов из args и kwargs на значения
         из replaceable_arguments (только тех, которые есть в
         replaceable_arguments) и возвращает новые args и kwargs для функции.
 
-        :func:   Сылка на функцию, для сигнатуры которой будут создаваться
-                 новые значения для позиционных и именованных аргументов.
+        Кортеж args пересоздается только если действительно изменилось
+        значение хотя бы одного позиционного аргумента.
+
+        :plan:   План валидации функции.
         :args:   Кортеж с исходными значениями позиционных аргументов
                  предназначавшихся для передачи в функцию.
         :kwargs: Словарь с исходными значениями именованных аргументов
@@ -113,20 +1052,33 @@ def replace_args_kwargs(
                                 значениями.
     """
 
-    parameters = inspect.signature(func).parameters
+    new_args = None
+
+    for name, value in replaceable_arguments.items():
+
+        if name in kwargs:
+            kwargs[name] = value
 
-    parameters_keys = list(parameters.keys())
-    new_args = list(args)
+        elif name == plan.var_positional:
+            if new_args is None:
+                new_args = list(args)
+            new_args[plan.positional_count:] = value
 
-    for key in replaceable_arguments.keys():
+        elif name == plan.var_keyword:
+            kwargs.update(value)
 
-        if kwargs.get(key) is None:
-            pos = parameters_keys.index(key)
-            new_args[pos] = replaceable_arguments[key]
         else:
-            kwargs[key] = replaceable_arguments[key]
+            index = plan.positions[name]
+            if args[index] is value:
+                continue
+            if new_args is None:
+                new_args = list(args)
+            new_args[index] = value
 
-    return tuple(new_args), kwargs
+    if new_args is not None:
+        args = tuple(new_args)
+
+    return args, kwargs
 
 
 def get_names_from_decorator(names_or_func: tuple) -> tuple:
@@ -145,91 +1097,547 @@ def get_names_from_decorator(names_or_func: tuple) -> tuple:
     return names_from_decorator
 
 
-def before(
-    func: Callable, args: tuple, kwargs: Dict[str, Any],
-    names_or_func: Any, exclude: bool, settings: Settings,
-) -> Tuple[tuple, Dict[str, Any]]:
-    """ Часть декоратора которая валидирует входящие аргументы декорируемой
-        функции.
-        Выполняется до вызова декорируемой функции.
+def check_shallow(
+    plan: ValidationPlan, values: Dict[str, Any], is_arguments: bool
+) -> None:
+    """ Поверхностная проверка значений (см. get_shallow_types).
 
-        Получает функцию, все её аргументы, и все аргументы декоратора.
+        Если тип значения не подходит, то поднимает исключение.
+    """
+
+    shallow_types = plan.shallow_types
+
+    for name, value in values.items():
+        types = shallow_types.get(name)
+        if types is not None and not isinstance(value, types):
+
+            error_class = ValidationArgumentsError if is_arguments \
+                else ValidationReturnError
+
+            raise error_class(
+                f"Validation error <shallow>: {name} has type "
+                f"{type(value)}, expected one of {types}."
+            )
+
+
+def is_trusted(
+    value: Any, classes: Optional[Tuple[type, ...]], settings: Settings
+) -> bool:
+    """ Возвращает True, если значение является доверенным экземпляром
+        одного из классов аннотации (см. Settings.is_trust_instances).
+    """
+
+    return classes is not None and isinstance(value, classes) and (
+        not settings.is_trust_marked_only or is_marked(value)
+    )
+
+
+def get_untrusted_values(
+    plan: ValidationPlan, values: Dict[str, Any], settings: Settings
+) -> Dict[str, Any]:
+    """ Возвращает словарь значений без доверенных экземпляров.
+
+        Если доверенных экземпляров нет, то возвращается исходный словарь.
+    """
+
+    classes = plan.classes
+
+    for name, value in values.items():
+        if is_trusted(value, classes.get(name), settings):
+            break
+    else:
+        return values
+
+    return {
+        name: value for name, value in values.items()
+        if not is_trusted(value, classes.get(name), settings)
+    }
+
+
+def mark_replaced(
+    plan: ValidationPlan, replaceable: Dict[str, Any]
+) -> None:
+    """ Помечает экземпляры классов аннотаций, полученные при замене
+        значений (см. valdec.markers).
+    """
+
+    classes = plan.classes
+
+    for name, value in replaceable.items():
+        annotation_classes = classes.get(name)
+        if annotation_classes is not None and \
+                isinstance(value, annotation_classes):
+            mark(value)
+
+
+def validate_values(
+    plan: ValidationPlan, values: Dict[str, Any], settings: Settings
+) -> Optional[Dict[str, Any]]:
+    """ Валидирует значения аргументов функции (уже связанные с именами
+        аргументов, см. get_values) по её плану валидации.
+
+        Возвращает словарь с именами аргументов и значениями для замены
+        (или None).
+    """
+
+    level = plan.level
+    if level != levels.FULL:
+        if level == levels.SHALLOW:
+            check_shallow(plan, values, True)
+        return None
+
+    if settings.is_trust_instances:
+        values = get_untrusted_values(plan, values, settings)
+    if not values:
+        return None
+
+    if settings.limits is not None:
+        check_limits(settings.limits, values)
+
+    logger.debug("Going to validate arguments: %s", values)
+
+    routed = None
+    if plan.routes:
+        routed, values = route_values(
+            plan.routes, plan.annotations, values,
+            settings.is_replace_args, settings.extra, is_arguments=True,
+        )
+
+    replaceable_args = None
+    if values:
+        replaceable_args = run_validation(
+            get_annotations(plan, values),
+            values,
+            settings.validator,
+            settings.is_replace_args,
+            settings.extra,
+            is_arguments=True,
+            chunk_size=settings.chunk_size,
+            executor=settings.executor,
+        )
+    replaceable_args = merge_replaceable(routed, replaceable_args)
+
+    if replaceable_args is not None:
+
+        logger.debug("Replace: %s", replaceable_args)
+
+        if settings.is_trust_instances:
+            mark_replaced(plan, replaceable_args)
+
+    return replaceable_args
+
+
+def validate_arguments(
+    plan: ValidationPlan, args: tuple, kwargs: Dict[str, Any],
+    settings: Settings,
+) -> Tuple[tuple, Dict[str, Any]]:
+    """ Валидирует входящие аргументы функции по её плану валидации.
 
         Возвращает аргументы для вызова функции (args и kwargs, возможно
         измененные).
     """
 
-    names_from_decorator = get_names_from_decorator(names_or_func)
+    if not plan.annotations or plan.level == levels.OFF:
+        return args, kwargs
 
-    data_with_annotation = get_data_with_annotations(
-        func, args, kwargs
+    replaceable_args = validate_values(
+        plan, get_values(plan, args, kwargs), settings
     )
-    if data_with_annotation:
-        data_for_validation = get_data_for_validation(
-            data_with_annotation, names_from_decorator, exclude
+    if replaceable_args is not None:
+        args, kwargs = replace_args_kwargs(
+            plan, args, kwargs, replaceable_args
         )
-        if data_for_validation:
 
-            logger.debug(f"Going to validate arguments: {data_for_validation}")
+    return args, kwargs
 
-            replaceable_args = run_validation(
-                data_for_validation,
-                settings.validator,
-                settings.is_replace_args,
-                settings.extra,
-                is_arguments=True,
-            )
-            if replaceable_args is not None:
 
-                logger.debug(f"Replace: {replaceable_args}")
+def validate_result(
+    plan: ValidationPlan, result: Any, settings: Settings
+) -> Any:
+    """ Валидирует результат функции по её плану валидации.
 
-                args, kwargs = replace_args_kwargs(
-                    func, args, kwargs, replaceable_args
-                )
-    return args, kwargs
+        Возвращает результат функции (возможно измененный).
+    """
 
+    annotations = plan.result_annotations
+    if annotations is None:
+        return result
 
-def after(
-    func: Callable, result: Any,
-    names_or_func: Any, exclude: bool, settings: Settings
-) -> Any:
-    """ Часть декоратора которая валидирует результат декорируемой функции.
-        Выполняется после вызова декорируемой функции.
+    level = plan.level
+    if level != levels.FULL:
+        if level == levels.SHALLOW:
+            check_shallow(plan, {"return": result}, False)
+        return result
 
-        Получает функцию, её результат, и все аргументы декоратора.
+    if settings.is_trust_instances and \
+            is_trusted(result, plan.classes.get("return"), settings):
+        return result
 
-        Возвращает результат функции (возможно измененный).
+    if settings.audit is not None:
+        get_auditor(settings.audit).submit(
+            validate_result, plan, result, settings
+        )
+        return result
+
+    values = {"return": result}
+
+    logger.debug("Going to validate: %s", values)
+
+    routed = None
+    if plan.routes:
+        routed, values = route_values(
+            plan.routes, annotations, values,
+            settings.is_replace_result, settings.extra, is_arguments=False,
+        )
+
+    replaceable = None
+    if values:
+        replaceable = run_validation(
+            annotations,
+            values,
+            settings.validator,
+            settings.is_replace_result,
+            settings.extra,
+            is_arguments=False,
+            chunk_size=settings.chunk_size,
+            executor=settings.executor,
+        )
+    replaceable = merge_replaceable(routed, replaceable)
+
+    # Вторая проверка (and replaceable) не нужна, но если будут подключать
+    # сторонние валидаторы, она пригодится
+    if replaceable is not None and replaceable:
+
+        logger.debug("Replace: %s", replaceable)
+
+        if settings.is_trust_instances:
+            mark_replaced(plan, replaceable)
+
+        result = replaceable["return"]
+
+    return result
+
+
+async def async_validate_values(
+    plan: ValidationPlan, values: Dict[str, Any], settings: Settings
+) -> Optional[Dict[str, Any]]:
+    """ Асинхронная версия validate_values (для декоратора async_validate).
     """
 
-    names_from_decorator = get_names_from_decorator(names_or_func)
+    level = plan.level
+    if level != levels.FULL:
+        if level == levels.SHALLOW:
+            check_shallow(plan, values, True)
+        return None
 
-    annotation = func.__annotations__.get("return")
-    if annotation is None:
-        annotation = type(None)
+    if settings.is_trust_instances:
+        values = get_untrusted_values(plan, values, settings)
+    if not values:
+        return None
 
-    data_with_annotation = [FieldData("return", result, annotation), ]
+    if settings.limits is not None:
+        check_limits(settings.limits, values)
+
+    logger.debug("Going to validate arguments: %s", values)
+
+    routed = None
+    if plan.routes:
+        routed, values = await async_route_values(
+            plan.routes, plan.annotations, values,
+            settings.is_replace_args, settings.extra, is_arguments=True,
+        )
+
+    replaceable_args = None
+    if values and plan.batcher is not None:
+        replaceable_args = await plan.batcher.validate(
+            get_annotations(plan, values), values
+        )
+    elif values:
+        replaceable_args = await async_run_validation(
+            get_annotations(plan, values),
+            values,
+            settings.validator,
+            settings.is_replace_args,
+            settings.extra,
+            is_arguments=True,
+            is_concurrent=settings.is_concurrent,
+            chunk_size=settings.chunk_size,
+            executor=settings.executor,
+        )
+    replaceable_args = merge_replaceable(routed, replaceable_args)
+
+    if replaceable_args is not None:
+
+        logger.debug("Replace: %s", replaceable_args)
+
+        if settings.is_trust_instances:
+            mark_replaced(plan, replaceable_args)
+
+    return replaceable_args
+
+
+async def async_validate_arguments(
+    plan: ValidationPlan, args: tuple, kwargs: Dict[str, Any],
+    settings: Settings,
+) -> Tuple[tuple, Dict[str, Any]]:
+    """ Асинхронная версия validate_arguments (для декоратора
+        async_validate).
+    """
 
-    data_for_validation = get_data_for_validation(
-        data_with_annotation, names_from_decorator, exclude
+    if not plan.annotations or plan.level == levels.OFF:
+        return args, kwargs
+
+    replaceable_args = await async_validate_values(
+        plan, get_values(plan, args, kwargs), settings
     )
-    if data_for_validation:
+    if replaceable_args is not None:
+        args, kwargs = replace_args_kwargs(
+            plan, args, kwargs, replaceable_args
+        )
 
-        logger.debug(f"Going to validate: {data_for_validation}")
+    return args, kwargs
 
-        replaceable = run_validation(
-            data_for_validation,
+
+async def async_validate_result(
+    plan: ValidationPlan, result: Any, settings: Settings
+) -> Any:
+    """ Асинхронная версия validate_result (для декоратора async_validate).
+    """
+
+    annotations = plan.result_annotations
+    if annotations is None:
+        return result
+
+    level = plan.level
+    if level != levels.FULL:
+        if level == levels.SHALLOW:
+            check_shallow(plan, {"return": result}, False)
+        return result
+
+    if settings.is_trust_instances and \
+            is_trusted(result, plan.classes.get("return"), settings):
+        return result
+
+    if settings.audit is not None:
+        auditor = get_auditor(settings.audit)
+        if is_async_validator(settings.validator):
+            auditor.submit_task(
+                async_validate_result, plan, result, settings
+            )
+        else:
+            auditor.submit(validate_result, plan, result, settings)
+        return result
+
+    values = {"return": result}
+
+    logger.debug("Going to validate: %s", values)
+
+    routed = None
+    if plan.routes:
+        routed, values = await async_route_values(
+            plan.routes, annotations, values,
+            settings.is_replace_result, settings.extra, is_arguments=False,
+        )
+
+    replaceable = None
+    if values:
+        replaceable = await async_run_validation(
+            annotations,
+            values,
             settings.validator,
             settings.is_replace_result,
             settings.extra,
             is_arguments=False,
+            chunk_size=settings.chunk_size,
+            executor=settings.executor,
         )
+    replaceable = merge_replaceable(routed, replaceable)
 
-        # Вторая проверка (and replaceable) не нужна, но если будут подключать
-        # сторонние валидаторы, она пригодится
-        if replaceable is not None and replaceable:
+    if replaceable is not None and replaceable:
 
-            logger.debug(f"Replace: {replaceable}")
+        logger.debug("Replace: %s", replaceable)
 
-            result = replaceable["return"]
+        if settings.is_trust_instances:
+            mark_replaced(plan, replaceable)
+
+        result = replaceable["return"]
 
     return result
+
+
+def get_defaults(plan: ValidationPlan) -> Dict[str, Any]:
+    """ Возвращает словарь с именами отобранных аргументов, у которых есть
+        значения по умолчанию, и этими значениями.
+
+        Значение по умолчанию None не возвращается: `i: int = None` - это
+        обычный способ объявить необязательный аргумент (как и в моделях
+        pydantic, где такое поле становится Optional).
+    """
+
+    parameters = plan.signature.parameters
+    empty = inspect.Parameter.empty
+
+    return {
+        name: parameters[name].default
+        for name in plan.annotations
+        if parameters[name].default is not empty and
+        parameters[name].default is not None
+    }
+
+
+def replace_defaults(plan: ValidationPlan, replaceable: Dict[str, Any]):
+    """ Заменяет функцию плана на её копию, у которой значения по
+        умолчанию (__defaults__ и __kwdefaults__) заменены на
+        отвалидированные значения. Сама декорируемая функция не
+        изменяется.
+
+        Значения заменяются только у обычных функций (см.
+        has_own_signature).
+    """
+
+    func = plan.func
+    if not has_own_signature(func):
+        return
+
+    defaults = list(func.__defaults__ or ())
+    kwdefaults = dict(func.__kwdefaults__ or {})
+
+    positional = [
+        name for name, parameter in plan.signature.parameters.items()
+        if parameter.kind in POSITIONAL_KINDS
+    ]
+    # Значения по умолчанию есть у последних позиционных параметров
+    offset = len(positional) - len(defaults)
+
+    for name, value in replaceable.items():
+        if name in kwdefaults:
+            kwdefaults[name] = value
+        elif name in positional:
+            defaults[positional.index(name) - offset] = value
+
+    copy_func = types.FunctionType(
+        func.__code__, func.__globals__, func.__name__,
+        tuple(defaults) or None, func.__closure__,
+    )
+    copy_func.__kwdefaults__ = kwdefaults or None
+    copy_func.__qualname__ = func.__qualname__
+    copy_func.__module__ = func.__module__
+    copy_func.__doc__ = func.__doc__
+    copy_func.__annotations__ = func.__annotations__
+    copy_func.__dict__.update(func.__dict__)
+
+    plan.func = copy_func
+    # Сигнатура с новыми значениями будет вычислена при обращении к ней
+    plan._signature = None
+
+
+def run_coroutine(coroutine: Any) -> Any:
+    """ Выполняет корутину и возвращает её результат (вне цикла событий,
+        например при декорировании функции во время импорта модуля).
+
+        Если в текущем потоке уже работает цикл событий, то корутина
+        выполняется в отдельном потоке.
+    """
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+
+    with ThreadPoolExecutor(1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
+def validate_defaults(
+    plan: ValidationPlan, settings: Settings, is_async: bool = False
+):
+    """ Валидирует значения по умолчанию отобранных аргументов функции.
+
+        Вызывается один раз, при декорировании функции (при вызовах
+        функции валидируются только полученные значения аргументов).
+        Если значения не прошли валидацию, то поднимает
+        ValidationArgumentsError. Если значения заменяются (см.
+        Settings.is_replace_args), то функция получит отвалидированные
+        значения по умолчанию (функция плана заменяется на копию
+        декорируемой функции с этими значениями, см. replace_defaults).
+
+        Значения валидируются с уровнем валидации, который действует при
+        декорировании (с уровнем OFF не валидируются).
+
+        :is_async: True для декоратора async_validate (функция валидатора
+                   может быть асинхронной).
+    """
+
+    defaults = get_defaults(plan)
+    if not defaults:
+        return
+
+    try:
+        if is_async and is_async_validator(settings.validator):
+            replaceable = run_coroutine(
+                async_validate_values(plan, defaults, settings)
+            )
+        else:
+            replaceable = validate_values(plan, defaults, settings)
+    except ValidationArgumentsError as error:
+        raise ValidationArgumentsError(
+            f"Default values of {levels.get_function_name(plan.func)}: "
+            f"{error}"
+        ) from error
+
+    if replaceable:
+        replace_defaults(plan, replaceable)
+
+
+def before(
+    func: Callable, args: tuple, kwargs: Dict[str, Any],
+    names_or_func: Any, exclude: bool, settings: Settings,
+) -> Tuple[tuple, Dict[str, Any]]:
+    """ Часть декоратора которая валидирует входящие аргументы декорируемой
+        функции.
+        Выполняется до вызова декорируемой функции.
+
+        Получает функцию, все её аргументы, и все аргументы декоратора.
+
+        Возвращает аргументы для вызова функции (args и kwargs, возможно
+        измененные).
+
+        *Примечание: сами декораторы создают план валидации один раз и
+        вызывают validate_arguments.
+    """
+
+    check_sync_validators(settings)
+    plan = get_validation_plan(
+        func, get_names_from_decorator(names_or_func), exclude
+    )
+    plan.routes = get_routes(
+        plan, settings.routes, settings.validator
+    )
+
+    return validate_arguments(plan, args, kwargs, settings)
+
+
+def after(
+    func: Callable, result: Any,
+    names_or_func: Any, exclude: bool, settings: Settings
+) -> Any:
+    """ Часть декоратора которая валидирует результат декорируемой функции.
+        Выполняется после вызова декорируемой функции.
+
+        Получает функцию, её результат, и все аргументы декоратора.
+
+        Возвращает результат функции (возможно измененный).
+
+        *Примечание: сами декораторы создают план валидации один раз и
+        вызывают validate_result.
+    """
+
+    check_sync_validators(settings)
+    plan = get_validation_plan(
+        func, get_names_from_decorator(names_or_func), exclude
+    )
+    plan.routes = get_routes(
+        plan, settings.routes, settings.validator
+    )
+
+    return validate_result(plan, result, settings)
@@ -0,0 +1,81 @@
+""" Функция валидатор для полей с аннотацией Buffer (см.
+    data_classes.Buffer).
+
+    Поля с такими аннотациями всегда валидируются этой функцией (см.
+    BUILTIN_ROUTES в utils), какой бы валидатор ни был указан в
+    настройках: pydantic, например, приводит bytearray к bytes и str к
+    bytes (создавая копию буфера), а при замене значений копия попадает в
+    функцию вместо исходного объекта.
+
+    Функция не копирует буферы и не читает их содержимое, и ничего не
+    заменяет.
+"""
+
+from typing import Any, Dict, Optional
+
+from valdec.data_classes import Buffer, Route
+from valdec.errors import ValidationError
+
+
+def is_buffer(annotation: Any) -> bool:
+    """ Возвращает True, если аннотация - Buffer."""
+
+    return isinstance(annotation, Buffer)
+
+
+def get_buffer_error(annotation: Buffer, value: Any) -> Optional[str]:
+    """ Возвращает описание ошибки, если значение не соответствует
+        аннотации, иначе None.
+    """
+
+    if not isinstance(value, annotation.types):
+        return f"type {type(value).__name__!r} is not a valid buffer type"
+
+    try:
+        with memoryview(value) as view:
+            size = view.nbytes
+            is_contiguous = view.c_contiguous
+    except (TypeError, ValueError) as error:
+        # Например, закрытый mmap
+        return f"buffer is not available ({error})"
+
+    if annotation.is_contiguous and not is_contiguous:
+        return "buffer is not contiguous"
+
+    if annotation.min_size is not None and size < annotation.min_size:
+        return f"buffer size {size} is less than {annotation.min_size}"
+
+    if annotation.max_size is not None and size > annotation.max_size:
+        return f"buffer size {size} is greater than {annotation.max_size}"
+
+    return None
+
+
+def validator(
+    annotations: Dict[str, Any], values: Dict[str, Any],
+    is_replace: bool, extra: dict
+) -> Optional[Dict[str, Any]]:
+    """ Функция для проверки соответствия значений полей их аннотациям
+        Buffer.
+
+        Параметры такие же, как у функций валидаторов pydantic и
+        ValidatedDC. Значения не заменяются, поэтому функция всегда
+        возвращает None.
+    """
+
+    errors = []
+
+    for name, value in values.items():
+        error = get_buffer_error(annotations[name], value)
+        if error is not None:
+            errors.append(f"{name}: {error}")
+
+    if errors:
+        raise ValidationError("\n".join(errors))
+
+    return None
+
+
+buffer_route = Route(
+    is_match=is_buffer, validator=validator, is_fallback=False
+)
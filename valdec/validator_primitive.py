@@ -0,0 +1,60 @@
+""" Функция валидатор для простых типов (int, float, str, bytes, bool,
+    None).
+
+    Значение считается валидным, только если его тип в точности совпадает
+    с аннотацией (без приведения типов и без наследников: True не является
+    валидным значением для int). Значения не заменяются.
+
+    Проверка не создает экземпляров классов валидации, поэтому она намного
+    дешевле, чем у других валидаторов. Её удобно использовать как правило
+    (см. Settings.routes) вместе с другим валидатором:
+    ```
+    settings = Settings(validator=validator, routes=(primitive_route, ))
+    ```
+    Тогда простые значения проверяются здесь, а значения, которые не прошли
+    проверку (например, "1" для int), валидируются основным валидатором
+    (который, может быть, приведет их к нужному типу).
+"""
+
+from typing import Any, Dict, Optional
+
+from valdec.data_classes import Route
+from valdec.errors import ValidationError
+
+PRIMITIVE_TYPES = frozenset((int, float, str, bytes, bool, type(None)))
+
+
+def is_primitive(annotation: Any) -> bool:
+    """ Возвращает True, если аннотация - простой тип."""
+
+    try:
+        return annotation in PRIMITIVE_TYPES
+    except TypeError:
+        return False
+
+
+def validator(
+    annotations: Dict[str, Any], values: Dict[str, Any],
+    is_replace: bool, extra: dict
+) -> Optional[Dict[str, Any]]:
+    """ Функция для проверки соответствия значений полей их аннотациям
+        (простым типам).
+
+        Параметры такие же, как у функций валидаторов pydantic и
+        ValidatedDC. Значения не заменяются, поэтому функция всегда
+        возвращает None.
+    """
+
+    errors = [
+        f"{name}: value {value!r} is not {annotations[name].__name__}"
+        for name, value in values.items()
+        if type(value) is not annotations[name]
+    ]
+
+    if errors:
+        raise ValidationError("\n".join(errors))
+
+    return None
+
+
+primitive_route = Route(is_match=is_primitive, validator=validator)
@@ -1,16 +1,33 @@
 """ Функция валидатор на pydantic.BaseModel."""
 
-from typing import Any, Dict, Optional
+import json
+from typing import Any, Dict, Optional, Set, Tuple, Type
 
-from pydantic import BaseModel, Extra, create_model, error_wrappers
+from pydantic import BaseModel, Extra, Field, create_model, error_wrappers
+from pydantic.json import pydantic_encoder
+from pydantic.utils import ROOT_KEY
 
+from valdec.caches import Cache
 from valdec.errors import ValidationError
+from valdec.identity import validate_memoized
+from valdec.incremental import validate_incremental
+from valdec.records import Record, to_records
+from valdec.strict import check_strict
+from valdec.utils import (get_validator_class_name, parse_json_values,
+                          resolve_discriminated)
 
 
 # Префикс к именам полей, которые будут использоваться для создания
 # валидирующего класса. Он необходим для предотвращения конфликта имен.
 NAME_PREFIX = "field__nm__prfx_"
 
+# Кэш валидирующих классов. Ключ - базовый класс и набор пар (имя поля,
+# аннотация), значение - класс и словарь для обратного преобразования имен
+# его полей в исходные имена. Количество классов ограничено, чтобы кэш не
+# удерживал классы из аннотаций, которые создаются во время работы
+# программы.
+_models = Cache(maxsize=1024)
+
 
 class ModelForValidation(BaseModel):
     """ Класс для валидации по умолчанию."""
@@ -22,6 +39,126 @@ class ModelForValidation(BaseModel):
         arbitrary_types_allowed = True
 
 
+def create_validator_class(
+    annotations: Dict[str, Any], base_val_class: Type[BaseModel]
+) -> Tuple[Type[BaseModel], Dict[str, str]]:
+    """ Создает класс для валидации полей из `annotations`.
+
+        Имена полей класса имеют префикс NAME_PREFIX, а исходные имена
+        указываются в их псевдонимах (alias). Поэтому экземпляр класса
+        создается непосредственно из словаря значений, и в сообщениях об
+        ошибках будут исходные имена. Имя класса содержит исходные имена
+        полей (см. utils.get_validator_class_name).
+
+        Возвращает класс и словарь {имя поля класса: исходное имя}.
+    """
+
+    kwargs = {"__base__": base_val_class}
+    names = {}
+
+    for field_name, field_annotation in annotations.items():
+        prefixed_name = NAME_PREFIX + field_name
+        kwargs[prefixed_name] = (
+            field_annotation, Field(..., alias=field_name)
+        )
+        names[prefixed_name] = field_name
+
+    return create_model(
+        get_validator_class_name(base_val_class, annotations), **kwargs
+    ), names
+
+
+def is_model(cls: type) -> bool:
+    """ Возвращает True, если класс - наследник BaseModel."""
+
+    return issubclass(cls, BaseModel)
+
+
+def get_validator_class(
+    annotations: Dict[str, Any], base_val_class: Type[BaseModel]
+) -> Tuple[Type[BaseModel], Dict[str, str]]:
+    """ Возвращает класс для валидации полей из `annotations` (и словарь
+        для обратного преобразования имен), создавая его только один раз для
+        каждого набора аннотаций (в том числе при одновременных вызовах из
+        нескольких потоков).
+    """
+
+    return _models.get(
+        (base_val_class, tuple(annotations.items())),
+        create_validator_class, annotations, base_val_class,
+    )
+
+
+def get_base_val_class(extra: dict) -> type:
+    """ Возвращает базовый класс для валидации из `extra` (ключ
+        `base_val_class`) или класс по умолчанию (ModelForValidation).
+    """
+
+    base_val_class = extra.get("base_val_class")
+    if base_val_class is None:
+        base_val_class = ModelForValidation
+
+    return base_val_class
+
+
+def validate_fields(instance: BaseModel, names: Set[str]) -> Dict[str, Any]:
+    """ Валидирует значения полей `names` экземпляра модели (с валидаторами
+        полей модели) и возвращает словарь с их значениями после валидации
+        (см. valdec.incremental).
+
+        Валидаторы всей модели (root_validator) выполняются так же, как
+        при создании экземпляра: pre - до валидации полей (со значениями
+        всех полей экземпляра), остальные - после нее. В словарь попадают и
+        значения других полей, которые изменили эти валидаторы.
+    """
+
+    model = type(instance)
+    current = instance.__dict__
+    values = dict(current)
+    result = {}
+    errors = []
+
+    for pre_validator in model.__pre_root_validators__:
+        try:
+            values = pre_validator(model, values)
+        except (ValueError, TypeError, AssertionError) as error:
+            raise ValidationError(str(error_wrappers.ValidationError(
+                [error_wrappers.ErrorWrapper(error, loc=ROOT_KEY)], model
+            )))
+
+    for name, field in model.__fields__.items():
+        if name not in names:
+            continue
+        value, error = field.validate(
+            values.get(name), values, loc=field.alias, cls=model
+        )
+        if error:
+            errors.append(error)
+        else:
+            values[name] = value
+
+    for skip_on_failure, post_validator in model.__post_root_validators__:
+        if skip_on_failure and errors:
+            continue
+        try:
+            values = post_validator(model, values)
+        except (ValueError, TypeError, AssertionError) as error:
+            errors.append(error_wrappers.ErrorWrapper(error, loc=ROOT_KEY))
+
+    if errors:
+        raise ValidationError(str(
+            error_wrappers.ValidationError(errors, model)
+        ))
+
+    for name in model.__fields__:
+        if name in values and (
+            name in names or values[name] is not current.get(name)
+        ):
+            result[name] = values[name]
+
+    return result
+
+
 def validator(
     annotations: Dict[str, Any], values: Dict[str, Any],
     is_replace: bool, extra: dict
@@ -47,36 +184,107 @@ def validator(
                       и этот класс будет использоваться для валидации.
                       Если в словаре `extra` НЕТ ключа `base_val_class`,
                       то для валидации используется класс ModelForValidation.
+                      Если в параметре `extra` имеется ключ `is_parse_json`
+                      со значением True, то поля с аннотацией `BaseModel`
+                      (или List[`BaseModel`]) могут получить JSON в виде str
+                      или bytes, который будет разобран функцией из ключа
+                      `json_loads` (по умолчанию json.loads) и затем
+                      отвалидирован.
+                      Если в параметре `extra` имеется ключ `is_strict`
+                      со значением True, то значения проверяются строго,
+                      без приведения типов и без создания экземпляров
+                      классов (см. valdec.strict), JSON не разбирается, и
+                      функция всегда возвращает None.
+                      Если в параметре `extra` имеется ключ `is_compact`
+                      со значением True, то экземпляры классов в
+                      значениях для замены заменяются компактными
+                      записями только для чтения (см. valdec.records).
+                      Если в параметре `extra` имеется ключ `is_memoized`
+                      со значением True, то вложенные объекты, которые
+                      встречаются в значениях несколько раз по ссылке,
+                      валидируются один раз, и в результате на их местах
+                      один и тот же экземпляр (см. valdec.identity).
+                      Если в параметре `extra` имеется ключ
+                      `is_incremental` со значением True, то у экземпляров,
+                      созданных этой функцией ранее, валидируются только
+                      поля, которым были присвоены значения (см.
+                      valdec.incremental).
     """
 
-    base_val_class = extra.get("base_val_class")
-    if base_val_class is None:
-        base_val_class = ModelForValidation
+    if extra.get("is_strict"):
+        check_strict(annotations, values)
+        return None
 
-    kwargs = {"__base__": base_val_class}
+    if extra.get("is_incremental"):
+        return validate_incremental(
+            validator, annotations, values, is_replace, extra, is_model,
+            validate_fields,
+        )
 
-    for field_name, field_annotation in annotations.items():
-        kwargs[NAME_PREFIX+field_name] = (field_annotation, ...)
+    if extra.get("is_memoized"):
+        return validate_memoized(
+            validator, annotations, values, is_replace, extra, is_model
+        )
+
+    if extra.get("is_parse_json"):
+        values = parse_json_values(
+            annotations, values, is_model, extra.get("json_loads", json.loads)
+        )
+
+    annotations = resolve_discriminated(annotations, values)
 
-    ValidatorClass = create_model("argument with the name of:", **kwargs)
+    base_val_class = get_base_val_class(extra)
+
+    ValidatorClass, names = get_validator_class(annotations, base_val_class)
 
     try:
-        instance = ValidatorClass(
-            **{NAME_PREFIX+k: v for k, v in values.items()}
-        )
+        instance = ValidatorClass(**values)
 
     except error_wrappers.ValidationError as error:
-        error_str = str(error).replace(NAME_PREFIX, "")
-        raise ValidationError(error_str)
+        raise ValidationError(str(error))
 
     result = None
     if is_replace:
         replaceable = {
-            name.replace(NAME_PREFIX, ""): value
-            for name, value in dict(instance).items()
+            names[name]: value
+            for name, value in instance.__dict__.items()
             # TODO Сделать фильтр для полей содержащих экземпляры BaseModel
         }
+        if replaceable and extra.get("is_compact"):
+            replaceable = to_records(replaceable)
         if replaceable:
             result = replaceable
 
     return result
+
+
+def json_default(value: Any) -> Any:
+    """ Функция для параметра `default` функций json.dumps (orjson.dumps).
+
+        Экземпляры BaseModel преобразуются в словари только на один уровень
+        (вложенные экземпляры сериализуются тем же способом при обходе),
+        поэтому весь объект обходится только один раз.
+        Записи (см. valdec.records) - так же.
+        Остальные значения преобразуются через pydantic_encoder.
+
+        *Примечание: псевдонимы полей и Config.json_encoders моделей не
+        учитываются.
+    """
+
+    if isinstance(value, BaseModel):
+        return value.__dict__
+
+    if isinstance(value, Record):
+        return value._asdict()
+
+    return pydantic_encoder(value)
+
+
+def dumps(value: Any) -> bytes:
+    """ Сериализует значение (например, отвалидированный результат функции)
+        в JSON (см. Settings.result_dumps).
+    """
+
+    return json.dumps(
+        value, default=json_default, separators=(",", ":")
+    ).encode()
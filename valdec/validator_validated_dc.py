@@ -1,17 +1,106 @@
 """ Функция валидатор на ValidatedDC."""
 
-from dataclasses import fields, make_dataclass
-from typing import Any, Dict, Optional
+from dataclasses import fields, is_dataclass, make_dataclass
+import json
+from typing import Any, Dict, Optional, Set, Tuple, Type
 
 from validated_dc import ValidatedDC, get_errors
 
+from valdec.caches import Cache
 from valdec.errors import ValidationError
+from valdec.identity import get_model_fields, validate_memoized
+from valdec.incremental import validate_incremental
+from valdec.records import Record, to_records
+from valdec.strict import check_strict
+from valdec.utils import (get_validator_class_name, parse_json_values,
+                          resolve_discriminated)
 
 
 # Префикс к именам полей, которые будут использоваться для создания
 # валидирующего класса. Он необходим для предотвращения конфликта имен.
 NAME_PREFIX = "field__nm__prfx_"
 
+# Кэш валидирующих классов. Ключ - базовый класс и набор пар (имя поля,
+# аннотация), значение - класс, словарь {исходное имя: имя поля класса} и
+# обратный ему словарь. Количество классов ограничено, чтобы кэш не
+# удерживал классы из аннотаций, которые создаются во время работы
+# программы.
+_classes = Cache(maxsize=1024)
+
+
+def create_validator_class(
+    annotations: Dict[str, Any], base_val_class: Type[ValidatedDC]
+) -> Tuple[Type[ValidatedDC], Dict[str, str], Dict[str, str]]:
+    """ Создает класс для валидации полей из `annotations` (имя класса
+        содержит исходные имена полей, см. utils.get_validator_class_name).
+
+        Возвращает класс, словарь {исходное имя: имя поля класса} и
+        словарь {имя поля класса: исходное имя}.
+    """
+
+    prefixed_names = {name: NAME_PREFIX+name for name in annotations}
+
+    ValidatorClass = make_dataclass(
+        get_validator_class_name(base_val_class, annotations),
+        [(prefixed_names[n], a) for n, a in annotations.items()],
+        bases=(base_val_class, )
+    )
+
+    names = {prefixed: name for name, prefixed in prefixed_names.items()}
+
+    return ValidatorClass, prefixed_names, names
+
+
+def is_model(cls: type) -> bool:
+    """ Возвращает True, если класс - наследник ValidatedDC."""
+
+    return issubclass(cls, ValidatedDC)
+
+
+def get_validator_class(
+    annotations: Dict[str, Any], base_val_class: Type[ValidatedDC]
+) -> Tuple[Type[ValidatedDC], Dict[str, str], Dict[str, str]]:
+    """ Возвращает класс для валидации полей из `annotations` (и словари
+        для преобразования имен), создавая его только один раз для каждого
+        набора аннотаций (в том числе при одновременных вызовах из
+        нескольких потоков).
+    """
+
+    return _classes.get(
+        (base_val_class, tuple(annotations.items())),
+        create_validator_class, annotations, base_val_class,
+    )
+
+
+def get_base_val_class(extra: dict) -> type:
+    """ Возвращает базовый класс для валидации из `extra` (ключ
+        `base_val_class`) или класс по умолчанию (ValidatedDC).
+    """
+
+    base_val_class = extra.get("base_val_class")
+    if base_val_class is None:
+        base_val_class = ValidatedDC
+
+    return base_val_class
+
+
+def validate_fields(
+    instance: ValidatedDC, names: Set[str]
+) -> Dict[str, Any]:
+    """ Валидирует значения полей `names` экземпляра датакласса и возвращает
+        словарь со значениями полей, которые нужно заменить (см.
+        valdec.incremental).
+    """
+
+    annotations = {
+        name: annotation
+        for name, annotation in get_model_fields(type(instance)).values()
+        if name in names
+    }
+    values = {name: getattr(instance, name) for name in annotations}
+
+    return validator(annotations, values, True, {}) or {}
+
 
 def validator(
     annotations: Dict[str, Any], values: Dict[str, Any],
@@ -40,20 +129,63 @@ def validator(
                       и этот класс будет использоваться для валидации.
                       Если в словаре `extra` НЕТ ключа `base_val_class`,
                       то для валидации используется класс ValidatedDC.
+                      Если в параметре `extra` имеется ключ `is_parse_json`
+                      со значением True, то поля с аннотацией `ValidatedDC`
+                      (или List[`ValidatedDC`]) могут получить JSON в виде str
+                      или bytes, который будет разобран функцией из ключа
+                      `json_loads` (по умолчанию json.loads) и затем
+                      отвалидирован.
+                      Если в параметре `extra` имеется ключ `is_strict`
+                      со значением True, то значения проверяются строго,
+                      без приведения типов и без создания экземпляров
+                      классов (см. valdec.strict), JSON не разбирается, и
+                      функция всегда возвращает None.
+                      Если в параметре `extra` имеется ключ `is_compact`
+                      со значением True, то экземпляры классов в
+                      значениях для замены заменяются компактными
+                      записями только для чтения (см. valdec.records).
+                      Если в параметре `extra` имеется ключ `is_memoized`
+                      со значением True, то вложенные объекты, которые
+                      встречаются в значениях несколько раз по ссылке,
+                      валидируются один раз, и в результате на их местах
+                      один и тот же экземпляр (см. valdec.identity).
+                      Если в параметре `extra` имеется ключ
+                      `is_incremental` со значением True, то у экземпляров,
+                      созданных этой функцией ранее, валидируются только
+                      поля, которым были присвоены значения (см.
+                      valdec.incremental).
     """
 
-    base_val_class = extra.get("base_val_class")
-    if base_val_class is None:
-        base_val_class = ValidatedDC
+    if extra.get("is_strict"):
+        check_strict(annotations, values)
+        return None
 
-    ValidatorClass = make_dataclass(
-        "ValidatorClass",
-        [(NAME_PREFIX+n, a) for n, a in annotations.items()],
-        bases=(base_val_class, )
+    if extra.get("is_incremental"):
+        return validate_incremental(
+            validator, annotations, values, is_replace, extra, is_model,
+            validate_fields,
+        )
+
+    if extra.get("is_memoized"):
+        return validate_memoized(
+            validator, annotations, values, is_replace, extra, is_model
+        )
+
+    if extra.get("is_parse_json"):
+        values = parse_json_values(
+            annotations, values, is_model, extra.get("json_loads", json.loads)
+        )
+
+    annotations = resolve_discriminated(annotations, values)
+
+    base_val_class = get_base_val_class(extra)
+
+    ValidatorClass, prefixed_names, names = get_validator_class(
+        annotations, base_val_class
     )
 
     instance: ValidatedDC = ValidatorClass(
-        **{NAME_PREFIX+n: v for n, v in values.items()}
+        **{prefixed_names[n]: v for n, v in values.items()}
     )
 
     errors = get_errors(instance)
@@ -63,13 +195,46 @@ def validator(
 
     result = None
     if is_replace:
+        # Для замены вернутся только те поля, в которых была замена
         replaceable = {
-            field.name.replace(NAME_PREFIX, ""): getattr(instance, field.name)
-            for field in fields(instance)
-            # Для замены вернутся только те поля, в которых была замена
-            if field.name in instance._replaced_field_names
+            names[name]: getattr(instance, name)
+            for name in instance._replaced_field_names
         }
+        if replaceable and extra.get("is_compact"):
+            replaceable = to_records(replaceable)
         if replaceable:
             result = replaceable
 
     return result
+
+
+def json_default(value: Any) -> Any:
+    """ Функция для параметра `default` функции json.dumps.
+
+        Экземпляры датаклассов (в том числе ValidatedDC) преобразуются в
+        словари только на один уровень (вложенные экземпляры сериализуются
+        тем же способом при обходе), поэтому весь объект обходится только
+        один раз. Записи (см. valdec.records) - так же.
+    """
+
+    if isinstance(value, Record):
+        return value._asdict()
+
+    if is_dataclass(value) and not isinstance(value, type):
+        return {
+            field.name: getattr(value, field.name) for field in fields(value)
+        }
+
+    raise TypeError(
+        f"Object of type {type(value).__name__} is not JSON serializable"
+    )
+
+
+def dumps(value: Any) -> bytes:
+    """ Сериализует значение (например, отвалидированный результат функции)
+        в JSON (см. Settings.result_dumps).
+    """
+
+    return json.dumps(
+        value, default=json_default, separators=(",", ":")
+    ).encode()
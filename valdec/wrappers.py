@@ -0,0 +1,202 @@
+""" Создание оберток с сигнатурой декорируемой функции (см.
+    Settings.is_specialized).
+
+    Обычная обертка декоратора принимает `*args, **kwargs`, и при каждом
+    вызове значения аргументов связываются с их именами (см. utils.get_values),
+    а после замены значений заново собираются args и kwargs.
+
+    Обертка, созданная здесь, имеет те же параметры, что и декорируемая
+    функция, поэтому значения сразу попадают в локальные переменные с
+    именами аргументов и передаются в функцию без пересборки кортежей и
+    словарей.
+
+    Чтобы валидировались только полученные(!) значения (как и в обычной
+    обертке), параметры со значениями по умолчанию получают в обертке
+    значение MISSING, которое заменяется на значение по умолчанию функции
+    перед её вызовом.
+"""
+
+import inspect
+from typing import Any, Callable, Dict, List
+
+from valdec import levels
+from valdec.context import trusted_context
+from valdec.data_classes import Settings, ValidationPlan
+from valdec.utils import (async_validate_result, async_validate_values,
+                          validate_result, validate_values)
+
+
+class Missing:
+    """ Класс значения "аргумент не получен"."""
+
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "<valdec.MISSING>"
+
+
+MISSING = Missing()
+
+SOURCE = """
+{define} wrapper({parameters}):
+    if _valdec_trusted_context.get() or _valdec_plan.level == _valdec_OFF:
+{fill_defaults}
+        _valdec_result = {wait}_valdec_func({call})
+    else:
+{validate_arguments}
+{fill_defaults}
+        _valdec_result = {wait}_valdec_validate_result(
+            _valdec_plan, {wait}_valdec_func({call}), _valdec_settings
+        )
+    if _valdec_settings.result_dumps is not None:
+        return _valdec_settings.result_dumps(_valdec_result)
+    return _valdec_result
+"""
+
+VALIDATE_ARGUMENTS = """
+        _valdec_values = {{}}
+{collect_values}
+        if _valdec_values:
+            _valdec_replaced = {wait}_valdec_validate_values(
+                _valdec_plan, _valdec_values, _valdec_settings
+            )
+            if _valdec_replaced is not None:
+{replace_values}
+"""
+
+
+def indent(lines: List[str], level: int) -> str:
+    """ Возвращает строки с отступом в `level` уровней (или pass)."""
+
+    return "\n".join(" " * 4 * level + line for line in lines or ["pass"])
+
+
+def get_wrapper_source(plan: ValidationPlan, is_async: bool) -> str:
+    """ Возвращает исходный код обертки для функции из плана валидации."""
+
+    parameters = []
+    call = []
+    fill_defaults = []
+    collect_values = []
+    replace_values = []
+
+    is_keyword_only_marker = True
+    previous_kind = None
+
+    for parameter in plan.signature.parameters.values():
+
+        name = parameter.name
+        kind = parameter.kind
+        has_default = parameter.default is not inspect.Parameter.empty
+        is_selected = name in plan.annotations
+
+        if previous_kind is inspect.Parameter.POSITIONAL_ONLY and \
+                kind is not inspect.Parameter.POSITIONAL_ONLY:
+            parameters.append("/")
+        previous_kind = kind
+
+        if kind is inspect.Parameter.VAR_POSITIONAL:
+            parameters.append(f"*{name}")
+            call.append(f"*{name}")
+            is_keyword_only_marker = False
+        elif kind is inspect.Parameter.VAR_KEYWORD:
+            parameters.append(f"**{name}")
+            call.append(f"**{name}")
+        else:
+            if kind is inspect.Parameter.KEYWORD_ONLY:
+                if is_keyword_only_marker:
+                    parameters.append("*")
+                    is_keyword_only_marker = False
+                call.append(f"{name}={name}")
+            else:
+                call.append(name)
+
+            if has_default:
+                parameters.append(f"{name}=_valdec_MISSING")
+                fill_defaults.append(
+                    f"if {name} is _valdec_MISSING: "
+                    f"{name} = _valdec_defaults[{name!r}]"
+                )
+            else:
+                parameters.append(name)
+
+        if not is_selected:
+            continue
+
+        if kind in (
+            inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD,
+        ):
+            collect_values.append(
+                f"if {name}: _valdec_values[{name!r}] = {name}"
+            )
+        elif has_default:
+            collect_values.append(
+                f"if {name} is not _valdec_MISSING: "
+                f"_valdec_values[{name!r}] = {name}"
+            )
+        else:
+            collect_values.append(f"_valdec_values[{name!r}] = {name}")
+
+        replace_values.append(
+            f"if {name!r} in _valdec_replaced: "
+            f"{name} = _valdec_replaced[{name!r}]"
+        )
+
+    if previous_kind is inspect.Parameter.POSITIONAL_ONLY:
+        parameters.append("/")
+
+    wait = "await " if is_async else ""
+
+    validate_arguments = ""
+    if plan.annotations:
+        validate_arguments = VALIDATE_ARGUMENTS.format(
+            collect_values=indent(collect_values, 2),
+            replace_values=indent(replace_values, 4),
+            wait=wait,
+        ).strip("\n")
+
+    return SOURCE.format(
+        define="async def" if is_async else "def",
+        parameters=", ".join(parameters),
+        call=", ".join(call),
+        fill_defaults=indent(fill_defaults, 2),
+        validate_arguments=validate_arguments,
+        wait=wait,
+    )
+
+
+def make_specialized_wrapper(
+    func: Callable, plan: ValidationPlan, settings: Settings, is_async: bool
+) -> Callable:
+    """ Создает обертку с сигнатурой функции `func`, которая валидирует её
+        аргументы и результат по плану валидации.
+
+        *Примечание: атрибуты функции (__name__, __doc__, __wrapped__ и
+        другие) нужно скопировать в обертку (functools.wraps).
+    """
+
+    defaults: Dict[str, Any] = {
+        name: parameter.default
+        for name, parameter in plan.signature.parameters.items()
+        if parameter.default is not inspect.Parameter.empty
+    }
+
+    namespace = {
+        "_valdec_func": func,
+        "_valdec_plan": plan,
+        "_valdec_settings": settings,
+        "_valdec_defaults": defaults,
+        "_valdec_MISSING": MISSING,
+        "_valdec_OFF": levels.OFF,
+        "_valdec_trusted_context": trusted_context,
+        "_valdec_validate_values":
+            async_validate_values if is_async else validate_values,
+        "_valdec_validate_result":
+            async_validate_result if is_async else validate_result,
+    }
+
+    source = get_wrapper_source(plan, is_async)
+    code = compile(source, f"<valdec wrapper of {func.__qualname__}>", "exec")
+    exec(code, namespace)
+
+    return namespace["wrapper"]